@@ -0,0 +1,235 @@
+"""Running flow statistics per address and per coin, updated once per fill.
+
+FlowAggregator keeps, for every address and coin that has traded, the
+volume, buy/sell split, VWAP, realized PnL (closed_pnl), fees and fill
+counts, plus fill counts and volume over rolling 1m/1h/24h windows. Each
+fill costs O(1) and reading a snapshot never rescans transactions. The
+hub seeds the all-time totals from the store's rollups, then feeds it
+every fill the store sees, so the dashboard reads these instead of
+summing its session's transactions.
+
+Rolling windows are rings of time buckets (a window of 24h is 24 one-hour
+buckets), so they are exact to within one bucket width.
+"""
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from records import BUY, FILLED, Transaction
+
+# (label, seconds, buckets)
+WINDOWS: Tuple[Tuple[str, float, int], ...] = (
+    ("1m", 60.0, 12),
+    ("1h", 3600.0, 12),
+    ("24h", 86400.0, 24),
+)
+
+
+class RollingWindow:
+    """Fill count and volume over the last `seconds`, in `buckets` time buckets."""
+
+    __slots__ = ("width", "counts", "volumes", "head", "count", "volume")
+
+    def __init__(self, seconds: float, buckets: int):
+        self.width = seconds / buckets
+        self.counts = array("q", bytes(8 * buckets))
+        self.volumes = array("d", bytes(8 * buckets))
+        self.head: Optional[int] = None  # newest bucket number
+        self.count = 0
+        self.volume = 0.0
+
+    def advance(self, now: float):
+        """Expire buckets that fell out of the window by `now`."""
+        bucket = int(now // self.width)
+        if self.head is None:
+            self.head = bucket
+            return
+        if bucket <= self.head:
+            return
+        size = len(self.counts)
+        # Amortized O(1): each bucket is cleared once per lap
+        for number in range(self.head + 1, self.head + 1 + min(bucket - self.head, size)):
+            slot = number % size
+            self.count -= self.counts[slot]
+            self.volume -= self.volumes[slot]
+            self.counts[slot] = 0
+            self.volumes[slot] = 0.0
+        if bucket - self.head >= size:
+            self.count, self.volume = 0, 0.0  # nothing left; drop float drift too
+        self.head = bucket
+
+    def add(self, at: float, volume: float):
+        self.advance(at)
+        bucket = int(at // self.width)
+        if bucket <= self.head - len(self.counts):
+            return  # older than the window
+        slot = bucket % len(self.counts)
+        self.counts[slot] += 1
+        self.volumes[slot] += volume
+        self.count += 1
+        self.volume += volume
+
+
+class FlowStats:
+    """Running totals for one address, one coin, or everything."""
+
+    __slots__ = (
+        "fills", "quantity", "buy_volume", "sell_volume", "realized_pnl",
+        "fees", "last_time", "windows",
+    )
+
+    def __init__(self, windows: Iterable[Tuple[str, float, int]] = WINDOWS):
+        self.fills = 0
+        self.quantity = 0.0
+        self.buy_volume = 0.0
+        self.sell_volume = 0.0
+        self.realized_pnl = 0.0
+        self.fees = 0.0
+        self.last_time = 0.0
+        self.windows = {label: RollingWindow(seconds, buckets) for label, seconds, buckets in windows}
+
+    @property
+    def volume(self) -> float:
+        return self.buy_volume + self.sell_volume
+
+    @property
+    def imbalance(self) -> float:
+        """(buy - sell) / (buy + sell) volume: +1 all buying, -1 all selling."""
+        volume = self.volume
+        return (self.buy_volume - self.sell_volume) / volume if volume else 0.0
+
+    @property
+    def vwap(self) -> float:
+        """Volume-weighted average price (only meaningful within one coin)."""
+        return self.volume / self.quantity if self.quantity else 0.0
+
+    def seed(self, fills: int, volume: float, net_notional: float, quantity: float, realized_pnl: float, fees: float):
+        """Add totals counted elsewhere (a flow_rollups row); the windows are left alone."""
+        self.fills += fills
+        self.buy_volume += (volume + net_notional) / 2
+        self.sell_volume += (volume - net_notional) / 2
+        self.quantity += quantity
+        self.realized_pnl += realized_pnl
+        self.fees += fees
+
+    def add_to_windows(self, tx: Transaction):
+        """Count a fill that is already in the totals in the rolling windows only."""
+        at = tx.time_ms / 1000
+        if at > self.last_time:
+            self.last_time = at
+        for window in self.windows.values():
+            window.add(at, tx.value_usd)
+
+    def add(self, tx: Transaction):
+        at = tx.time_ms / 1000
+        value = tx.value_usd
+        if tx.action == BUY:
+            self.buy_volume += value
+        else:
+            self.sell_volume += value
+        self.fills += 1
+        self.quantity += abs(tx.quantity)
+        self.realized_pnl += tx.closed_pnl or 0.0
+        self.fees += tx.fee or 0.0
+        if at > self.last_time:
+            self.last_time = at
+        for window in self.windows.values():
+            window.add(at, value)
+
+    def snapshot(self, now: float) -> Dict:
+        snapshot = {
+            "fills": self.fills,
+            "volume": self.volume,
+            "buy_volume": self.buy_volume,
+            "sell_volume": self.sell_volume,
+            "imbalance": self.imbalance,
+            "vwap": self.vwap,
+            "realized_pnl": self.realized_pnl,
+            "fees": self.fees,
+            "last_time": self.last_time,
+        }
+        for label, window in self.windows.items():
+            window.advance(now)
+            snapshot[f"fills_{label}"] = window.count
+            snapshot[f"volume_{label}"] = max(window.volume, 0.0)
+        return snapshot
+
+
+class FlowAggregator:
+    """FlowStats per address, per coin and overall, fed one fill at a time.
+
+    Open limit orders aren't fills and are ignored. Thread-safe: the hub
+    updates it from its poll thread while sessions read snapshots.
+    """
+
+    def __init__(self, windows: Iterable[Tuple[str, float, int]] = WINDOWS):
+        self.windows = tuple(windows)
+        self.total = FlowStats(self.windows)
+        self.by_address: Dict[str, FlowStats] = {}
+        self.by_coin: Dict[str, FlowStats] = {}
+        self._lock = threading.Lock()
+
+    def update(self, tx: Transaction):
+        if tx.order_type != FILLED:
+            return
+        with self._lock:
+            self._add(tx)
+
+    def update_many(self, transactions: Iterable[Transaction], windows_only: bool = False):
+        """Add fills; with windows_only, fills already in seeded totals fill the rolling windows."""
+        with self._lock:
+            for tx in transactions:
+                if tx.order_type == FILLED:
+                    self._add(tx, windows_only)
+
+    def seed(self, totals: Iterable[Tuple]):
+        """Start from stored all-time totals: store.rollup_totals() rows.
+
+        Rows are (address, coin, fills, volume, net_notional, quantity,
+        realized_pnl, fees); address "" rows are the per-coin totals.
+        """
+        with self._lock:
+            for address, coin, *values in totals:
+                if address:
+                    self._stats(self.by_address, address).seed(*values)
+                else:
+                    self._stats(self.by_coin, coin).seed(*values)
+                    self.total.seed(*values)
+
+    def _stats(self, table: Dict[str, FlowStats], key: str) -> FlowStats:
+        stats = table.get(key)
+        if stats is None:
+            stats = table[key] = FlowStats(self.windows)
+        return stats
+
+    def _add(self, tx: Transaction, windows_only: bool = False):
+        for stats in (self._stats(self.by_address, tx.address), self._stats(self.by_coin, tx.coin), self.total):
+            if windows_only:
+                stats.add_to_windows(tx)
+            else:
+                stats.add(tx)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict:
+        """Totals across every address."""
+        with self._lock:
+            return self.total.snapshot(now or time.time())
+
+    def address(self, address: str, now: Optional[float] = None) -> Optional[Dict]:
+        with self._lock:
+            stats = self.by_address.get(address)
+            return stats.snapshot(now or time.time()) if stats else None
+
+    def coin(self, coin: str, now: Optional[float] = None) -> Optional[Dict]:
+        with self._lock:
+            stats = self.by_coin.get(coin)
+            return stats.snapshot(now or time.time()) if stats else None
+
+    def top(self, by: str = "address", key: str = "volume_24h", n: int = 10, now: Optional[float] = None) -> List[Tuple[str, Dict]]:
+        """The n addresses (or coins) with the largest snapshot[key]."""
+        now = now or time.time()
+        table = self.by_address if by == "address" else self.by_coin
+        with self._lock:
+            snapshots = [(name, stats.snapshot(now)) for name, stats in table.items()]
+        snapshots.sort(key=lambda item: item[1][key], reverse=True)
+        return snapshots[:n]
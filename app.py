@@ -1,13 +1,24 @@
 import streamlit as st
-import pandas as pd
-import asyncio
-from datetime import datetime
-from scraper import AsyncHyperliquidScraper
-import threading
-import queue
-import logging
-import random
+from datetime import date, datetime, timedelta
+try:
+    import pandas as pd
+    from st_aggrid import AgGrid, GridUpdateMode, JsCode
+except ImportError:  # optional: virtualized transaction grid
+    AgGrid = None
+from registry import AddressRegistry, split_addresses, validate_address
+from hub import TransactionHub, collector_is_live
+from daemon import load_config
+from export import MIME_TYPES, available_formats, export_to
+from archive import history_page
+from records import FILLED, LIMIT_OPEN, TransactionBatch
+from store import load_collectors, query_rollups
+import metrics
+import html
 import json
+import logging
+import os
+import tempfile
+import time
 
 # Page configuration
 st.set_page_config(
@@ -24,6 +35,18 @@ CARD_BG = "#161B22"
 BORDER = "#30363D"
 TEXT = "#E6EDF3"
 TEXT_MUTED = "#8B949E"
+SELL_RED = "#FF5252"
+LIMIT_ORANGE = "#FFA500"
+WHALE_COLORS = ["#00D9A3", "#FF6B6B", "#4ECDC4", "#FFE66D", "#A8DADC"]
+
+# Value badges and row highlights
+LARGE_VALUE = 1000
+MEGA_VALUE = 5000
+
+WHALE_CSS = "\n".join(
+    f"    .address-color-{i} {{ border-color: {color}; }}\n    .tx-whale.address-color-{i} {{ color: {color}; }}"
+    for i, color in enumerate(WHALE_COLORS)
+)
 
 # Minimalist CSS
 st.markdown(f"""
@@ -92,6 +115,23 @@ st.markdown(f"""
         border-left: 3px solid transparent;
     }}
     
+    /* Rendered off-screen rows skip layout and paint */
+    .tx-scroll {{
+        max-height: 640px;
+        overflow-y: auto;
+    }}
+    
+    .tx-scroll .tx-row {{
+        content-visibility: auto;
+        contain-intrinsic-size: auto 41px;
+    }}
+    
+    .tx-time, .tx-qty {{ font-size: 13px; }}
+    .tx-whale {{ font-size: 12px; font-weight: 600; }}
+    .tx-coin {{ font-size: 13px; font-weight: 600; }}
+    .tx-price {{ font-size: 12px; }}
+    .tx-hash-none {{ color: #6E7681; }}
+    
     .tx-row:hover {{
         background: rgba(0, 217, 163, 0.04);
     }}
@@ -136,12 +176,12 @@ st.markdown(f"""
     }}
     
     .tx-sell {{
-        color: #FF5252;
+        color: {SELL_RED};
         font-weight: 600;
     }}
     
     .tx-limit {{
-        color: #FFA500;
+        color: {LIMIT_ORANGE};
         font-weight: 700;
         position: relative;
         padding-left: 20px;
@@ -189,11 +229,7 @@ st.markdown(f"""
         color: {DARK_BG};
     }}
     
-    .address-color-0 {{ border-color: #00D9A3; }}
-    .address-color-1 {{ border-color: #FF6B6B; }}
-    .address-color-2 {{ border-color: #4ECDC4; }}
-    .address-color-3 {{ border-color: #FFE66D; }}
-    .address-color-4 {{ border-color: #A8DADC; }}
+{WHALE_CSS}
     
     .filter-bar {{
         background: {CARD_BG};
@@ -339,54 +375,244 @@ CHARACTER_NAMES = [
     "Sonic", "Pikachu", "Ash Ketchum", "Mewtwo", "Charizard"
 ]
 
+MAX_LISTED_WATCHERS = 50
+HISTORY_PAGE_SIZES = (50, 500, 5000)
+LIVE_BUFFER = 10_000  # transactions kept per session
+MAX_HTML_ROWS = 1000  # the grid has no limit
+TABLE_MODES = ("Grid", "HTML") if AgGrid is not None else ("HTML",)
+
+# The dashboard only reads the store; daemon.py (or the hub's embedded collector) does the scraping
+DB_PATH = os.environ.get("HL_DB_PATH", "hyperliquid.db")
+
+@st.cache_resource
+def get_hub():
+    """One hub per server process: a single store tail fanned out to every session."""
+    hub = TransactionHub(DB_PATH)
+    metrics.track_ui_queue(hub)
+    # HL_EMBEDDED_COLLECTOR: auto (run one if no collector is live), always, or off
+    embedded = os.environ.get("HL_EMBEDDED_COLLECTOR", "auto")
+    if embedded == "always" or (embedded == "auto" and hub.collector is None):
+        config = load_config(os.environ.get("HL_COLLECTOR_CONFIG"))
+        if config["metrics_port"]:
+            metrics.start_metrics_server(int(config["metrics_port"]))
+        hub.start_collector(config)
+    return hub
+
+hub = get_hub()
+
 # Initialize session state
-if 'scraper' not in st.session_state:
-    st.session_state.scraper = AsyncHyperliquidScraper()
-if 'addresses' not in st.session_state:
-    st.session_state.addresses = []
 if 'transactions' not in st.session_state:
     st.session_state.transactions = []
 if 'monitoring' not in st.session_state:
     st.session_state.monitoring = False
-if 'worker_thread' not in st.session_state:
-    st.session_state.worker_thread = None
-if 'transaction_queue' not in st.session_state:
-    st.session_state.transaction_queue = queue.Queue()
+if 'hidden_addresses' not in st.session_state:
+    st.session_state.hidden_addresses = set()  # watchlist entries this session removed
+if 'subscription' not in st.session_state:
+    st.session_state.subscription = hub.subscribe(hub.watchlist)
 if 'selected_address' not in st.session_state:
     st.session_state.selected_address = "All"
 if 'min_value_filter' not in st.session_state:
     st.session_state.min_value_filter = 0
-if 'address_names' not in st.session_state:
-    st.session_state.address_names = {}  # {address: name}
-if 'used_names' not in st.session_state:
-    st.session_state.used_names = set()
 if 'suggested_name' not in st.session_state:
     st.session_state.suggested_name = None
 
-# Async worker
-def async_worker(scraper, interval, transaction_queue):
-    """Worker thread for async scraper."""
-    async def worker_loop():
-        while scraper.is_running:
-            try:
-                transactions = await scraper.check_all_addresses()
-                transaction_queue.put(transactions)
-                await asyncio.sleep(interval)
-            except Exception as e:
-                print(f"Worker error: {e}")
-    asyncio.run(worker_loop())
+# This session shows the shared watchlist minus what it removed
+subscription = st.session_state.subscription
+watchlist = dict(hub.watchlist)
+registry = AddressRegistry(watchlist, CHARACTER_NAMES)
+st.session_state.addresses = [addr for addr in watchlist if addr not in st.session_state.hidden_addresses]
+st.session_state.address_names = registry.names  # {address: name or None}
+address_index = {addr: i for i, addr in enumerate(st.session_state.addresses)}  # for badge colors
+hub.update(subscription, st.session_state.addresses)
+subscription.paused = not st.session_state.monitoring
+
+def collector_status():
+    """The hub's collector, or one started since the hub last looked."""
+    if hub.collector is not None:
+        return hub.collector
+    live = [collector for collector in load_collectors(DB_PATH) if collector_is_live(collector)]
+    return live[0] if live else None
 
 # Helper functions
 def get_random_unused_name():
     """Get a random character name that hasn't been used yet."""
-    available_names = [name for name in CHARACTER_NAMES if name not in st.session_state.used_names]
-    if available_names:
-        return random.choice(available_names)
-    return "Whale " + str(len(st.session_state.used_names) + 1)
+    return registry.allocate_name()
 
 def get_display_name(address):
     """Get display name for an address."""
-    return st.session_state.address_names.get(address, f"{address[:6]}...{address[-4:]}")
+    return st.session_state.address_names.get(address) or f"{address[:6]}...{address[-4:]}"
+
+def transaction_row_html(tx, time_format):
+    """One table row; styling comes from CSS classes, not per-row inline styles."""
+    if tx.order_type == 'LIMIT_OPEN':
+        action_class = "tx-limit"
+    else:
+        action_class = "tx-buy" if "BUY" in tx.action else "tx-sell"
+    
+    value_usd = tx.value_usd
+    if value_usd >= MEGA_VALUE:
+        row_class = "tx-row tx-row-mega"
+        value_display = f'<span class="value-badge value-mega">${value_usd:,.0f}</span>'
+    elif value_usd >= LARGE_VALUE:
+        row_class = "tx-row tx-row-large"
+        value_display = f'<span class="value-badge value-large">${value_usd:,.0f}</span>'
+    else:
+        row_class = "tx-row"
+        value_display = f'${value_usd:,.2f}'
+    
+    # Only link valid hashes
+    if tx.tx_hash and tx.tx_hash.startswith('0x'):
+        hash_cell = f'<a href="https://app.hyperliquid.xyz/explorer/tx/{tx.tx_hash}" target="_blank" class="tx-hash">{tx.tx_hash[:10]}</a>'
+    else:
+        hash_cell = '<span class="tx-hash tx-hash-none">N/A</span>'
+    
+    color_class = f"address-color-{address_index.get(tx.address, 0) % len(WHALE_COLORS)}"
+    return (
+        f'<div class="{row_class}">'
+        f'<div class="tx-cell tx-time">{tx.timestamp.strftime(time_format)}</div>'
+        f'<div class="tx-cell tx-whale {color_class}" title="{tx.address}">{html.escape(get_display_name(tx.address))}</div>'
+        f'<div class="tx-cell tx-qty {action_class}">{tx.action}</div>'
+        f'<div class="tx-cell tx-qty">{tx.quantity:,.2f}</div>'
+        f'<div class="tx-cell tx-coin">{tx.coin}</div>'
+        f'<div class="tx-cell tx-price">${tx.price:,.4f}</div>'
+        f'<div class="tx-cell">{value_display}</div>'
+        f'<div class="tx-cell">{hash_cell}</div>'
+        f'</div>'
+    )
+
+def render_html_table(txs, time_format):
+    """The whole table as one markdown block, rows built in a single pass."""
+    if len(txs) > MAX_HTML_ROWS:
+        hint = "switch the table to Grid" if AgGrid is not None else "install streamlit-aggrid"
+        st.caption(f"Showing the first {MAX_HTML_ROWS:,} of {len(txs):,} - {hint} for the full list")
+        txs = txs[:MAX_HTML_ROWS]
+    header = "".join(
+        f'<div class="tx-header">{title}</div>'
+        for title in ("Time", "Whale", "Side", "Amount", "Coin", "Price", "Value", "Hash")
+    )
+    rows = "".join(transaction_row_html(tx, time_format) for tx in txs)
+    st.markdown(
+        f'<div class="tx-table"><div class="tx-row">{header}</div><div class="tx-scroll">{rows}</div></div>',
+        unsafe_allow_html=True
+    )
+
+# AG Grid renders only the rows in view, so 10k+ rows scroll smoothly
+if AgGrid is not None:
+    GRID_CSS = {
+        ".ag-root-wrapper": {"background": f"{CARD_BG} !important", "border": f"1px solid {BORDER} !important"},
+        ".ag-header": {"background": f"{CARD_BG} !important"},
+        ".ag-header-cell-text": {"color": f"{TEXT_MUTED} !important", "font-size": "11px", "text-transform": "uppercase"},
+        ".ag-row": {"background": f"{CARD_BG} !important", "color": f"{TEXT} !important", "border-left": "3px solid transparent"},
+        ".ag-row.tx-row-large": {"background": "rgba(0, 217, 163, 0.06) !important", "border-left-color": f"{EMERALD} !important"},
+        ".ag-row.tx-row-mega": {"background": "rgba(0, 217, 163, 0.12) !important", "border-left": f"4px solid {EMERALD} !important"},
+        ".value-badge": {"padding": "2px 8px", "border-radius": "4px", "font-weight": "600", "color": EMERALD},
+        ".value-large": {"background": "rgba(0, 217, 163, 0.15)"},
+        ".value-mega": {"background": "rgba(0, 217, 163, 0.25)", "box-shadow": "0 0 10px rgba(0, 217, 163, 0.3)"},
+        ".tx-hash": {"color": EMERALD, "font-family": "'SF Mono', 'Monaco', 'Courier New', monospace"},
+    }
+    WHALE_STYLE = JsCode(f"""
+        function(params) {{
+            const colors = {json.dumps(WHALE_COLORS)};
+            return {{color: colors[params.data.color % colors.length], fontWeight: 600}};
+        }}
+    """)
+    SIDE_STYLE = JsCode(f"""
+        function(params) {{
+            if (params.data.limit) return {{color: '{LIMIT_ORANGE}', fontWeight: 700}};
+            return {{color: params.value.includes('BUY') ? '{EMERALD}' : '{SELL_RED}', fontWeight: 600}};
+        }}
+    """)
+    VALUE_RENDERER = JsCode(f"""
+        function(params) {{
+            const value = params.value;
+            const span = document.createElement('span');
+            if (value >= {LARGE_VALUE}) {{
+                span.className = 'value-badge ' + (value >= {MEGA_VALUE} ? 'value-mega' : 'value-large');
+                span.textContent = '$' + value.toLocaleString('en-US', {{maximumFractionDigits: 0}});
+            }} else {{
+                span.textContent = '$' + value.toLocaleString('en-US', {{minimumFractionDigits: 2, maximumFractionDigits: 2}});
+            }}
+            return span;
+        }}
+    """)
+    HASH_RENDERER = JsCode("""
+        function(params) {
+            const hash = params.value;
+            if (!hash || !hash.startsWith('0x')) return 'N/A';
+            const link = document.createElement('a');
+            link.href = 'https://app.hyperliquid.xyz/explorer/tx/' + hash;
+            link.target = '_blank';
+            link.className = 'tx-hash';
+            link.textContent = hash.slice(0, 10);
+            return link;
+        }
+    """)
+    NUMBER_FORMAT = JsCode("""
+        function(params) {
+            return params.value.toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2});
+        }
+    """)
+    PRICE_FORMAT = JsCode("""
+        function(params) {
+            return '$' + params.value.toLocaleString('en-US', {minimumFractionDigits: 4, maximumFractionDigits: 4});
+        }
+    """)
+    GRID_OPTIONS = {
+        "columnDefs": [
+            {"field": "time", "headerName": "Time", "width": 120},
+            {"field": "whale", "headerName": "Whale", "tooltipField": "address", "cellStyle": WHALE_STYLE},
+            {"field": "action", "headerName": "Side", "width": 120, "cellStyle": SIDE_STYLE},
+            {"field": "quantity", "headerName": "Amount", "type": "rightAligned", "valueFormatter": NUMBER_FORMAT},
+            {"field": "coin", "headerName": "Coin", "width": 100, "cellStyle": {"fontWeight": 600}},
+            {"field": "price", "headerName": "Price", "type": "rightAligned", "valueFormatter": PRICE_FORMAT},
+            {"field": "value_usd", "headerName": "Value", "type": "rightAligned", "cellRenderer": VALUE_RENDERER},
+            {"field": "tx_hash", "headerName": "Hash", "cellRenderer": HASH_RENDERER},
+            {"field": "address", "hide": True},
+            {"field": "color", "hide": True},
+            {"field": "limit", "hide": True},
+        ],
+        "defaultColDef": {"sortable": True, "resizable": True},
+        "rowClassRules": {
+            "tx-row-mega": f"data.value_usd >= {MEGA_VALUE}",
+            "tx-row-large": f"data.value_usd >= {LARGE_VALUE} && data.value_usd < {MEGA_VALUE}",
+        },
+        "rowHeight": 36,
+        "suppressCellFocus": True,
+    }
+
+def render_grid(txs, time_format, key):
+    """Send the rows once, column by column, to a virtualized AG Grid."""
+    batch = TransactionBatch.from_records(txs)
+    names = st.session_state.address_names
+    columns = {
+        "time": [timestamp.strftime(time_format) for timestamp in batch.timestamps()],
+        "whale": [names.get(address) or f"{address[:6]}...{address[-4:]}" for address in batch.address],
+        "action": batch.action,
+        "quantity": batch.quantity,
+        "coin": batch.coin,
+        "price": batch.price,
+        "value_usd": batch.value_usd,
+        "tx_hash": batch.tx_hash,
+        "address": batch.address,
+        "color": [address_index.get(address, 0) for address in batch.address],
+        "limit": [order_type == 'LIMIT_OPEN' for order_type in batch.order_type],
+    }
+    AgGrid(
+        pd.DataFrame(columns),
+        gridOptions=GRID_OPTIONS,
+        height=min(640, 40 + 36 * max(len(batch), 1)),
+        update_mode=GridUpdateMode.NO_UPDATE,
+        allow_unsafe_jscode=True,
+        custom_css=GRID_CSS,
+        key=key
+    )
+
+def render_transactions(txs, time_format="%H:%M:%S", key="transactions"):
+    """Transaction table in the session's table mode (virtualized grid, or one HTML block)."""
+    if st.session_state.get("table_mode", TABLE_MODES[0]) == "Grid" and AgGrid is not None:
+        render_grid(txs, time_format, key)
+    else:
+        render_html_table(txs, time_format)
 
 # Sidebar
 with st.sidebar:
@@ -433,20 +659,23 @@ with st.sidebar:
         
         if st.button("➕ Add Address", use_container_width=True):
             if address_input.strip():
-                addr = address_input.strip().replace('\n', '').replace(' ', '')
+                addr = validate_address(address_input.replace('\n', ''))
                 
                 # Use suggested name if no custom name provided
                 if not address_name.strip() and st.session_state.suggested_name:
                     chosen_name = st.session_state.suggested_name
                 else:
-                    chosen_name = address_name.strip() or f"Whale-{len(st.session_state.addresses) + 1}"
+                    chosen_name = address_name.strip() or get_random_unused_name()
                 
                 # Check if address already exists
-                if addr not in st.session_state.addresses:
-                    st.session_state.addresses.append(addr)
-                    st.session_state.address_names[addr] = chosen_name
-                    st.session_state.used_names.add(chosen_name)
-                    st.session_state.scraper.add_address(addr)
+                if addr is None:
+                    st.error("Not a valid address (expected 0x followed by 40 hex characters)")
+                elif addr in st.session_state.hidden_addresses:
+                    # Removed here but still on the shared watchlist: just show it again
+                    st.session_state.hidden_addresses.discard(addr)
+                    st.rerun()
+                elif addr not in registry:
+                    hub.watch(subscription, [registry.add(addr, chosen_name)])
                     st.session_state.suggested_name = None  # Clear suggestion
                     st.success(f"✓ Added {chosen_name}")
                     st.rerun()
@@ -480,56 +709,33 @@ with st.sidebar:
             
             # Parse from text area
             if bulk_input.strip():
-                # Try comma-separated first
-                if ',' in bulk_input:
-                    raw_addresses = bulk_input.split(',')
-                else:
-                    # Try newline-separated
-                    raw_addresses = bulk_input.split('\n')
-                
-                addresses_to_add.extend([addr.strip() for addr in raw_addresses if addr.strip()])
+                addresses_to_add.extend(split_addresses(bulk_input))
             
             # Parse from uploaded file
             if uploaded_file is not None:
                 try:
-                    content = uploaded_file.read().decode('utf-8')
-                    # Try comma-separated first
-                    if ',' in content:
-                        raw_addresses = content.split(',')
-                    else:
-                        # Try newline-separated
-                        raw_addresses = content.split('\n')
-                    
-                    addresses_to_add.extend([addr.strip() for addr in raw_addresses if addr.strip()])
+                    addresses_to_add.extend(split_addresses(uploaded_file.read().decode('utf-8')))
                 except Exception as e:
                     st.error(f"Error reading file: {e}")
             
             # Add all addresses
             if addresses_to_add:
-                added_count = 0
-                skipped_count = 0
+                # Addresses this session removed but others still watch come back too
+                if st.session_state.hidden_addresses:
+                    st.session_state.hidden_addresses.difference_update(
+                        validate_address(addr) for addr in addresses_to_add
+                    )
                 
-                for addr in addresses_to_add:
-                    # Clean address
-                    addr = addr.strip().replace(' ', '')
-                    if not addr or addr in st.session_state.addresses:
-                        skipped_count += 1
-                        continue
-                    
-                    # Auto-generate name
-                    chosen_name = get_random_unused_name()
-                    
-                    # Add address
-                    st.session_state.addresses.append(addr)
-                    st.session_state.address_names[addr] = chosen_name
-                    st.session_state.used_names.add(chosen_name)
-                    st.session_state.scraper.add_address(addr)
-                    added_count += 1
+                # Hashed dedupe and O(1) names, then one write for the whole batch
+                new_entries, duplicates, invalid = registry.bulk_add(addresses_to_add)
+                hub.watch(subscription, new_entries)
+                added_count = len(new_entries)
+                skipped_count = duplicates + invalid
                 
                 if added_count > 0:
                     st.success(f"✓ Added {added_count} address(es)")
                 if skipped_count > 0:
-                    st.info(f"ℹ️ Skipped {skipped_count} (duplicates or invalid)")
+                    st.info(f"ℹ️ Skipped {duplicates} duplicate(s) and {invalid} invalid")
                 
                 st.rerun()
             else:
@@ -538,7 +744,7 @@ with st.sidebar:
     st.markdown("---")
     
     # Settings
-    interval = st.number_input("Check Interval (s)", 10, 300, 60, 10)
+    refresh = st.number_input("Refresh (s)", 1, 60, 2, 1, help="How often to show new transactions")
     
     st.markdown("---")
     
@@ -551,8 +757,6 @@ with st.sidebar:
     with col2:
         if st.button("⏸ Stop", disabled=not st.session_state.monitoring, use_container_width=True):
             st.session_state.monitoring = False
-            if st.session_state.worker_thread:
-                st.session_state.scraper.stop()
             st.rerun()
     
     col1, col2 = st.columns(2)
@@ -562,11 +766,11 @@ with st.sidebar:
             st.rerun()
     with col2:
         if st.button("🔄 Reset All", use_container_width=True, help="Reset everything", type="secondary"):
-            st.session_state.addresses = []
+            # Addresses no other session shows leave the watchlist (and the collector)
+            st.session_state.hidden_addresses.update(st.session_state.addresses)
+            unwatched = hub.release(subscription, st.session_state.addresses)
+            st.session_state.hidden_addresses.difference_update(unwatched)
             st.session_state.transactions = []
-            st.session_state.address_names = {}
-            st.session_state.used_names = set()
-            st.session_state.scraper = AsyncHyperliquidScraper()
             st.session_state.monitoring = False
             st.success("✓ Reset complete!")
             st.rerun()
@@ -575,8 +779,9 @@ with st.sidebar:
     
     # Active watchers with delete buttons
     st.markdown("#### Active Watchers")
-    if st.session_state.scraper.watchers:
-        for i, addr in enumerate(list(st.session_state.scraper.watchers.keys())):
+    if st.session_state.addresses:
+        # A widget row per watcher doesn't scale to bulk imports
+        for i, addr in enumerate(st.session_state.addresses[:MAX_LISTED_WATCHERS]):
             col1, col2 = st.columns([4, 1])
             with col1:
                 color_class = f"address-color-{i % 5}"
@@ -588,16 +793,13 @@ with st.sidebar:
                 )
             with col2:
                 if st.button("🗑", key=f"del_{addr}", help=f"Delete {display_name}", use_container_width=True):
-                    # Remove from all tracking
-                    if addr in st.session_state.addresses:
-                        st.session_state.addresses.remove(addr)
-                    if addr in st.session_state.address_names:
-                        name = st.session_state.address_names[addr]
-                        st.session_state.used_names.discard(name)
-                        del st.session_state.address_names[addr]
-                    st.session_state.scraper.remove_address(addr)
+                    st.session_state.hidden_addresses.add(addr)
+                    if hub.release(subscription, [addr]):
+                        st.session_state.hidden_addresses.discard(addr)
                     st.success(f"✓ Removed {display_name}")
                     st.rerun()
+        if len(st.session_state.addresses) > MAX_LISTED_WATCHERS:
+            st.caption(f"… and {len(st.session_state.addresses) - MAX_LISTED_WATCHERS:,} more")
     else:
         st.info("No watchers", icon="ℹ️")
     
@@ -612,100 +814,63 @@ with st.sidebar:
     
     st.markdown(f"**Current:** ${min_val:,}+")
     
+    if len(TABLE_MODES) > 1:
+        st.radio("Table", TABLE_MODES, horizontal=True, key="table_mode", help="Grid renders only the rows in view")
+    
     st.markdown("---")
     
-    # Download logs
+    # Download logs: streamed from the store (and archive) only when asked for
     st.markdown("#### 📥 Download Logs")
     
-    if st.session_state.transactions:
-        # Select address to download
-        download_options = ["All Addresses"] + [
-            f"{get_display_name(addr)} ({addr[:6]}...{addr[-4:]})" 
-            for addr in st.session_state.addresses
-        ]
-        
-        selected_download = st.selectbox(
-            "Select Address",
-            options=download_options,
-            label_visibility="collapsed",
-            key="download_address_select"
-        )
-        
-        # Get transactions for selected address
-        if selected_download == "All Addresses":
-            download_txs = st.session_state.transactions
-            filename_prefix = "all_addresses"
-        else:
-            # Extract address from selection
-            selected_idx = download_options.index(selected_download) - 1
-            selected_addr = st.session_state.addresses[selected_idx]
-            download_txs = [tx for tx in st.session_state.transactions if tx['address'] == selected_addr]
-            filename_prefix = get_display_name(selected_addr).replace(' ', '_')
-        
-        st.caption(f"{len(download_txs)} transactions available")
-        
-        # Download buttons
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            if download_txs:
-                # Prepare CSV
-                df_data = []
-                for tx in download_txs:
-                    df_data.append({
-                        'Timestamp': tx['timestamp'].strftime('%Y-%m-%d %H:%M:%S'),
-                        'Address': tx['address'],
-                        'Name': get_display_name(tx['address']),
-                        'Action': tx['action'],
-                        'Type': tx.get('order_type', 'FILLED'),
-                        'Coin': tx['coin'],
-                        'Quantity': tx['quantity'],
-                        'Price': tx['price'],
-                        'Value_USD': tx['value_usd'],
-                        'Fee': tx.get('fee', 0),
-                        'TX_Hash': tx['tx_hash']
-                    })
-                df = pd.DataFrame(df_data)
-                csv = df.to_csv(index=False).encode('utf-8')
-                
-                st.download_button(
-                    label="CSV",
-                    data=csv,
-                    file_name=f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                    mime="text/csv",
-                    use_container_width=True
-                )
-        
-        with col2:
-            if download_txs:
-                # Prepare JSON
-                json_data = []
-                for tx in download_txs:
-                    json_data.append({
-                        'timestamp': tx['timestamp'].isoformat(),
-                        'address': tx['address'],
-                        'name': get_display_name(tx['address']),
-                        'action': tx['action'],
-                        'order_type': tx.get('order_type', 'FILLED'),
-                        'coin': tx['coin'],
-                        'quantity': tx['quantity'],
-                        'price': tx['price'],
-                        'value_usd': tx['value_usd'],
-                        'fee': tx.get('fee', 0),
-                        'tx_hash': tx['tx_hash'],
-                        'closed_pnl': tx.get('closed_pnl', 0)
-                    })
-                json_str = json.dumps(json_data, indent=2)
-                
-                st.download_button(
-                    label="JSON",
-                    data=json_str,
-                    file_name=f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-                    mime="application/json",
-                    use_container_width=True
+    download_options = ["All Addresses"] + st.session_state.addresses
+    selected_download = st.selectbox(
+        "Select Address",
+        options=download_options,
+        format_func=lambda addr: addr if addr == "All Addresses" else f"{get_display_name(addr)} ({addr[:6]}...{addr[-4:]})",
+        label_visibility="collapsed",
+        key="download_address_select"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        export_format = st.selectbox("Format", available_formats(), format_func=str.upper, key="export_format")
+    with col2:
+        export_coin = st.text_input("Coin", placeholder="All coins", key="export_coin").strip()
+    today = date.today()
+    export_range = st.date_input("Dates", value=(today - timedelta(days=30), today), key="export_range")
+    
+    if st.button("Prepare download", use_container_width=True):
+        previous = st.session_state.get("export_file")
+        if previous and os.path.exists(previous["path"]):
+            os.remove(previous["path"])
+        export_address = None if selected_download == "All Addresses" else selected_download
+        filename_prefix = get_display_name(export_address).replace(' ', '_') if export_address else "all_addresses"
+        with st.spinner("Exporting..."):
+            with tempfile.NamedTemporaryFile(suffix=f".{export_format}", delete=False) as f:
+                size = export_to(
+                    f, DB_PATH, export_format,
+                    address=export_address,
+                    coin=export_coin or None,
+                    start=datetime.combine(export_range[0], datetime.min.time()).isoformat(),
+                    end=datetime.combine(export_range[-1] + timedelta(days=1), datetime.min.time()).isoformat(),
+                    names=st.session_state.address_names
                 )
-    else:
-        st.info("No transactions to download", icon="ℹ️")
+        st.session_state.export_file = {
+            "path": f.name,
+            "size": size,
+            "format": export_format,
+            "file_name": f"{filename_prefix}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{export_format}",
+        }
+    
+    export_file = st.session_state.get("export_file")
+    if export_file and os.path.exists(export_file["path"]):
+        with open(export_file["path"], "rb") as f:
+            st.download_button(
+                label=f"{export_file['format'].upper()} ({export_file['size'] / 1e6:,.1f} MB)",
+                data=f,
+                file_name=export_file["file_name"],
+                mime=MIME_TYPES[export_file["format"]],
+                use_container_width=True
+            )
 
 # Main content
 st.markdown(f'<h1 style="color: {EMERALD};">Hyperliquid Whale Tracker</h1>', unsafe_allow_html=True)
@@ -716,7 +881,7 @@ col1, col2, col3, col4 = st.columns(4)
 with col1:
     st.markdown(f"""
         <div class="metric-box">
-            <div class="metric-value">{len(st.session_state.scraper.watchers)}</div>
+            <div class="metric-value">{len(st.session_state.addresses)}</div>
             <div class="metric-label">Watchers</div>
         </div>
     """, unsafe_allow_html=True)
@@ -730,8 +895,13 @@ with col2:
     """, unsafe_allow_html=True)
 
 with col3:
-    status_dot = "status-active" if st.session_state.monitoring else "status-inactive"
-    status_text = "Live" if st.session_state.monitoring else "Stopped"
+    collector = collector_status()
+    is_live = st.session_state.monitoring and collector is not None
+    status_dot = "status-active" if is_live else "status-inactive"
+    if collector is None:
+        status_text = "No collector"
+    else:
+        status_text = "Live" if st.session_state.monitoring else "Stopped"
     st.markdown(f"""
         <div class="metric-box">
             <div class="metric-value" style="font-size: 1.5rem; display: flex; align-items: center; justify-content: center;">
@@ -742,40 +912,125 @@ with col3:
     """, unsafe_allow_html=True)
 
 with col4:
-    total_volume = sum(tx.get('value_usd', 0) for tx in st.session_state.transactions)
+    # Maintained by the hub as fills arrive, not summed on every rerun
+    flow = hub.aggregates.snapshot()
     st.markdown(f"""
         <div class="metric-box">
-            <div class="metric-value" style="font-size: 1.8rem;">${total_volume:,.0f}</div>
-            <div class="metric-label">Total Volume</div>
+            <div class="metric-value" style="font-size: 1.8rem;">${flow['volume_24h']:,.0f}</div>
+            <div class="metric-label">24h Volume</div>
         </div>
     """, unsafe_allow_html=True)
 
+with st.expander(f"📊 Flow - {flow['fills_1h']:,} fills in the last hour"):
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Top whales (24h)**")
+        st.dataframe([
+            {
+                "Whale": get_display_name(address),
+                "Volume 24h": round(stats["volume_24h"]),
+                "Fills 1h": stats["fills_1h"],
+                "Fills 24h": stats["fills_24h"],
+                "Buy/Sell": f"{stats['imbalance']:+.0%}",
+                "Realized PnL": round(stats["realized_pnl"], 2),
+                "Fees": round(stats["fees"], 2),
+            }
+            for address, stats in hub.aggregates.top("address", n=10)
+        ], hide_index=True, use_container_width=True)
+    with col2:
+        st.markdown("**Top coins (24h)**")
+        st.dataframe([
+            {
+                "Coin": coin,
+                "Volume 24h": round(stats["volume_24h"]),
+                "Fills 24h": stats["fills_24h"],
+                "VWAP": stats["vwap"],
+                "Buy/Sell": f"{stats['imbalance']:+.0%}",
+                "Realized PnL": round(stats["realized_pnl"], 2),
+            }
+            for coin, stats in hub.aggregates.top("coin", n=10)
+        ], hide_index=True, use_container_width=True)
+    st.caption("Buy/Sell is (buy - sell) / total volume; VWAP, realized PnL and fees are all-time.")
+    
+    # From the hourly rollups: at most 168 rows, however many fills
+    week = query_rollups(DB_PATH, "1h", start=(datetime.now() - timedelta(days=7)).isoformat())
+    if week:
+        st.markdown("**Hourly flow, last 7 days**")
+        st.bar_chart(
+            {
+                "Hour": [bucket["bucket"] for bucket in week],
+                "Volume": [bucket["volume"] for bucket in week],
+                "Net (buys - sells)": [bucket["net_notional"] for bucket in week],
+            },
+            x="Hour",
+            stack=False
+        )
+
 st.markdown("<hr>", unsafe_allow_html=True)
 
-# Monitoring loop
+view = st.radio("View", ["Live", "History"], horizontal=True, label_visibility="collapsed", key="view")
+
+# Tail the store
 if st.session_state.monitoring and st.session_state.addresses:
-    # Start worker if needed
-    if st.session_state.worker_thread is None or not st.session_state.worker_thread.is_alive():
-        st.session_state.scraper.is_running = True
-        st.session_state.worker_thread = threading.Thread(
-            target=async_worker,
-            args=(st.session_state.scraper, interval, st.session_state.transaction_queue),
-            daemon=True
-        )
-        st.session_state.worker_thread.start()
-    
-    # Check queue
-    try:
-        while not st.session_state.transaction_queue.empty():
-            new_logs = st.session_state.transaction_queue.get_nowait()
-            if new_logs:
-                st.session_state.transactions.extend(new_logs)
-                st.session_state.transactions = st.session_state.transactions[-200:]  # Keep last 200
-    except queue.Empty:
-        pass
+    # The hub has already filtered these to this session's addresses
+    new_txs = subscription.drain()
+    if new_txs:
+        st.session_state.transactions.extend(new_txs)
+        st.session_state.transactions = st.session_state.transactions[-LIVE_BUFFER:]
 
 # Display transactions
-if st.session_state.transactions:
+if view == "History":
+    # Keyset-paged from the store and archive; only the current page is held
+    st.markdown("### History")
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        history_address = st.selectbox(
+            "Whale",
+            ["All"] + st.session_state.addresses,
+            format_func=lambda addr: addr if addr == "All" else get_display_name(addr),
+            key="history_address"
+        )
+    with col2:
+        history_coin = st.text_input("Coin", placeholder="All coins", key="history_coin").strip()
+    with col3:
+        history_side = st.selectbox("Side", ["All", "BUY", "SELL"], key="history_side")
+    with col4:
+        history_type = st.selectbox("Order type", ["All", FILLED, LIMIT_OPEN], key="history_type")
+    with col5:
+        # Keyset cursors stay valid across page sizes
+        page_size = st.selectbox("Rows", HISTORY_PAGE_SIZES, key="history_page_size")
+    history_filters = {
+        "address": None if history_address == "All" else history_address,
+        "coin": history_coin or None,
+        "side": None if history_side == "All" else history_side,
+        "order_type": None if history_type == "All" else history_type,
+        "min_value": st.session_state.min_value_filter,
+    }
+    
+    # Cursor stack: the `before` cursor of each page up to the current one
+    if st.session_state.get("history_filters") != history_filters:
+        st.session_state.history_filters = history_filters
+        st.session_state.history_cursors = [None]
+    cursors = st.session_state.history_cursors
+    page, next_cursor = history_page(DB_PATH, cursors[-1], page_size, **history_filters)
+    
+    if page:
+        render_transactions(page, time_format="%m-%d %H:%M", key="history_table")
+    else:
+        st.caption("No transactions match these filters")
+    
+    col1, col2, col3 = st.columns([1, 2, 1])
+    with col1:
+        if st.button("← Newer", disabled=len(cursors) == 1, use_container_width=True):
+            cursors.pop()
+            st.rerun()
+    with col2:
+        st.caption(f"Page {len(cursors)}")
+    with col3:
+        if st.button("Older →", disabled=next_cursor is None, use_container_width=True):
+            cursors.append(next_cursor)
+            st.rerun()
+elif st.session_state.transactions:
     st.markdown("### Transactions")
     
     # Filter bar
@@ -801,7 +1056,7 @@ if st.session_state.transactions:
         st.markdown("</div>", unsafe_allow_html=True)
     
     # Filter transactions
-    sorted_txs = sorted(st.session_state.transactions, key=lambda x: x['timestamp'], reverse=True)
+    sorted_txs = sorted(st.session_state.transactions, key=lambda x: x.time_ms, reverse=True)
     
     # Apply filters
     filtered_txs = []
@@ -818,91 +1073,14 @@ if st.session_state.transactions:
     if len(filtered_txs) < len(sorted_txs):
         st.caption(f"Showing {len(filtered_txs)} of {len(sorted_txs)} transactions (filtered)")
     
-    # Create table header
-    st.markdown(f"""
-        <div class="tx-table">
-            <div class="tx-row">
-                <div class="tx-header">Time</div>
-                <div class="tx-header">Whale</div>
-                <div class="tx-header">Side</div>
-                <div class="tx-header">Amount</div>
-                <div class="tx-header">Coin</div>
-                <div class="tx-header">Price</div>
-                <div class="tx-header">Value</div>
-                <div class="tx-header">Hash</div>
-            </div>
-    """, unsafe_allow_html=True)
-    
-    # Display filtered transactions
-    for tx in filtered_txs[:50]:  # Show last 50
-        time_str = tx['timestamp'].strftime("%H:%M:%S")
-        
-        # Use named address
-        display_name = get_display_name(tx['address'])
-        
-        # Handle limit orders vs filled orders
-        is_limit_order = tx.get('order_type') == 'LIMIT_OPEN'
-        if is_limit_order:
-            # Limit orders show as yellow/orange
-            action_class = "tx-limit"
-        else:
-            action_class = "tx-buy" if "BUY" in tx['action'] else "tx-sell"
-        
-        # Only create link if we have a valid hash
-        if tx['tx_hash'] and tx['tx_hash'].startswith('0x'):
-            hash_short = tx['tx_hash'][:10]
-            hyperliquid_url = f"https://app.hyperliquid.xyz/explorer/tx/{tx['tx_hash']}"
-        else:
-            hash_short = "N/A"
-            hyperliquid_url = None
-        
-        # Determine row class based on value
-        value_usd = tx['value_usd']
-        row_class = "tx-row"
-        value_class = ""
-        if value_usd >= 5000:
-            row_class = "tx-row tx-row-mega"
-            value_class = "value-mega"
-        elif value_usd >= 1000:
-            row_class = "tx-row tx-row-large"
-            value_class = "value-large"
-        
-        # Format value with badge for large transactions
-        if value_class:
-            value_display = f'<span class="value-badge {value_class}">${value_usd:,.0f}</span>'
-        else:
-            value_display = f'${value_usd:,.2f}'
-        
-        # Color code address
-        addr_index = st.session_state.addresses.index(tx['address']) if tx['address'] in st.session_state.addresses else 0
-        addr_color_class = f"address-color-{addr_index % 5}"
-        
-        # Render hash with or without link
-        if hyperliquid_url:
-            hash_cell = f'<a href="{hyperliquid_url}" target="_blank" class="tx-hash">{hash_short}</a>'
-        else:
-            hash_cell = f'<span class="tx-hash" style="color: #6E7681;">{hash_short}</span>'
-        
-        st.markdown(f"""
-            <div class="{row_class}">
-                <div class="tx-cell" style="font-size: 13px;">{time_str}</div>
-                <div class="tx-cell {addr_color_class}" style="font-family: 'Roboto', sans-serif; font-size: 12px; font-weight: 600;" title="{tx['address']}">{display_name}</div>
-                <div class="tx-cell {action_class}" style="font-size: 13px;">{tx['action']}</div>
-                <div class="tx-cell" style="font-size: 13px;">{tx['quantity']:,.2f}</div>
-                <div class="tx-cell" style="font-weight: 600; font-size: 13px;">{tx['coin']}</div>
-                <div class="tx-cell" style="font-size: 12px;">${tx['price']:,.4f}</div>
-                <div class="tx-cell">{value_display}</div>
-                <div class="tx-cell">{hash_cell}</div>
-            </div>
-        """, unsafe_allow_html=True)
-    
-    st.markdown("</div>", unsafe_allow_html=True)
+    render_transactions(filtered_txs, key="live_table")
+elif collector is None:
+    st.info("No collector is running - start one with `python daemon.py --config collector.example.toml`", icon="ℹ️")
 else:
     st.info("👆 Add addresses and click Start to begin monitoring", icon="ℹ️")
 
-# Auto-refresh when monitoring
-if st.session_state.monitoring:
-    import time
-    time.sleep(2)
+# Auto-refresh when monitoring (history pages stay put)
+if st.session_state.monitoring and view == "Live":
+    time.sleep(refresh)
     st.rerun()
 
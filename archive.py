@@ -0,0 +1,442 @@
+"""Retention for the SQLite store: old rows move to date-partitioned Parquet.
+
+The newest `hot_days` of transactions stay in SQLite. Compactor moves older
+ones, a whole day at a time, into
+
+    <archive_dir>/day=YYYY-MM-DD/part-<first id>-<last id>.parquet
+
+Each file is listed in the store's archive_files table in the same SQLite
+transaction that deletes its rows and records their keys in archived_keys
+(so the writer won't store a re-fetched old fill again; keys older than
+the refetch horizon are pruned, as the API won't return those fills). A crash therefore leaves either the rows
+or a listed file, never both. Unlisted files are debris from an interrupted
+run and are removed on the next one. read_transactions() reads the archive
+and SQLite together, in time order, for history views and exports.
+
+    python archive.py compact --db hyperliquid.db --hot-days 30
+
+Parquet needs pyarrow (optional). Without it nothing is archived and reads
+cover SQLite only.
+"""
+import argparse
+import heapq
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: archiving and Parquet export
+    pa = pq = None
+
+from records import Transaction
+from store import SIDES, TAIL_COLUMNS, Cursor, connect, init_db, query_transactions, row_to_transaction, transaction_filters
+
+logger = logging.getLogger(__name__)
+
+COLUMNS = tuple(column.strip() for column in TAIL_COLUMNS.split(","))
+TIMESTAMP = COLUMNS.index("timestamp")
+
+# Hyperliquid only serves a user's most recent fills (10,000 at most), so
+# fills older than this are taken never to come back in a response
+REFETCH_HORIZON_DAYS = 90
+
+ARCHIVED_KEY_SQL = (
+    "INSERT OR IGNORE INTO archived_keys (address, order_type, tid, tx_hash, timestamp) VALUES (?, ?, ?, ?, ?)"
+)
+
+if pa is not None:
+    ARCHIVE_SCHEMA = pa.schema([
+        ("id", pa.int64()),
+        ("timestamp", pa.string()),  # ISO text, exactly as stored in SQLite
+        ("address", pa.string()),
+        ("action", pa.string()),
+        ("coin", pa.string()),
+        ("quantity", pa.float64()),
+        ("price", pa.float64()),
+        ("value_usd", pa.float64()),
+        ("fee", pa.float64()),
+        ("tx_hash", pa.string()),
+        ("closed_pnl", pa.float64()),
+        ("order_type", pa.string()),
+        ("tid", pa.int64()),
+    ])
+else:
+    ARCHIVE_SCHEMA = None
+
+
+def default_archive_dir(db_path: str) -> str:
+    """hyperliquid.db -> hyperliquid-archive/"""
+    return os.path.splitext(os.path.abspath(db_path))[0] + "-archive"
+
+
+def rows_to_table(rows: Sequence[Tuple]):
+    """pyarrow Table from TAIL_COLUMNS rows."""
+    columns = list(zip(*rows)) if rows else [()] * len(COLUMNS)
+    return pa.Table.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(columns, ARCHIVE_SCHEMA)],
+        schema=ARCHIVE_SCHEMA
+    )
+
+
+def archived_key(row: Tuple) -> Tuple:
+    """archived_keys values for a TAIL_COLUMNS row: the tid key, or the legacy key if it has no tid."""
+    _, timestamp, address, _, _, _, _, _, _, tx_hash, _, order_type, tid = row
+    if tid is None:
+        return address, order_type or "FILLED", None, tx_hash, timestamp
+    return address, order_type or "FILLED", tid, None, timestamp
+
+
+def _write_parquet(path: str, rows: Sequence[Tuple]):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    pq.write_table(rows_to_table(rows), tmp, compression="zstd")
+    os.replace(tmp, path)
+
+
+class Compactor:
+    """Moves transactions older than the hot window into Parquet, one day at a time.
+
+    Run compact_once() directly or start() a background thread that
+    compacts every `interval` seconds.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        archive_dir: Optional[str] = None,
+        hot_days: float = 30,
+        batch_rows: int = 100_000,
+        interval: float = 3600.0,
+        key_days: float = REFETCH_HORIZON_DAYS
+    ):
+        if pa is None:
+            raise RuntimeError("Archiving needs pyarrow (pip install pyarrow)")
+        self.db_path = db_path
+        self.archive_dir = archive_dir or default_archive_dir(db_path)
+        self.hot_days = hot_days
+        self.batch_rows = batch_rows
+        self.interval = interval
+        self.key_days = max(key_days, hot_days)
+        self.stats = {"runs": 0, "rows_archived": 0, "files_written": 0, "keys_pruned": 0, "last_run_s": 0.0}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        init_db(db_path)
+        self._index_archive()
+
+    def cutoff(self, now: Optional[datetime] = None, days: Optional[float] = None) -> str:
+        """Rows stamped before this (local midnight, hot_days ago) are archived."""
+        now = now or datetime.now()
+        days = self.hot_days if days is None else days
+        day = (now - timedelta(days=days)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return day.isoformat()
+
+    def compact_once(self) -> int:
+        """Archive everything older than the cutoff; returns the number of rows moved."""
+        started = time.perf_counter()
+        cutoff = self.cutoff()
+        conn = connect(self.db_path)
+        moved = 0
+        try:
+            self._remove_unlisted(conn)
+            while True:
+                # Oldest first, so a batch is whole days plus the start of one more
+                rows = conn.execute(
+                    f"SELECT {TAIL_COLUMNS} FROM transactions WHERE timestamp < ? "
+                    f"ORDER BY timestamp, id LIMIT ?",
+                    (cutoff, self.batch_rows)
+                ).fetchall()
+                if not rows:
+                    break
+                for day, day_rows in groupby(rows, key=lambda row: row[TIMESTAMP][:10]):
+                    moved += self._archive_day(conn, day, list(day_rows))
+                if len(rows) < self.batch_rows:
+                    break
+            pruned = self._prune_keys(conn)
+        finally:
+            conn.close()
+        self.stats["runs"] += 1
+        self.stats["rows_archived"] += moved
+        self.stats["last_run_s"] = round(time.perf_counter() - started, 3)
+        if moved:
+            logger.info(f"🗄️  Archived {moved:,} transactions older than {cutoff[:10]} in {self.stats['last_run_s']:.1f}s")
+        if pruned:
+            logger.info(f"🗄️  Pruned {pruned:,} archived keys past the {self.key_days:g}-day refetch horizon")
+        return moved
+
+    def _prune_keys(self, conn) -> int:
+        """Forget the keys of archived rows too old for the API to return again."""
+        with conn:
+            pruned = conn.execute(
+                "DELETE FROM archived_keys WHERE timestamp < ?", (self.cutoff(days=self.key_days),)
+            ).rowcount
+        self.stats["keys_pruned"] += pruned
+        return pruned
+
+    def _archive_day(self, conn, day: str, rows: List[Tuple]) -> int:
+        ids = [row[0] for row in rows]
+        relative = os.path.join(f"day={day}", f"part-{min(ids)}-{max(ids)}.parquet")
+        _write_parquet(os.path.join(self.archive_dir, relative), rows)
+        # Listing the file and deleting its rows is one transaction
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO archive_files (path, day, rows, min_id, max_id, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (relative, day, len(rows), min(ids), max(ids), time.time())
+            )
+            conn.executemany("DELETE FROM transactions WHERE id = ?", ((row_id,) for row_id in ids))
+            conn.executemany(ARCHIVED_KEY_SQL, (archived_key(row) for row in rows))
+        self.stats["files_written"] += 1
+        return len(rows)
+
+    def _index_archive(self):
+        """Fill archived_keys from files archived before the table existed."""
+        conn = connect(self.db_path)
+        try:
+            if conn.execute("SELECT 1 FROM archived_keys LIMIT 1").fetchone():
+                return
+            paths = [row[0] for row in conn.execute("SELECT path FROM archive_files ORDER BY day, min_id")]
+            if not paths:
+                return
+            started = time.perf_counter()
+            keys = 0
+            for path in paths:
+                columns = pq.read_table(
+                    os.path.join(self.archive_dir, path), schema=ARCHIVE_SCHEMA, columns=list(COLUMNS)
+                ).to_pydict()
+                rows = list(zip(*(columns[name] for name in COLUMNS)))
+                with conn:
+                    conn.executemany(ARCHIVED_KEY_SQL, (archived_key(row) for row in rows))
+                keys += len(rows)
+            logger.info(
+                f"🗄️  Indexed {keys:,} archived keys from {len(paths)} files in {time.perf_counter() - started:.1f}s"
+            )
+        finally:
+            conn.close()
+
+    def _remove_unlisted(self, conn):
+        """Delete files a crashed run wrote but never listed (their rows are still in SQLite)."""
+        if not os.path.isdir(self.archive_dir):
+            return
+        listed = {row[0] for row in conn.execute("SELECT path FROM archive_files")}
+        for root, _, files in os.walk(self.archive_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.archive_dir)
+                if name.endswith(".tmp") or (name.endswith(".parquet") and relative not in listed):
+                    os.remove(path)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="archive-compactor", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 30.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.compact_once()
+            except Exception as e:
+                logger.error(f"❌ Archive compaction failed: {e}")
+            self._stop.wait(self.interval)
+
+
+def archived_days(db_path: str, first: Optional[str] = None, last: Optional[str] = None) -> Dict[str, List[str]]:
+    """Day -> archive file paths (relative to the archive dir), oldest day first.
+
+    first/last (ISO dates or timestamps, both inclusive) limit the days listed.
+    """
+    sql = "SELECT path, day FROM archive_files"
+    where, params = [], []
+    if first:
+        where.append("day >= ?")
+        params.append(first[:10])
+    if last:
+        where.append("day <= ?")
+        params.append(last[:10])
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    conn = connect(db_path)
+    try:
+        days: Dict[str, List[str]] = {}
+        for path, day in conn.execute(sql + " ORDER BY day, min_id", params):
+            days.setdefault(day, []).append(path)
+        return days
+    finally:
+        conn.close()
+
+
+def _sqlite_rows(db_path: str, chunk_size: int, **filters) -> Iterator[Tuple]:
+    where, params = transaction_filters(**filters)
+    sql = f"SELECT {TAIL_COLUMNS} FROM transactions"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY timestamp"
+    conn = connect(db_path)
+    try:
+        cursor = conn.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                return
+            yield from rows
+    finally:
+        conn.close()
+
+
+def parquet_filters(
+    address: Optional[str] = None,
+    coin: Optional[str] = None,
+    side: Optional[str] = None,
+    order_type: Optional[str] = None,
+    min_value: Optional[float] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+) -> Optional[List[Tuple]]:
+    """store.transaction_filters() as pyarrow filters."""
+    filters = []
+    if address:
+        filters.append(("address", "=", address))
+    if coin:
+        filters.append(("coin", "=", coin))
+    if side:
+        filters.append(("action", "in", list(SIDES[side.upper()])))
+    if order_type:
+        filters.append(("order_type", "=", order_type))
+    if min_value:
+        filters.append(("value_usd", ">=", min_value))
+    if start:
+        filters.append(("timestamp", ">=", start))
+    if end:
+        filters.append(("timestamp", "<", end))
+    return filters or None
+
+
+def _read_day(archive_dir: str, paths: List[str], filters: Optional[List[Tuple]], descending: bool = False) -> List[Tuple]:
+    """One day's archived rows matching the filters, sorted by (timestamp, id)."""
+    table = pq.read_table(
+        [os.path.join(archive_dir, path) for path in paths],
+        schema=ARCHIVE_SCHEMA,
+        filters=filters
+    )
+    if table.num_rows == 0:
+        return []
+    order = "descending" if descending else "ascending"
+    columns = table.sort_by([("timestamp", order), ("id", order)]).to_pydict()
+    return list(zip(*(columns[name] for name in COLUMNS)))
+
+
+def archived_rows(db_path: str, archive_dir: str, **filters) -> Iterator[Tuple]:
+    """Archived rows in time order, reading one day's files at a time."""
+    pq_filters = parquet_filters(**filters)
+    for paths in archived_days(db_path, filters.get("start"), filters.get("end")).values():
+        yield from _read_day(archive_dir, paths, pq_filters)
+
+
+def read_transactions(
+    db_path: str,
+    archive_dir: Optional[str] = None,
+    address: Optional[str] = None,
+    coin: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    chunk_size: int = 5000
+) -> Iterator[Tuple]:
+    """TAIL_COLUMNS rows from the archive and SQLite together, oldest first.
+
+    start/end are ISO timestamps (end exclusive). SQLite is read with a
+    cursor chunk_size rows at a time and the archive a day at a time, so
+    memory stays bounded however long the range is.
+    """
+    filters = {"address": address, "coin": coin, "start": start, "end": end}
+    sources = [_sqlite_rows(db_path, chunk_size, **filters)]
+    archive_dir = archive_dir or default_archive_dir(db_path)
+    if pq is not None and os.path.isdir(archive_dir):
+        sources.insert(0, archived_rows(db_path, archive_dir, **filters))
+    # Rows inserted late (backfills) can be older than archived ones
+    return heapq.merge(*sources, key=lambda row: row[TIMESTAMP])
+
+
+def _archived_page(
+    db_path: str,
+    archive_dir: str,
+    before: Optional[Cursor],
+    limit: int,
+    after: Optional[Cursor] = None,
+    **filters
+) -> List[Tuple]:
+    """Up to `limit` archived rows between the cursors (both exclusive), newest first, a day at a time.
+
+    Only days between the start filter (or `after`) and the cursor (or end
+    filter) are read, so nothing is read when `after` is newer than the
+    newest archived day.
+    """
+    pq_filters = parquet_filters(**filters) or []
+    first, last = filters.get("start"), filters.get("end")
+    if before is not None:
+        pq_filters.append(("timestamp", "<=", before[0]))
+        last = min(last, before[0]) if last else before[0]
+    if after is not None:
+        pq_filters.append(("timestamp", ">=", after[0]))
+        first = max(first, after[0]) if first else after[0]
+    rows: List[Tuple] = []
+    for paths in reversed(list(archived_days(db_path, first, last).values())):
+        for row in _read_day(archive_dir, paths, pq_filters or None, descending=True):
+            key = (row[TIMESTAMP], row[0])
+            if (before is None or key < before) and (after is None or key > after):
+                rows.append(row)
+        if len(rows) >= limit:
+            break
+    return rows[:limit]
+
+
+def history_page(
+    db_path: str,
+    before: Optional[Cursor] = None,
+    limit: int = 50,
+    archive_dir: Optional[str] = None,
+    **filters
+) -> Tuple[List[Transaction], Optional[Cursor]]:
+    """One page of history, newest first, from SQLite and the archive together.
+
+    Filters are those of store.transaction_filters(). Returns the page and
+    the cursor for the next (older) one, or None after the last page.
+    """
+    rows = query_transactions(db_path, before, limit, **filters)
+    archive_dir = archive_dir or default_archive_dir(db_path)
+    if pq is not None and os.path.isdir(archive_dir):
+        # A full SQLite page only gives way to archived rows newer than its oldest row
+        after = (rows[-1][TIMESTAMP], rows[-1][0]) if len(rows) == limit else None
+        archived = _archived_page(db_path, archive_dir, before, limit, after, **filters)
+        if archived:
+            # Late backfills mean SQLite can hold rows older than archived ones
+            rows = heapq.nlargest(limit, rows + archived, key=lambda row: (row[TIMESTAMP], row[0]))
+    if not rows:
+        return [], None
+    last = rows[-1]
+    next_cursor = (last[TIMESTAMP], last[0]) if len(rows) == limit else None
+    return [row_to_transaction(row[1:]) for row in rows], next_cursor
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old transactions to Parquet")
+    parser.add_argument("command", choices=["compact"])
+    parser.add_argument("--db", default="hyperliquid.db")
+    parser.add_argument("--archive-dir", help="default: <db name>-archive/ next to the database")
+    parser.add_argument("--hot-days", type=float, default=30, help="days of transactions to keep in SQLite")
+    parser.add_argument(
+        "--key-days", type=float, default=REFETCH_HORIZON_DAYS,
+        help="days to keep archived rows' keys for deduplicating re-fetched fills"
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    Compactor(args.db, args.archive_dir, hot_days=args.hot_days, key_days=args.key_days).compact_once()
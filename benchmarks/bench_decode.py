@@ -0,0 +1,117 @@
+"""Decode-path benchmark on a 2000-fill userFills payload.
+
+    python -m benchmarks.bench_decode [--fills 2000] [--new 10]
+
+Compares the old path (json.loads + process_fills throwing away seen fills)
+with the fast path (time/tid pre-filter, optional orjson) for a quiet wallet and
+for a wallet with a few new fills.
+"""
+import argparse
+import gzip
+import json
+import logging
+import random
+import time
+import timeit
+
+from decoding import JSON_BACKEND, decode_fills, loads
+from scraper import AsyncHyperliquidScraper
+
+ADDRESS = "0x" + "ab" * 20
+
+
+def make_payload(count: int) -> bytes:
+    """Newest-first fills shaped like the real userFills response."""
+    now = int(time.time() * 1000)
+    fills = []
+    for i in range(count):
+        tid = 900_000_000_000 + count - i
+        px = random.uniform(1, 5000)
+        sz = random.uniform(0.01, 100)
+        fills.append({
+            "coin": random.choice(["BTC", "ETH", "SOL", "HYPE"]),
+            "px": f"{px:.4f}",
+            "sz": f"{sz:.4f}",
+            "side": random.choice("BA"),
+            "time": now - i * 1000,
+            "startPosition": "0.0",
+            "dir": "Open Long",
+            "closedPnl": "0.0",
+            "hash": "0x" + "%064x" % random.getrandbits(256),
+            "oid": tid + 10_000,
+            "crossed": True,
+            "fee": f"{px * sz * 0.00035:.6f}",
+            "tid": tid,
+            "feeToken": "USDC",
+        })
+    return json.dumps(fills).encode()
+
+
+def make_watcher(seen_payload: bytes):
+    """A watcher that has already processed every fill in seen_payload."""
+    scraper = AsyncHyperliquidScraper(persist=False, dedupe_max_ids=5000)
+    scraper.add_address(ADDRESS)
+    watcher = scraper.watchers[ADDRESS]
+    watcher.process_fills(json.loads(seen_payload))
+    return watcher
+
+
+def decode(watcher, raw: bytes):
+    """decode_fills the way the scraper calls it: since the watcher's mark, against its window."""
+    return decode_fills(raw, watcher.last_fill_time_ms, watcher.seen_transaction_ids.seen)
+
+
+def bench(label: str, func, number: int):
+    seconds = timeit.timeit(func, number=number) / number
+    print(f"{label:<48} {seconds * 1000:9.3f} ms")
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fills", type=int, default=2000)
+    parser.add_argument("--new", type=int, default=10, help="new fills in the 'busy' case")
+    parser.add_argument("--number", type=int, default=50)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    random.seed(7)
+
+    payload = make_payload(args.fills + args.new)
+    fills = json.loads(payload)
+    seen = json.dumps(fills[args.new:]).encode()  # everything but the newest fills
+    quiet = seen  # nothing new since the last poll
+
+    print(f"payload: {args.fills} fills, {len(seen) / 1024:.0f} KiB raw, "
+          f"{len(gzip.compress(seen)) / 1024:.0f} KiB gzip; JSON backend: {JSON_BACKEND}")
+    print()
+
+    watcher = make_watcher(seen)
+
+    print("Quiet wallet (no new fills)")
+    old = bench("  json.loads + process_fills (old path)", lambda: watcher.process_fills(json.loads(quiet)), args.number)
+    bench("  fast loads + process_fills", lambda: watcher.process_fills(loads(quiet)), args.number)
+    new = bench("  decode_fills(since) + process_fills", lambda: watcher.process_fills(decode(watcher, quiet)), args.number)
+    print(f"  speedup: {old / new:,.0f}x")
+    print()
+
+    print(f"Busy wallet ({args.new} new fills)")
+    old = bench(
+        "  json.loads + process_fills (old path)",
+        lambda: make_watcher(seen).process_fills(json.loads(payload)),
+        max(1, args.number // 10)
+    )
+    def busy():
+        fresh = make_watcher(seen)
+        return fresh.process_fills(decode(fresh, payload))
+
+    new = bench(
+        "  decode_fills(since) + process_fills",
+        busy,
+        max(1, args.number // 10)
+    )
+    setup = bench("  (watcher setup included in both)", lambda: make_watcher(seen), max(1, args.number // 10))
+    print(f"  speedup excluding setup: {(old - setup) / max(new - setup, 1e-9):,.1f}x")
+
+
+if __name__ == "__main__":
+    main()
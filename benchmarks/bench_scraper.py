@@ -0,0 +1,253 @@
+"""End-to-end scraper benchmark against the local mock /info server.
+
+    python -m benchmarks.bench_scraper [--watchers 10 100 1000 10000] [--cycles 20]
+        [--rate 50] [--history 100] [--latency-ms 20] [--error-rate 0.01]
+        [--compare benchmarks/results/<earlier>.json]
+
+Each watcher count runs in a fresh process (so peak RSS is per size) against
+a mock server in another process (so its CPU isn't counted). The first cycle
+is the backfill and is reported separately; the rest are steady state.
+Results are written to benchmarks/results/ for comparison with later runs.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import platform
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_mock(args, watchers: int) -> Tuple[subprocess.Popen, str]:
+    """Mock server in its own process, seeded with `watchers` synthetic wallets."""
+    port = free_port()
+    command = [
+        sys.executable, os.path.join(ROOT, "mock_server.py"),
+        "--port", str(port),
+        "--synthetic", str(watchers),
+        "--history", str(args.history),
+        "--orders", str(args.orders),
+        "--rate", str(args.rate),
+        "--latency-ms", str(args.latency_ms),
+        "--jitter-ms", str(args.jitter_ms),
+        "--error-rate", str(args.error_rate),
+        "--throttle-rate", str(args.throttle_rate),
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    process.stdout.readline()  # "Serving ..." once seeded and listening
+    return process, f"http://127.0.0.1:{port}/info"
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_size(watchers: int, base_url: str, options: Dict) -> Dict:
+    """Drive one scraper through the cycles (runs in a fresh spawned process)."""
+    logging.disable(logging.NOTSET if options["log"] else logging.WARNING)
+    from mock_server import synthetic_address
+    from scraper import AsyncHyperliquidScraper
+
+    async def main() -> Dict:
+        db_dir = tempfile.mkdtemp(prefix="hl-bench-")
+        scraper = AsyncHyperliquidScraper(
+            db_path=os.path.join(db_dir, "bench.db"),
+            base_url=base_url,
+            persist=options["db"],
+            warm_start=False,
+            weight_per_minute=0,  # local server - measure the scraper, not the budget
+            max_concurrency=options["concurrency"],
+            incremental_fills=options["incremental"],
+            cycle_timeout=None
+        )
+        for i in range(watchers):
+            scraper.add_address(synthetic_address(i))
+
+        cycle_times: List[float] = []
+        cycle_cpu: List[float] = []
+        cycle_fills: List[int] = []
+        requests_before = scraper.pool_stats()["requests"]
+        started = time.perf_counter()
+        for _ in range(options["cycles"]):
+            wall, cpu = time.perf_counter(), time.process_time()
+            transactions = await scraper.check_all_addresses()
+            cycle_times.append(time.perf_counter() - wall)
+            cycle_cpu.append(time.process_time() - cpu)
+            cycle_fills.append(len(transactions))
+            if options["pause"]:
+                await asyncio.sleep(options["pause"])
+        elapsed = time.perf_counter() - started
+        requests = scraper.pool_stats()["requests"] - requests_before
+        breaker = scraper.breaker_stats()
+        await scraper.close()
+        if scraper.writer is not None:
+            scraper.writer.stop()
+
+        steady_times, steady_cpu, steady_fills = cycle_times[1:], cycle_cpu[1:], cycle_fills[1:]
+        busy = elapsed - options["pause"] * options["cycles"]
+        return {
+            "watchers": watchers,
+            "cycles": options["cycles"],
+            "backfill_cycle_s": round(cycle_times[0], 4),
+            "backfill_transactions": cycle_fills[0],
+            "cycle_p50_s": round(percentile(steady_times, 0.50), 4),
+            "cycle_p99_s": round(percentile(steady_times, 0.99), 4),
+            "cycle_max_s": round(max(steady_times, default=0.0), 4),
+            "requests": requests,
+            "requests_per_s": round(requests / busy, 1) if busy > 0 else 0.0,
+            "transactions": sum(cycle_fills),
+            "steady_transactions": sum(steady_fills),
+            "cpu_s": round(sum(cycle_cpu), 4),
+            "cpu_ms_per_watcher_cycle": round(
+                sum(steady_cpu) * 1000 / (watchers * len(steady_cpu)), 4
+            ) if steady_cpu else 0.0,
+            "cpu_ms_per_fill": round(sum(cycle_cpu) * 1000 / sum(cycle_fills), 4) if sum(cycle_fills) else None,
+            # ru_maxrss is KiB on Linux, bytes on macOS
+            "peak_rss_mb": round(
+                resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1
+            ),
+            "request_errors": breaker["failures"] + breaker["throttled"],
+            "breaker_trips": breaker["trips"],
+        }
+
+    return asyncio.run(main())
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# (result key, header, number format)
+COLUMNS = (
+    ("watchers", "watchers", "d"),
+    ("backfill_cycle_s", "backfill s", ".3f"),
+    ("cycle_p50_s", "p50 s", ".3f"),
+    ("cycle_p99_s", "p99 s", ".3f"),
+    ("requests_per_s", "req/s", ".0f"),
+    ("cpu_ms_per_watcher_cycle", "cpu ms/watcher", ".3f"),
+    ("cpu_ms_per_fill", "cpu ms/fill", ".3f"),
+    ("peak_rss_mb", "rss MB", ".0f"),
+    ("request_errors", "errors", "d"),
+)
+
+
+def print_table(rows: List[Dict]):
+    print("  ".join(f"{title:>{max(10, len(title))}}" for _, title, _ in COLUMNS))
+    for row in rows:
+        cells = []
+        for key, title, spec in COLUMNS:
+            value = row.get(key)
+            text = format(value, spec) if value is not None else "-"
+            cells.append(f"{text:>{max(10, len(title))}}")
+        print("  ".join(cells))
+
+
+def print_comparison(rows: List[Dict], baseline_path: str):
+    with open(baseline_path) as f:
+        baseline = {row["watchers"]: row for row in json.load(f)["results"]}
+    print(f"\nvs {baseline_path} (ratio new/old, < 1 is better except req/s)")
+    for row in rows:
+        old = baseline.get(row["watchers"])
+        if old is None:
+            continue
+        ratios = []
+        for key in ("cycle_p50_s", "cycle_p99_s", "requests_per_s", "cpu_ms_per_watcher_cycle", "peak_rss_mb"):
+            if old.get(key) and row.get(key) is not None:
+                ratios.append(f"{key}={row[key] / old[key]:.2f}")
+        print(f"  {row['watchers']:>6} watchers: " + ", ".join(ratios))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--watchers", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--cycles", type=int, default=20)
+    parser.add_argument("--pause", type=float, default=0.0, help="seconds between cycles (lets new fills arrive)")
+    parser.add_argument("--rate", type=float, default=50.0, help="new fills/orders per second across all wallets")
+    parser.add_argument("--history", type=int, default=100, help="fills per wallet before the first cycle")
+    parser.add_argument("--orders", type=int, default=2, help="open orders per wallet before the first cycle")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--incremental", action="store_true", help="use userFillsByTime from the high-water mark")
+    parser.add_argument("--no-db", action="store_true", help="skip the SQLite writer")
+    parser.add_argument("--log", action="store_true", help="keep per-fill logging on")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/bench_scraper-<time>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    options = {
+        "cycles": max(2, args.cycles),
+        "pause": args.pause,
+        "concurrency": args.concurrency,
+        "incremental": args.incremental,
+        "db": not args.no_db,
+        "log": args.log,
+    }
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for watchers in args.watchers:
+        server, base_url = start_mock(args, watchers)
+        try:
+            with context.Pool(1) as pool:
+                row = pool.apply(run_size, (watchers, base_url, options))
+        finally:
+            server.terminate()
+            server.wait()
+        rows.append(row)
+        print(f"  {watchers} watchers done: p50 {row['cycle_p50_s']:.3f}s, {row['requests_per_s']:.0f} req/s", flush=True)
+
+    print()
+    print_table(rows)
+
+    report = {
+        "benchmark": "bench_scraper",
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "results": rows,
+    }
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench_scraper-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nSaved {output}")
+
+    if args.compare:
+        print_comparison(rows, args.compare)
+
+
+if __name__ == "__main__":
+    main()
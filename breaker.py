@@ -0,0 +1,154 @@
+import random
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 8.0) -> float:
+    """Full-jitter exponential backoff: uniform in [0, min(cap, base * 2**attempt)].
+
+    Spreading retries over the whole range keeps hundreds of watchers that
+    failed together from retrying together.
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """Endpoint-level circuit breaker shared by every watcher.
+
+    closed: requests flow; `failure_threshold` consecutive failures open it.
+    open: requests are rejected without touching the network until the
+    reset timeout (or the server's Retry-After) has passed.
+    half_open: a single probe request is let through; success closes the
+    circuit, failure reopens it with the reset timeout doubled (up to
+    max_reset_timeout).
+
+    Like WeightRateLimiter it holds no loop-bound primitives.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 15.0,
+        max_reset_timeout: float = 300.0
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self.reset_timeout = reset_timeout
+
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self._open_until = 0.0
+        self._probe_started: Optional[float] = None
+
+        self.metrics = {
+            "successes": 0,
+            "failures": 0,
+            "trips": 0,
+            "rejected": 0,
+            "throttled": 0,  # 429 responses
+            "probes": 0,
+        }
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; in half-open only the probe gets through."""
+        if self.state == CLOSED:
+            return True
+
+        now = time.monotonic()
+        if self.state == OPEN:
+            if now < self._open_until:
+                self.metrics["rejected"] += 1
+                return False
+            self.state = HALF_OPEN
+            self._probe_started = None
+
+        # Half-open. A probe that never reported back (cancelled) is replaced
+        # after a reset timeout so the circuit can't wedge half-open.
+        if self._probe_started is None or now - self._probe_started > self.reset_timeout:
+            self._probe_started = now
+            self.metrics["probes"] += 1
+            return True
+        self.metrics["rejected"] += 1
+        return False
+
+    def release_probe(self):
+        """The probe was granted but never sent (stopping, no rate-limit weight, local error).
+
+        Nothing was learned about the endpoint, so the next request may probe
+        straight away instead of waiting out the stale-probe timeout.
+        """
+        if self.state == HALF_OPEN:
+            self._probe_started = None
+
+    def record_success(self):
+        self.metrics["successes"] += 1
+        self.consecutive_failures = 0
+        if self.state != CLOSED:
+            self.state = CLOSED
+            self.reset_timeout = self.base_reset_timeout
+            self._probe_started = None
+
+    def record_failure(self):
+        self.metrics["failures"] += 1
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN:
+            # The probe failed: back off harder before the next one
+            self.reset_timeout = min(self.max_reset_timeout, self.reset_timeout * 2)
+            self._open(self.reset_timeout)
+        elif self.state == CLOSED and self.consecutive_failures >= self.failure_threshold:
+            self._open(self.reset_timeout)
+
+    def record_throttled(self, retry_after: Optional[float] = None):
+        """A 429: stop everyone for Retry-After seconds (or the reset timeout if none was sent)."""
+        self.metrics["throttled"] += 1
+        self.consecutive_failures += 1
+        self._open(retry_after if retry_after is not None else self.reset_timeout)
+
+    def _open(self, duration: float):
+        if self.state != OPEN:
+            self.metrics["trips"] += 1
+        self.state = OPEN
+        self._open_until = max(self._open_until, time.monotonic() + duration)
+        self._probe_started = None
+
+    def retry_in(self) -> float:
+        """Seconds until the next request (or probe) will be allowed."""
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._open_until - time.monotonic())
+
+    def stats(self) -> Dict:
+        stats = dict(self.metrics)
+        stats["endpoint"] = self.name
+        stats["state"] = self.state
+        stats["consecutive_failures"] = self.consecutive_failures
+        stats["reset_timeout"] = self.reset_timeout
+        stats["retry_in"] = round(self.retry_in(), 3)
+        return stats
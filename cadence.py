@@ -0,0 +1,248 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+class AdaptiveCadence:
+    """Per-address polling deadlines kept in a priority queue.
+
+    Each address has its own poll interval: any fill or order activity snaps
+    it back to min_interval, and every quiet check stretches it by decay up to
+    max_interval. Wallets that have had no open orders for orders_idle_after
+    seconds only get their openOrders checked once every max_interval.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 10.0,
+        max_interval: float = 300.0,
+        decay: float = 1.5,
+        orders_idle_after: float = 3600.0
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.decay = decay
+        self.orders_idle_after = orders_idle_after
+
+        self._heap: List[Tuple[float, int, str]] = []  # (deadline, seq, address)
+        self._deadlines: Dict[str, float] = {}  # live deadline per address (heap entries may be stale)
+        self._intervals: Dict[str, float] = {}
+        self._orders_empty_since: Dict[str, float] = {}
+        self._last_orders_check: Dict[str, float] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def schedule(self, address: str, deadline: Optional[float] = None):
+        """(Re)schedule an address; new addresses are due immediately."""
+        if deadline is None:
+            deadline = time.monotonic()
+        self._deadlines[address] = deadline
+        self._intervals.setdefault(address, self.min_interval)
+        heapq.heappush(self._heap, (deadline, next(self._seq), address))
+
+    def discard(self, address: str):
+        """Stop scheduling an address (its heap entries are skipped lazily)."""
+        self._deadlines.pop(address, None)
+        self._intervals.pop(address, None)
+        self._orders_empty_since.pop(address, None)
+        self._last_orders_check.pop(address, None)
+
+    def pop_due(self, now: Optional[float] = None) -> List[str]:
+        """Remove and return every address whose deadline has passed."""
+        if now is None:
+            now = time.monotonic()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            deadline, _, address = heapq.heappop(self._heap)
+            # Skip entries for removed or rescheduled addresses
+            if self._deadlines.get(address) == deadline:
+                del self._deadlines[address]
+                due.append(address)
+        return due
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest live deadline, or None if nothing is scheduled."""
+        while self._heap and self._deadlines.get(self._heap[0][2]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    def should_check_orders(self, address: str, now: Optional[float] = None) -> bool:
+        """Skip openOrders for wallets that have had none for a long time."""
+        if now is None:
+            now = time.monotonic()
+        empty_since = self._orders_empty_since.get(address)
+        if empty_since is None or now - empty_since < self.orders_idle_after:
+            return True
+        return now - self._last_orders_check.get(address, 0.0) >= self.max_interval
+
+    def record(
+        self,
+        address: str,
+        active: bool,
+        open_orders: Optional[int],
+        now: Optional[float] = None
+    ) -> float:
+        """Update an address after a check and schedule its next poll; returns the new interval.
+
+        open_orders is the number of currently open orders, or None if they weren't checked.
+        """
+        if now is None:
+            now = time.monotonic()
+
+        if open_orders is not None:
+            self._last_orders_check[address] = now
+            if open_orders:
+                self._orders_empty_since.pop(address, None)
+            else:
+                self._orders_empty_since.setdefault(address, now)
+
+        if active:
+            interval = self.min_interval
+            # Fresh activity may come with new orders - resume checking them
+            self._orders_empty_since.pop(address, None)
+        else:
+            interval = min(self.max_interval, self._intervals.get(address, self.min_interval) * self.decay)
+        self._intervals[address] = interval
+        self.schedule(address, now + interval)
+        return interval
+
+    def reschedule(self, address: str, now: Optional[float] = None) -> float:
+        """Schedule the next poll at the current interval, learning nothing (e.g. the check failed)."""
+        if now is None:
+            now = time.monotonic()
+        interval = self._intervals.get(address, self.min_interval)
+        self.schedule(address, now + interval)
+        return interval
+
+    def interval_of(self, address: str) -> Optional[float]:
+        return self._intervals.get(address)
+
+    def stats(self) -> Dict:
+        intervals = list(self._intervals.values())
+        return {
+            "scheduled": len(self._deadlines),
+            "hot": sum(1 for interval in intervals if interval <= self.min_interval),
+            "dormant": sum(1 for interval in intervals if interval >= self.max_interval),
+            "mean_interval": sum(intervals) / len(intervals) if intervals else 0.0,
+            "orders_skipped": sum(
+                1 for address in self._orders_empty_since
+                if not self.should_check_orders(address)
+            ),
+        }
+
+
+SKIP = "skip"
+CATCH_UP = "catch_up"
+SHED = "shed"
+OVERRUN_POLICIES = (SKIP, CATCH_UP, SHED)
+
+
+class FixedRateTicker:
+    """Ticks at start + k * interval, however long each cycle takes.
+
+    Sleeping the interval after each cycle makes the real period interval
+    plus cycle time; aiming at absolute deadlines keeps it at interval.
+    When a cycle runs past the next tick the overrun policy decides:
+
+    skip: drop the missed ticks and wait for the next one on the grid.
+    catch_up: run missed ticks back to back (at most max_catch_up of them),
+    then skip the rest.
+    shed: like skip, and shed_fraction shrinks to the share of the
+    watchlist that fits in one interval (it grows back once cycles are
+    short again); the caller checks only that share, by priority.
+
+    Lag is how late each tick fires relative to its deadline.
+    """
+
+    def __init__(self, interval: float, overrun: str = SKIP, max_catch_up: int = 3, min_shed_fraction: float = 0.1):
+        if overrun not in OVERRUN_POLICIES:
+            raise ValueError(f"overrun must be one of {OVERRUN_POLICIES}, got {overrun!r}")
+        self.interval = float(interval)
+        self.overrun = overrun
+        self.max_catch_up = max(1, max_catch_up)
+        self.min_shed_fraction = min_shed_fraction
+        self.shed_fraction = 1.0
+
+        self._next: Optional[float] = None  # deadline of the next tick
+        self._started: Optional[float] = None  # when the current tick fired
+        self.ticks = 0
+        self.skipped = 0
+        self.overruns = 0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.last_duration = 0.0
+
+    async def wait(self, stop: Optional[asyncio.Event] = None) -> Optional[float]:
+        """Sleep until the next tick is due; returns its lag in seconds.
+
+        Returns None instead, without ticking, if `stop` is set first.
+        """
+        if stop is not None and stop.is_set():
+            return None
+        now = time.monotonic()
+        if self._next is None:
+            self._next = now
+        if self._next > now:
+            if stop is None:
+                await asyncio.sleep(self._next - now)
+            else:
+                try:
+                    await asyncio.wait_for(stop.wait(), self._next - now)
+                    return None
+                except asyncio.TimeoutError:
+                    pass
+            now = time.monotonic()
+        lag = now - self._next
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.ticks += 1
+        self._started = now
+        self._next += self.interval
+        return lag
+
+    def complete(self, now: Optional[float] = None) -> int:
+        """Mark the current tick's work done and apply the overrun policy; returns ticks skipped."""
+        if now is None:
+            now = time.monotonic()
+        if self._started is None:
+            return 0
+        self.last_duration = now - self._started
+        if self.overrun == SHED and self.last_duration > 0:
+            # Aim for 90% of the interval, from the share just checked
+            fit = self.shed_fraction * 0.9 * self.interval / self.last_duration
+            self.shed_fraction = min(1.0, max(self.min_shed_fraction, fit))
+
+        if now <= self._next:
+            return 0
+        self.overruns += 1
+        # Ticks whose deadline has already passed, including the next one
+        missed = int((now - self._next) // self.interval) + 1
+        keep = min(missed, self.max_catch_up) if self.overrun == CATCH_UP else 0
+        skipped = missed - keep
+        self._next += skipped * self.interval
+        self.skipped += skipped
+        return skipped
+
+    def stats(self) -> Dict:
+        return {
+            "interval": self.interval,
+            "overrun": self.overrun,
+            "ticks": self.ticks,
+            "skipped": self.skipped,
+            "overruns": self.overruns,
+            "last_lag": round(self.last_lag, 3),
+            "max_lag": round(self.max_lag, 3),
+            "last_duration": round(self.last_duration, 3),
+            "shed_fraction": round(self.shed_fraction, 3),
+        }
+
+    def shed_count(self, total: int) -> int:
+        """How many of `total` watchers to check this tick under the shed policy."""
+        if self.overrun != SHED:
+            return total
+        return min(total, max(1, math.ceil(total * self.shed_fraction)))
@@ -0,0 +1,222 @@
+"""Headless collector: runs AsyncHyperliquidScraper against the SQLite store.
+
+    python daemon.py --config collector.toml
+
+The dashboard (app.py) only reads the store, so one collector serves any
+number of dashboards. The watchlist lives in the store: addresses from the
+config are added on startup, and addresses added or removed from a
+dashboard are picked up every `watchlist_poll` seconds. Each collector
+writes a heartbeat row to the `collectors` table.
+
+Config (TOML or JSON), all keys optional:
+
+    db_path = "hyperliquid.db"
+    interval = 60              # seconds between poll cycles
+    mode = "poll"              # poll | adaptive | stream
+    watchlist_poll = 5.0
+    metrics_port = 9108        # serve Prometheus /metrics
+    log_level = "INFO"
+    hot_days = 30              # archive older transactions to Parquet (0 = keep all in SQLite)
+    archive_dir = "hyperliquid-archive"  # default: <db name>-archive/
+    compact_interval = 3600
+    addresses = ["0xabc...", { address = "0xdef...", name = "Iron Man" }]
+
+    [scraper]                  # any AsyncHyperliquidScraper keyword argument
+    max_concurrency = 20
+    incremental_fills = true
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    tomllib = None
+
+import metrics
+from archive import Compactor, pa
+from scraper import AsyncHyperliquidScraper, normalize_address
+from store import StateUpdate, load_watchlist
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "db_path": "hyperliquid.db",
+    "interval": 60,
+    "mode": "poll",
+    "watchlist_poll": 5.0,
+    "metrics_port": None,
+    "log_level": "INFO",
+    "hot_days": 0,
+    "archive_dir": None,
+    "compact_interval": 3600.0,
+    "addresses": [],
+    "scraper": {},
+}
+
+
+def load_config(path: Optional[str]) -> Dict:
+    """Read a TOML or JSON config (by extension) over the defaults."""
+    config = dict(DEFAULTS)
+    if not path:
+        return config
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise SystemExit("TOML configs need Python 3.11+ (or use a .json config)")
+        with open(path, "rb") as f:
+            loaded = tomllib.load(f)
+    else:
+        with open(path) as f:
+            loaded = json.load(f)
+    unknown = set(loaded) - set(DEFAULTS)
+    if unknown:
+        raise SystemExit(f"Unknown config keys in {path}: {', '.join(sorted(unknown))}")
+    config.update(loaded)
+    return config
+
+
+def config_addresses(config: Dict) -> List[Tuple[str, Optional[str]]]:
+    """(address, name) pairs from the `addresses` list (plain strings or {address, name} tables)."""
+    entries = []
+    for entry in config["addresses"]:
+        if isinstance(entry, str):
+            entries.append((normalize_address(entry), None))
+        else:
+            entries.append((normalize_address(entry["address"]), entry.get("name")))
+    return entries
+
+
+class Collector:
+    """Owns the scraper for one daemon process: watchlist sync and heartbeat."""
+
+    def __init__(self, config: Dict):
+        self.config = config
+        self.db_path = config["db_path"]
+        self.scraper = AsyncHyperliquidScraper(db_path=self.db_path, **config["scraper"])
+        if self.scraper.writer is None:
+            raise SystemExit("The collector needs the store - don't set persist = false")
+        self.collector_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.started_at = time.time()
+        self._watchlist: Dict[str, Optional[str]] = {}
+        self.compactor: Optional[Compactor] = None
+        if config["hot_days"]:
+            if pa is None:
+                logger.warning("⚠️  hot_days is set but pyarrow isn't installed - nothing will be archived")
+            else:
+                self.compactor = Compactor(
+                    self.db_path,
+                    config["archive_dir"],
+                    hot_days=config["hot_days"],
+                    interval=config["compact_interval"]
+                )
+
+    def add_config_addresses(self):
+        for address, name in config_addresses(self.config):
+            self.scraper.add_address(address, name=name)
+        # Persist them before taking the first watchlist snapshot
+        self.scraper.save_state(wait=True)
+
+    async def sync_watchlist(self):
+        """Apply watchlist rows added or removed (by a dashboard) since the last snapshot.
+
+        Diffing snapshots rather than mirroring the table means our own
+        not-yet-written changes are never mistaken for removals.
+        """
+        current = await asyncio.to_thread(load_watchlist, self.db_path)
+        added = [
+            (address, name) for address, name in current.items()
+            if address not in self._watchlist and address not in self.scraper.watchers
+        ]
+        if len(added) == 1:
+            self.scraper.add_address(*added[0])
+            logger.info(f"➕ Watchlist: {added[0][1] or added[0][0]}")
+        elif added:
+            self.scraper.add_addresses(added)
+        for address in self._watchlist.keys() - current.keys():
+            if address in self.scraper.watchers:
+                self.scraper.remove_address(address)
+        self._watchlist = current
+
+    def heartbeat(self):
+        update = StateUpdate()
+        update.set_heartbeat(
+            self.collector_id,
+            os.getpid(),
+            self.started_at,
+            len(self.scraper.watchers),
+            self.config["mode"],
+            float(self.config["interval"])
+        )
+        self.scraper.writer.submit_state(update)
+
+    async def maintain(self):
+        """Watchlist sync and heartbeat, on their own timer so they run in every mode."""
+        while True:
+            try:
+                await self.sync_watchlist()
+                self.heartbeat()
+            except Exception as e:
+                logger.error(f"❌ Watchlist sync failed: {e}")
+            await asyncio.sleep(self.config["watchlist_poll"])
+
+    async def run(self):
+        self.add_config_addresses()
+        self._watchlist = await asyncio.to_thread(load_watchlist, self.db_path)
+        self.heartbeat()
+        maintainer = asyncio.create_task(self.maintain())
+        if self.compactor is not None:
+            self.compactor.start()
+        try:
+            await self.scraper.run(self.config["interval"], mode=self.config["mode"])
+        finally:
+            maintainer.cancel()
+            await asyncio.gather(maintainer, return_exceptions=True)
+            if self.compactor is not None:
+                await asyncio.to_thread(self.compactor.stop)
+
+
+async def _main(config: Dict):
+    collector = Collector(config)
+    task = asyncio.current_task()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, task.cancel)
+        except NotImplementedError:  # Windows
+            pass
+    logger.info(f"🛰️  Collector {collector.collector_id} writing to {collector.db_path}")
+    try:
+        await collector.run()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        collector.scraper.stop()
+        logger.info("⏹️  Collector stopped")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless Hyperliquid collector")
+    parser.add_argument("--config", help="TOML or JSON config file")
+    parser.add_argument("--db", help="override db_path")
+    parser.add_argument("--interval", type=float, help="override interval")
+    parser.add_argument("--mode", choices=["poll", "adaptive", "stream"], help="override mode")
+    parser.add_argument("--metrics-port", type=int, help="override metrics_port")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    for key, value in (("db_path", args.db), ("interval", args.interval), ("mode", args.mode),
+                       ("metrics_port", args.metrics_port)):
+        if value is not None:
+            config[key] = value
+
+    logging.getLogger().setLevel(config["log_level"])
+    if config["metrics_port"]:
+        metrics.start_metrics_server(int(config["metrics_port"]))
+    asyncio.run(_main(config))
@@ -0,0 +1,73 @@
+import json
+import re
+from typing import Any, Callable, List, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+try:
+    import brotli  # noqa: F401 - aiohttp decodes br responses when this is installed
+    ACCEPT_ENCODING = "gzip, deflate, br"
+except ImportError:
+    ACCEPT_ENCODING = "gzip, deflate"
+
+JSON_BACKEND = "orjson" if orjson is not None else "json"
+
+_TID = re.compile(rb'"tid":\s*(\d+)')
+_TIME = re.compile(rb'"time":\s*(\d+)')
+_TID_KEY = b'"tid":'
+
+
+def loads(raw: bytes) -> Any:
+    """Parse a JSON response body with the fastest available parser."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def count_fills(raw: bytes) -> int:
+    """Number of fills in a raw fills payload, without parsing it."""
+    return raw.count(_TID_KEY)
+
+
+def fill_marks(raw: bytes) -> Optional[List[Tuple[int, int]]]:
+    """(time, tid) of every fill in a fills payload, read without parsing it.
+
+    Makes no assumption about ordering. None if the payload doesn't have
+    exactly one time and one tid per fill, so the caller has to parse it.
+    """
+    times = _TIME.findall(raw)
+    tids = _TID.findall(raw)
+    if len(times) != len(tids):
+        return None
+    return [(int(time_ms), int(tid)) for time_ms, tid in zip(times, tids)]
+
+
+def decode_fills(
+    raw: bytes,
+    since_ms: Optional[int] = None,
+    seen: Optional[Callable[[int, int], bool]] = None
+) -> List[dict]:
+    """Decode a fills payload, dropping fills older than since_ms.
+
+    Fills at exactly since_ms are kept for the caller's dedupe window to
+    judge. `seen(tid, time_ms)` says whether that window already has a
+    fill; when every fill is older than since_ms or already seen (the
+    steady state for a quiet wallet) the body is never parsed at all.
+    """
+    if since_ms is None:
+        return loads(raw)
+
+    marks = fill_marks(raw)
+    if marks is not None and not any(
+        time_ms > since_ms or (time_ms == since_ms and (seen is None or not seen(tid, time_ms)))
+        for time_ms, tid in marks
+    ):
+        return []
+
+    fills = loads(raw)
+    if not isinstance(fills, list):
+        return fills
+    return [fill for fill in fills if int(fill.get('time', 0)) >= since_ms]
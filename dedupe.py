@@ -0,0 +1,115 @@
+import heapq
+import sys
+from typing import Dict, List, Optional, Set, Tuple
+
+
+def id_key(value) -> int:
+    """Compact integer key for a tid/oid (falls back to a hash for odd values)."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return hash(str(value))
+
+
+class RecentIdWindow:
+    """Bounded "seen before?" set for time-ordered integer ids (fill tids, order oids).
+
+    Keeps the most recent ids exactly, bounded by count and by a time window.
+    Evicted ids collapse into a watermark (largest evicted id and time): an id
+    at or below both is treated as already seen. Hyperliquid hands out tids and
+    oids in increasing order, so a genuinely new id is always above the
+    watermark; only an id arriving after newer ones have aged out could be
+    misjudged. Watermark hits are counted so that worst case can be reported.
+    """
+
+    def __init__(self, max_items: int = 2500, window_ms: Optional[int] = 24 * 3600 * 1000):
+        self.max_items = max_items
+        self.window_ms = window_ms
+        self._ids: Set[int] = set()
+        self._heap: List[Tuple[int, int]] = []  # (time_ms, key), oldest on top
+        self._newest_time = 0
+        self.floor_time: Optional[int] = None
+        self.floor_key: Optional[int] = None
+
+        self.checks = 0
+        self.duplicates = 0
+        self.floor_hits = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._ids
+
+    def _below_floor(self, key: int, time_ms: Optional[int]) -> bool:
+        if self.floor_time is None or key > self.floor_key:
+            return False
+        return time_ms is None or time_ms <= self.floor_time
+
+    def seen(self, key: int, time_ms: Optional[int] = None) -> bool:
+        """Whether add() would reject this id, without recording anything."""
+        return key in self._ids or self._below_floor(key, time_ms)
+
+    def add(self, key: int, time_ms: Optional[int] = None) -> bool:
+        """Record an id; returns True if it is new, False if it was already seen."""
+        self.checks += 1
+        if key in self._ids:
+            self.duplicates += 1
+            return False
+        if time_ms is not None and time_ms <= 0:
+            time_ms = None
+        if self._below_floor(key, time_ms):
+            self.floor_hits += 1
+            return False
+        if time_ms is None:
+            # No usable timestamp: file it as current
+            time_ms = self._newest_time
+
+        self._ids.add(key)
+        heapq.heappush(self._heap, (time_ms, key))
+        if time_ms > self._newest_time:
+            self._newest_time = time_ms
+        self._evict()
+        return True
+
+    def restore(self, floor_key: Optional[int], floor_time: Optional[int]):
+        """Start from a known watermark (e.g. state persisted before a restart)."""
+        if floor_time is None or floor_key is None:
+            return
+        self.floor_time = floor_time if self.floor_time is None else max(self.floor_time, floor_time)
+        self.floor_key = floor_key if self.floor_key is None else max(self.floor_key, floor_key)
+        self._newest_time = max(self._newest_time, floor_time)
+
+    def _evict(self):
+        heap = self._heap
+        cutoff = self._newest_time - self.window_ms if self.window_ms else None
+        while heap and (len(heap) > self.max_items or (cutoff is not None and heap[0][0] < cutoff)):
+            time_ms, key = heapq.heappop(heap)
+            self._ids.discard(key)
+            self.evictions += 1
+            if self.floor_time is None:
+                self.floor_time, self.floor_key = time_ms, key
+            else:
+                self.floor_time = max(self.floor_time, time_ms)
+                self.floor_key = max(self.floor_key, key)
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the window."""
+        if not self._heap:
+            return sys.getsizeof(self._ids) + sys.getsizeof(self._heap)
+        time_ms, key = self._heap[0]
+        per_entry = sys.getsizeof(self._heap[0]) + sys.getsizeof(time_ms) + sys.getsizeof(key)
+        return sys.getsizeof(self._ids) + sys.getsizeof(self._heap) + per_entry * len(self._heap)
+
+    def stats(self) -> Dict:
+        return {
+            "ids": len(self._ids),
+            "memory_bytes": self.memory_bytes(),
+            "checks": self.checks,
+            "duplicates": self.duplicates,
+            "evictions": self.evictions,
+            "floor_hits": self.floor_hits,
+            # Upper bound: every watermark hit *could* have been a late new id
+            "max_false_positive_rate": self.floor_hits / self.checks if self.checks else 0.0,
+        }
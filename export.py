@@ -0,0 +1,196 @@
+"""Streaming export of stored transactions as CSV, NDJSON or Parquet.
+
+Rows come from archive.read_transactions (SQLite through a cursor, plus any
+Parquet archive), are collected into columnar TransactionBatch chunks and
+encoded chunk by chunk. Memory stays bounded however many rows match.
+
+    python export.py --format csv --address 0xabc... --since 2025-01-01 -o whale.csv
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+from datetime import datetime
+from itertools import islice
+from typing import BinaryIO, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from archive import pa, pq, read_transactions
+from records import TransactionBatch
+from store import batch_from_rows, load_watchlist
+
+FORMATS = ("csv", "ndjson", "parquet")
+MIME_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson", "parquet": "application/vnd.apache.parquet"}
+
+# Export columns: the stored ones, with the display name after the address
+EXPORT_COLUMNS = (
+    "timestamp", "address", "name", "action", "order_type", "coin", "quantity",
+    "price", "value_usd", "fee", "tx_hash", "closed_pnl", "tid",
+)
+
+if pa is not None:
+    PARQUET_SCHEMA = pa.schema([
+        ("timestamp", pa.string()),
+        ("address", pa.string()),
+        ("name", pa.string()),
+        ("action", pa.string()),
+        ("order_type", pa.string()),
+        ("coin", pa.string()),
+        ("quantity", pa.float64()),
+        ("price", pa.float64()),
+        ("value_usd", pa.float64()),
+        ("fee", pa.float64()),
+        ("tx_hash", pa.string()),
+        ("closed_pnl", pa.float64()),
+        ("tid", pa.int64()),
+    ])
+
+
+def available_formats() -> Tuple[str, ...]:
+    return FORMATS if pa is not None else ("csv", "ndjson")
+
+
+def _batches(rows: Iterator[Tuple], size: int) -> Iterator[TransactionBatch]:
+    while True:
+        batch = batch_from_rows(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _export_columns(batch: TransactionBatch, names: Dict[str, Optional[str]]) -> List[Sequence]:
+    """EXPORT_COLUMNS values of one batch, column by column."""
+    derived = {
+        "timestamp": [timestamp.isoformat() for timestamp in batch.timestamps()],
+        "name": [names.get(address) for address in batch.address],
+        "tid": batch.tids(),
+    }
+    return [derived[column] if column in derived else getattr(batch, column) for column in EXPORT_COLUMNS]
+
+
+def _csv_chunks(chunks: Iterator[List[Sequence]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for columns in chunks:
+        writer.writerows(zip(*columns))
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def _ndjson_chunks(chunks: Iterator[List[Sequence]]) -> Iterator[bytes]:
+    for columns in chunks:
+        lines = [json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) for row in zip(*columns)]
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file for ParquetWriter whose bytes are taken out after each row group."""
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _parquet_chunks(chunks: Iterator[List[Sequence]]) -> Iterator[bytes]:
+    if pa is None:
+        raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+    sink = _ChunkSink()
+    # One row group per chunk
+    writer = pq.ParquetWriter(sink, PARQUET_SCHEMA, compression="zstd")
+    try:
+        for columns in chunks:
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, PARQUET_SCHEMA)],
+                schema=PARQUET_SCHEMA
+            ))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+ENCODERS = {"csv": _csv_chunks, "ndjson": _ndjson_chunks, "parquet": _parquet_chunks}
+
+
+def export_chunks(
+    db_path: str,
+    fmt: str = "csv",
+    address: Optional[str] = None,
+    coin: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    names: Optional[Dict[str, Optional[str]]] = None,
+    archive_dir: Optional[str] = None,
+    chunk_rows: int = 5000
+) -> Iterator[bytes]:
+    """Encoded export, as a stream of byte chunks.
+
+    Filters are optional; start/end are ISO timestamps (end exclusive).
+    names maps addresses to the display names written to the `name` column.
+    """
+    if fmt not in ENCODERS:
+        raise ValueError(f"format must be one of {FORMATS}, got {fmt!r}")
+    rows = read_transactions(db_path, archive_dir, address, coin, start, end, chunk_size=chunk_rows)
+    names = names or {}
+    return ENCODERS[fmt](_export_columns(batch, names) for batch in _batches(rows, chunk_rows))
+
+
+def export_to(output: BinaryIO, db_path: str, fmt: str = "csv", **filters) -> int:
+    """Stream an export into a binary file object; returns the bytes written."""
+    written = 0
+    for chunk in export_chunks(db_path, fmt, **filters):
+        output.write(chunk)
+        written += len(chunk)
+    return written
+
+
+def _iso(value: Optional[str]) -> Optional[str]:
+    return datetime.fromisoformat(value).isoformat() if value else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export stored transactions")
+    parser.add_argument("--db", default="hyperliquid.db")
+    parser.add_argument("--archive-dir", help="default: <db name>-archive/ next to the database")
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--address")
+    parser.add_argument("--coin")
+    parser.add_argument("--since", help="ISO date or time (inclusive)")
+    parser.add_argument("--until", help="ISO date or time (exclusive)")
+    parser.add_argument("-o", "--output", help="output file (default: stdout)")
+    args = parser.parse_args()
+
+    filters = {
+        "address": args.address.lower() if args.address else None,
+        "coin": args.coin,
+        "start": _iso(args.since),
+        "end": _iso(args.until),
+        "archive_dir": args.archive_dir,
+        "names": load_watchlist(args.db),
+    }
+    if args.output:
+        with open(args.output, "wb") as f:
+            size = export_to(f, args.db, args.format, **filters)
+        print(f"Wrote {size:,} bytes to {args.output}", file=sys.stderr)
+    else:
+        export_to(sys.stdout.buffer, args.db, args.format, **filters)
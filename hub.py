@@ -0,0 +1,284 @@
+"""Process-wide state shared by every dashboard session.
+
+app.py gets one TransactionHub per Streamlit server through
+st.cache_resource. One background thread tails the store and refreshes the
+watchlist and collector status for all sessions, and fans new transactions
+out to each session's queue. Each session subscribes to the addresses it
+shows, and an address stays on the watchlist (and so is polled, once, by
+the collector) while any live session still subscribes to it.
+
+The hub also keeps an aggregates.FlowAggregator, seeded with the all-time
+totals in the store's rollups and the last 24 hours of fills for its
+rolling windows, then fed every new fill. The dashboard reads its
+per-address and per-coin snapshots instead of rescanning transactions.
+
+With no collector running, the hub can also run one in-process
+(HL_EMBEDDED_COLLECTOR=auto, the default), shared by every session.
+"""
+import asyncio
+import atexit
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from aggregates import FlowAggregator
+from records import Transaction
+from store import (
+    add_to_watchlist, init_db, load_collectors, load_watchlist, read_fills, remove_from_watchlist, rollup_totals,
+    tail_transactions
+)
+
+logger = logging.getLogger(__name__)
+
+
+def collector_is_live(collector: Dict, now: Optional[float] = None) -> bool:
+    """Whether a collectors row has a recent heartbeat (3 intervals, at least 30s)."""
+    if now is None:
+        now = time.time()
+    return now - collector["last_seen"] <= max(3 * (collector["interval"] or 0), 30)
+
+
+class Subscription:
+    """One dashboard session: the addresses it shows and its transaction queue."""
+
+    def __init__(self, sub_id: int, queue_size: int):
+        self.id = sub_id
+        self.addresses: Set[str] = set()
+        self.paused = False
+        self.queue: queue.Queue = queue.Queue(queue_size)
+        self.dropped = 0
+        self.last_seen = time.monotonic()
+
+    def drain(self) -> List[Transaction]:
+        """Everything queued since the last drain, oldest first."""
+        self.last_seen = time.monotonic()
+        transactions = []
+        while True:
+            try:
+                transactions.extend(self.queue.get_nowait())
+            except queue.Empty:
+                return transactions
+
+    def offer(self, transactions: List[Transaction]):
+        try:
+            self.queue.put_nowait(transactions)
+        except queue.Full:
+            # A session that stopped rerunning shouldn't grow without bound
+            self.dropped += len(transactions)
+
+
+class TransactionHub:
+    """Shared store tail with per-session fan-out and refcounted subscriptions."""
+
+    def __init__(
+        self,
+        db_path: str = "hyperliquid.db",
+        poll_interval: float = 1.0,
+        queue_size: int = 100,
+        recent_size: int = 200,
+        idle_timeout: float = 300.0
+    ):
+        self.db_path = db_path
+        self.poll_interval = poll_interval
+        self.queue_size = queue_size
+        self.idle_timeout = idle_timeout
+        init_db(db_path)
+
+        self._lock = threading.Lock()
+        self._subscriptions: Dict[int, Subscription] = {}
+        self._refs: Dict[str, int] = {}  # address -> live subscriptions showing it
+        self._ids = itertools.count(1)
+        self._recent: Deque[Transaction] = deque(maxlen=recent_size)
+        self._last_id: Optional[int] = None
+        self.aggregates = FlowAggregator()
+        self._fills_id: Optional[int] = None  # aggregates have seen every fill up to here
+
+        self.watchlist: Dict[str, Optional[str]] = load_watchlist(db_path)
+        self.collector: Optional[Dict] = None
+        self.embedded = None  # daemon.Collector, if the hub runs one
+        self._poll()
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="transaction-hub", daemon=True)
+        self._thread.start()
+
+    # Subscriptions
+
+    def subscribe(self, addresses: Iterable[str] = ()) -> Subscription:
+        """New session; its queue starts with the recent transactions it cares about."""
+        with self._lock:
+            sub = Subscription(next(self._ids), self.queue_size)
+            self._subscriptions[sub.id] = sub
+            self._set_addresses(sub, set(addresses))
+            recent = [tx for tx in self._recent if tx.address in sub.addresses]
+        if recent:
+            sub.offer(recent)
+        return sub
+
+    def update(self, sub: Subscription, addresses: Iterable[str]):
+        """Set the addresses a session shows (re-registers it if it was pruned while idle)."""
+        sub.last_seen = time.monotonic()
+        with self._lock:
+            if sub.id not in self._subscriptions:
+                self._subscriptions[sub.id] = sub
+                sub.addresses = set()
+            self._set_addresses(sub, set(addresses))
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            if self._subscriptions.pop(sub.id, None) is not None:
+                self._set_addresses(sub, set(), live=False)
+
+    def _set_addresses(self, sub: Subscription, addresses: Set[str], live: bool = True):
+        # Caller holds the lock
+        for address in addresses - sub.addresses:
+            self._refs[address] = self._refs.get(address, 0) + 1
+        for address in sub.addresses - addresses:
+            count = self._refs.get(address, 0) - 1
+            if count > 0:
+                self._refs[address] = count
+            else:
+                self._refs.pop(address, None)
+        sub.addresses = addresses if live else set()
+
+    def subscribers(self, address: str) -> int:
+        return self._refs.get(address, 0)
+
+    # Watchlist
+
+    def watch(self, sub: Subscription, entries: List[Tuple[str, Optional[str]]]):
+        """Add (address, name) pairs to the watchlist and to this session, in one write."""
+        add_to_watchlist(self.db_path, entries)
+        with self._lock:
+            for address, name in entries:
+                self.watchlist.setdefault(address, name)
+            self._set_addresses(sub, sub.addresses | {address for address, _ in entries})
+
+    def release(self, sub: Subscription, addresses: Iterable[str]) -> List[str]:
+        """Stop showing addresses in this session; ones no other session shows leave the watchlist.
+
+        Returns the addresses removed from the watchlist.
+        """
+        addresses = set(addresses)
+        with self._lock:
+            self._set_addresses(sub, sub.addresses - addresses)
+            unwatched = [address for address in addresses if address not in self._refs]
+            for address in unwatched:
+                self.watchlist.pop(address, None)
+        remove_from_watchlist(self.db_path, unwatched)
+        return unwatched
+
+    # Background tail
+
+    def _poll(self):
+        """One store read for every session: new transactions, watchlist, collector heartbeat."""
+        transactions, self._last_id = tail_transactions(self.db_path, self._last_id, None, self._recent.maxlen)
+        watchlist = load_watchlist(self.db_path)
+        now = time.time()
+        live = [collector for collector in load_collectors(self.db_path) if collector_is_live(collector, now)]
+        with self._lock:
+            self.watchlist = watchlist
+            self.collector = live[0] if live else None
+            self._recent.extend(transactions)
+            subscriptions = list(self._subscriptions.values())
+        return transactions, subscriptions
+
+    def _update_aggregates(self, chunk: int = 10000):
+        """Feed the aggregates every fill written since the last call (seeding them, the first time)."""
+        if self._fills_id is None:
+            self._seed_aggregates(chunk)
+        while True:
+            fills, self._fills_id = read_fills(self.db_path, self._fills_id, None, chunk)
+            self.aggregates.update_many(fills)
+            if len(fills) < chunk:
+                return
+
+    def _seed_aggregates(self, chunk: int):
+        """All-time totals from the rollups, and the fills they include within the longest window."""
+        totals, upto = rollup_totals(self.db_path)
+        self.aggregates.seed(totals)
+        longest = max(seconds for _, seconds, _ in self.aggregates.windows)
+        since = datetime.fromtimestamp(time.time() - longest).isoformat()
+        after_id = None
+        while True:
+            fills, after_id = read_fills(self.db_path, after_id, since, chunk, until_id=upto)
+            self.aggregates.update_many(fills, windows_only=True)
+            if len(fills) < chunk:
+                break
+        self._fills_id = upto
+
+    def _run(self):
+        try:
+            self._update_aggregates()
+        except Exception as e:
+            logger.error(f"❌ Loading aggregates failed: {e}")
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self._update_aggregates()
+                transactions, subscriptions = self._poll()
+                self._prune()
+                if not transactions:
+                    continue
+                for sub in subscriptions:
+                    if sub.paused:
+                        continue
+                    matching = [tx for tx in transactions if tx.address in sub.addresses]
+                    if matching:
+                        sub.offer(matching)
+            except Exception as e:
+                logger.error(f"❌ Hub poll failed: {e}")
+
+    def _prune(self):
+        """Drop sessions that stopped rerunning (closed tabs); their addresses stay watched."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle = [sub for sub in self._subscriptions.values() if sub.last_seen < cutoff]
+            for sub in idle:
+                del self._subscriptions[sub.id]
+                self._set_addresses(sub, set(), live=False)
+
+    def qsize(self) -> int:
+        """Transaction batches waiting across every session (for metrics.track_ui_queue)."""
+        with self._lock:
+            return sum(sub.queue.qsize() for sub in self._subscriptions.values())
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "sessions": len(self._subscriptions),
+                "addresses": len(self._refs),
+                "watchlist": len(self.watchlist),
+                "queued": sum(sub.queue.qsize() for sub in self._subscriptions.values()),
+                "dropped": sum(sub.dropped for sub in self._subscriptions.values()),
+                "embedded_collector": self.embedded is not None,
+            }
+
+    # Embedded collector
+
+    def start_collector(self, config: Dict):
+        """Run a daemon.Collector on a background thread, shared by every session."""
+        from daemon import Collector
+
+        config = dict(config, db_path=self.db_path)
+        collector = Collector(config)
+        self.embedded = collector
+
+        def run():
+            try:
+                asyncio.run(collector.run())
+            except Exception as e:
+                logger.error(f"❌ Embedded collector stopped: {e}")
+
+        threading.Thread(target=run, name="embedded-collector", daemon=True).start()
+        atexit.register(collector.scraper.stop)
+        logger.info(f"🛰️  Embedded collector {collector.collector_id} started")
+
+    def close(self):
+        self._stop.set()
+        if self.embedded is not None:
+            self.embedded.scraper.stop()
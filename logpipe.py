@@ -0,0 +1,177 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+LOG_FORMAT = '%(asctime)s - %(message)s'
+DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Per-fill / per-order loggers; these are the ones sampled under load
+HOT_LOGGERS = ("scraper.fills", "scraper.orders")
+SUMMARY_LOGGER = "scraper.logsummary"
+
+
+class BraceMessage:
+    """Log message formatted with str.format only when a handler needs the text."""
+
+    __slots__ = ("fmt", "args")
+
+    def __init__(self, fmt: str, *args):
+        self.fmt = fmt
+        self.args = args
+
+    def __str__(self) -> str:
+        return self.fmt.format(*self.args)
+
+
+class LazyQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread and never blocks."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # The stock prepare() formats here, on the caller's thread. Records stay
+        # in-process, so they can travel unformatted; only exc_info needs
+        # rendering now, while the traceback is still alive.
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets at most `rate` hot-path messages through per second and counts the rest.
+
+    Suppressed messages are summarised once per window on SUMMARY_LOGGER.
+    """
+
+    def __init__(self, rate: float, window: float = 1.0, prefixes=HOT_LOGGERS):
+        super().__init__()
+        self.rate = rate
+        self.window = window
+        self.prefixes = tuple(prefixes)
+        self.total_suppressed = 0
+        self._window_start = time.monotonic()
+        self._passed = 0
+        self._suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate <= 0 or not record.name.startswith(self.prefixes):
+            return True
+
+        summary = 0
+        with self._lock:
+            now = time.monotonic()
+            if now - self._window_start >= self.window:
+                summary = self._suppressed
+                self._window_start = now
+                self._passed = 0
+                self._suppressed = 0
+            allowed = self._passed < self.rate * self.window
+            if allowed:
+                self._passed += 1
+            else:
+                self._suppressed += 1
+                self.total_suppressed += 1
+
+        if summary:
+            logging.getLogger(SUMMARY_LOGGER).info(
+                "… %d fill/order messages suppressed (over %g/s)", summary, self.rate
+            )
+        return allowed
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; structured fields come from extra={"fields": {...}}."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        fields = getattr(record, "fields", None)
+        if fields:
+            entry.update(fields)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def configure_logging(
+    level: int = logging.INFO,
+    json_output: Optional[bool] = None,
+    fill_rate_limit: Optional[float] = None,
+    log_file: Optional[str] = None,
+    queue_size: int = 100000,
+    force: bool = False
+) -> Optional[logging.handlers.QueueListener]:
+    """Route all logging through a queue to a background thread that formats and writes.
+
+    Like logging.basicConfig this does nothing if the root logger already has
+    handlers, unless force=True. Defaults come from HL_LOG_JSON (1 for JSON
+    lines), HL_LOG_FILL_RATE (hot-path messages per second, 0 = unlimited)
+    and HL_LOG_FILE.
+    """
+    global _listener
+
+    root = logging.getLogger()
+    if root.handlers and not force:
+        return _listener
+    if force:
+        shutdown_logging()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+    if json_output is None:
+        json_output = os.environ.get("HL_LOG_JSON", "") == "1"
+    if fill_rate_limit is None:
+        fill_rate_limit = float(os.environ.get("HL_LOG_FILL_RATE", "50"))
+    if log_file is None:
+        log_file = os.environ.get("HL_LOG_FILE") or None
+
+    formatter = JsonFormatter() if json_output else logging.Formatter(LOG_FORMAT, datefmt=DATE_FORMAT)
+    sinks = [logging.StreamHandler(sys.stderr)]
+    if log_file:
+        sinks.append(logging.FileHandler(log_file))
+    for sink in sinks:
+        sink.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    handler = LazyQueueHandler(log_queue)
+    handler.addFilter(RateLimitFilter(fill_rate_limit))
+    root.addHandler(handler)
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, *sinks, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Drain the queue and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
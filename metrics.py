@@ -0,0 +1,288 @@
+import bisect
+import logging
+import math
+import threading
+import weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CYCLE_BUCKETS = (0.1, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+COUNT_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 20000)
+DB_WRITE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Registry:
+    """Metrics to expose, plus hooks that refresh pull-style gauges before each scrape."""
+
+    def __init__(self):
+        self._metrics: List["Metric"] = []
+        self._hooks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: "Metric"):
+        with self._lock:
+            self._metrics.append(metric)
+
+    def add_collect_hook(self, hook: Callable[[], None]):
+        with self._lock:
+            self._hooks.append(hook)
+
+    def remove_collect_hook(self, hook: Callable[[], None]):
+        with self._lock:
+            if hook in self._hooks:
+                self._hooks.remove(hook)
+
+    def render(self) -> str:
+        with self._lock:
+            hooks = list(self._hooks)
+            metrics = list(self._metrics)
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.error(f"Metrics collect hook failed: {e}")
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), registry: Registry = REGISTRY):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], object] = {}
+        registry.register(self)
+
+    def _key(self, labelvalues: Tuple) -> Tuple[str, ...]:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {labelvalues}")
+        return tuple(str(value) for value in labelvalues)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = self._header()
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, *labelvalues):
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labelvalues) -> float:
+        return self._values.get(self._key(labelvalues), 0.0)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value: float, *labelvalues):
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        registry: Registry = REGISTRY
+    ):
+        super().__init__(name, documentation, labelnames, registry)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labelvalues):
+        key = self._key(labelvalues)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket (non-cumulative) counts, then sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(state[0]), state[1])) for key, state in self._values.items())
+        lines = self._header()
+        bounds = self.buckets + (math.inf,)
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+# Process-wide metrics (like prometheus_client's default registry), so the
+# scraper, the DB writer thread and the dashboard record without any wiring.
+
+# Requests
+REQUEST_SECONDS = Histogram(
+    "hl_request_duration_seconds", "Info API request latency by request type", ("endpoint",)
+)
+REQUEST_ERRORS = Counter(
+    "hl_request_errors_total", "Failed info API requests by request type and error type", ("endpoint", "error")
+)
+REQUEST_RETRIES = Counter("hl_request_retries_total", "Info API request retries by request type", ("endpoint",))
+
+# Cycles
+CYCLE_SECONDS = Histogram("hl_cycle_duration_seconds", "Duration of a check cycle", ("mode",), buckets=CYCLE_BUCKETS)
+CYCLE_OVERRUNS = Counter("hl_cycle_overruns_total", "Check cycles that took longer than the interval", ("mode",))
+CYCLE_LAG = Histogram(
+    "hl_cycle_lag_seconds", "How late each fixed-rate cycle started relative to its deadline", ("mode",),
+    buckets=LAG_BUCKETS
+)
+CYCLE_SKIPPED = Counter("hl_cycle_skipped_total", "Fixed-rate ticks dropped after an overrun", ("mode",))
+WATCHERS_SHED = Counter("hl_watchers_shed_total", "Watcher checks left out of overrunning cycles (shed policy)")
+CYCLE_FILLS = Histogram(
+    "hl_cycle_transactions", "Transactions (fills and new orders) found per check cycle", ("mode",),
+    buckets=COUNT_BUCKETS
+)
+
+# Database writer
+DB_WRITE_SECONDS = Histogram(
+    "hl_db_write_duration_seconds", "Time to commit one writer batch", buckets=DB_WRITE_BUCKETS
+)
+DB_BATCH_ROWS = Histogram("hl_db_batch_rows", "Rows per committed writer batch", buckets=COUNT_BUCKETS)
+DB_WRITE_ERRORS = Counter("hl_db_write_errors_total", "Writer batches that failed to commit")
+
+# Pull-style gauges, refreshed from the tracked scraper on every scrape
+WATCHERS = Gauge("hl_active_watchers", "Addresses being watched")
+BREAKER_STATE = Gauge(
+    "hl_breaker_state", "Circuit breaker state (0 closed, 1 half-open, 2 open)", ("endpoint",)
+)
+BREAKER_TRIPS = Gauge("hl_breaker_trips", "Times the circuit breaker has opened", ("endpoint",))
+DB_PENDING_ROWS = Gauge("hl_db_pending_rows", "Rows submitted but not yet committed")
+DB_QUEUE_DEPTH = Gauge("hl_db_queue_depth", "Batches waiting for the writer thread")
+UI_QUEUE_DEPTH = Gauge("hl_ui_queue_depth", "Transaction batches waiting for dashboard sessions")
+POOL_CONNECTIONS = Gauge("hl_pool_connections", "HTTP connection pool counters", ("kind",))
+RATE_LIMIT_AVAILABLE = Gauge("hl_rate_limit_available_weight", "Request weight that can be spent right now")
+
+_tracked_scraper: Optional[weakref.ref] = None
+_tracked_queue: Optional[weakref.ref] = None
+
+
+def _collect():
+    scraper = _tracked_scraper() if _tracked_scraper is not None else None
+    if scraper is not None:
+        WATCHERS.set(len(scraper.watchers))
+        breaker = scraper.breaker.stats()
+        BREAKER_STATE.set(BREAKER_STATES.get(breaker["state"], 0), breaker["endpoint"])
+        BREAKER_TRIPS.set(breaker["trips"], breaker["endpoint"])
+        RATE_LIMIT_AVAILABLE.set(scraper.rate_limiter.available())
+        pool = scraper.pool_stats()
+        for kind in ("connections_created", "connections_reused", "idle_connections"):
+            POOL_CONNECTIONS.set(pool[kind], kind)
+        if scraper.writer is not None:
+            DB_PENDING_ROWS.set(scraper.writer.pending_rows)
+            DB_QUEUE_DEPTH.set(scraper.writer.stats()["queue_depth"])
+    ui_queue = _tracked_queue() if _tracked_queue is not None else None
+    if ui_queue is not None:
+        UI_QUEUE_DEPTH.set(ui_queue.qsize())
+
+
+REGISTRY.add_collect_hook(_collect)
+
+
+def track_scraper(scraper):
+    """Report gauges (watchers, breaker, pool, writer backlog) for this scraper; the latest one wins."""
+    global _tracked_scraper
+    _tracked_scraper = weakref.ref(scraper)
+
+
+def track_ui_queue(ui_queue):
+    """Report the depth of the collector -> dashboard queue (anything with qsize(), e.g. the hub)."""
+    global _tracked_queue
+    _tracked_queue = weakref.ref(ui_queue)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: Registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # scrapes every few seconds would drown the log
+
+
+_servers: Dict[Tuple[str, int], ThreadingHTTPServer] = {}
+
+
+def start_metrics_server(port: int = 9108, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread; calling again for the same port is a no-op."""
+    server = _servers.get((host, port))
+    if server is not None:
+        return server
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True)
+    thread.start()
+    _servers[(host, server.server_address[1])] = server
+    logger.info(f"📈 Metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -0,0 +1,337 @@
+"""Local stand-in for the Hyperliquid /info and /ws endpoints.
+
+Lets the scraper (polling or streaming) run fully offline:
+
+    python mock_server.py --port 8900 --users 0xabc... 0xdef...
+
+then point AsyncHyperliquidScraper.base_url at http://127.0.0.1:8900/info and
+ws_url at ws://127.0.0.1:8900/ws.
+
+For load testing, --synthetic N serves N generated wallets (see
+synthetic_address) with --history fills each, and --latency-ms,
+--error-rate and --throttle-rate inject slow, failing and 429 responses.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Set
+
+from aiohttp import WSMsgType, web
+
+logger = logging.getLogger(__name__)
+
+COINS = ["BTC", "ETH", "SOL", "HYPE", "ARB", "DOGE"]
+
+
+def synthetic_address(i: int) -> str:
+    """Deterministic address of the i-th synthetic wallet."""
+    return "0x%040x" % (i + 1)
+
+
+class MockHyperliquidServer:
+    """In-memory fills/open orders per user, served over REST and WebSocket."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        max_fills_per_user: int = 5000
+    ):
+        self.host = host
+        self.port = port
+        self.fills: Dict[str, List[Dict]] = {}  # user -> fills, oldest first
+        self.open_orders: Dict[str, Dict[int, Dict]] = {}  # user -> {oid: order}
+        self.requests = 0
+        # Fault injection for /info: added delay (seconds, +- jitter) and the
+        # fraction of requests answered with a 500 or a 429
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_fills_per_user = max_fills_per_user
+        self.injected = {"errors": 0, "throttled": 0}
+        self._next_tid = 1
+        self._next_oid = 1
+        # ws -> set of (subscription type, user)
+        self._subscriptions: Dict[web.WebSocketResponse, Set[tuple]] = {}
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def info_url(self) -> str:
+        return f"http://{self.host}:{self.port}/info"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.port}/ws"
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/info", self.handle_info)
+        app.router.add_get("/ws", self.handle_ws)
+        return app
+
+    async def start(self):
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Pick up the real port when started on port 0
+        self.port = site._server.sockets[0].getsockname()[1]
+        logger.info(f"Mock Hyperliquid server on {self.info_url} / {self.ws_url}")
+
+    async def stop(self):
+        await self.drop_connections()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # State changes - each one is pushed to subscribed WebSockets
+
+    def add_fill(
+        self,
+        user: str,
+        coin: str = "ETH",
+        side: str = "B",
+        px: float = 3000.0,
+        sz: float = 1.0,
+        time_ms: Optional[int] = None,
+        closed_pnl: float = 0.0
+    ) -> Dict:
+        user = user.lower()
+        fill = {
+            "coin": coin,
+            "px": str(px),
+            "sz": str(sz),
+            "side": side,
+            "time": time_ms if time_ms is not None else int(time.time() * 1000),
+            "startPosition": "0.0",
+            "dir": "Open Long" if side == "B" else "Open Short",
+            "closedPnl": str(closed_pnl),
+            "hash": "0x" + "%064x" % random.getrandbits(256),
+            "oid": self._next_oid,
+            "crossed": True,
+            "fee": str(round(px * sz * 0.00035, 6)),
+            "tid": self._next_tid,
+            "feeToken": "USDC",
+        }
+        self._next_tid += 1
+        self._next_oid += 1
+        fills = self.fills.setdefault(user, [])
+        fills.append(fill)
+        if len(fills) > self.max_fills_per_user:
+            # Older than anything the API would return anyway
+            del fills[:len(fills) - self.max_fills_per_user]
+        self._push("userFills", user, {"user": user, "fills": [fill]})
+        return fill
+
+    def place_order(
+        self,
+        user: str,
+        coin: str = "ETH",
+        side: str = "B",
+        limit_px: float = 2900.0,
+        sz: float = 1.0
+    ) -> Dict:
+        user = user.lower()
+        order = {
+            "coin": coin,
+            "side": side,
+            "limitPx": str(limit_px),
+            "sz": str(sz),
+            "oid": self._next_oid,
+            "timestamp": int(time.time() * 1000),
+            "origSz": str(sz),
+        }
+        self._next_oid += 1
+        self.open_orders.setdefault(user, {})[order["oid"]] = order
+        self._push_order_update(user, order, "open")
+        return order
+
+    def cancel_order(self, user: str, oid: int, status: str = "canceled"):
+        user = user.lower()
+        order = self.open_orders.get(user, {}).pop(oid, None)
+        if order is not None:
+            self._push_order_update(user, order, status)
+
+    async def drop_connections(self):
+        """Close every WebSocket, e.g. to exercise client reconnects."""
+        for ws in list(self._subscriptions):
+            await ws.close()
+        self._subscriptions.clear()
+
+    def _push_order_update(self, user: str, order: Dict, status: str):
+        self._push("orderUpdates", user, [{
+            "order": order,
+            "status": status,
+            "statusTimestamp": int(time.time() * 1000),
+        }])
+
+    def seed(self, users: List[str], fills_per_user: int = 0, orders_per_user: int = 0):
+        """Give each user a fill history (spread over the last day) and some open orders."""
+        now = int(time.time() * 1000)
+        for user in users:
+            for i in range(fills_per_user):
+                self.add_fill(
+                    user,
+                    random.choice(COINS),
+                    random.choice("BA"),
+                    round(random.uniform(1, 5000), 2),
+                    round(random.uniform(0.1, 50), 3),
+                    time_ms=now - (fills_per_user - i) * 86_400_000 // max(fills_per_user, 1)
+                )
+            for _ in range(orders_per_user):
+                self.place_order(user, random.choice(COINS), random.choice("BA"), round(random.uniform(1, 5000), 2))
+
+    def _push(self, channel: str, user: str, data):
+        if not self._subscriptions:
+            return
+        message = json.dumps({"channel": channel, "data": data})
+        for ws, subs in list(self._subscriptions.items()):
+            if (channel, user) in subs and not ws.closed:
+                asyncio.ensure_future(self._send(ws, message))
+
+    async def _send(self, ws: web.WebSocketResponse, message: str):
+        try:
+            await ws.send_str(message)
+        except ConnectionError:
+            # Client went away mid-push; it resyncs from the snapshot on reconnect
+            pass
+
+    # HTTP / WebSocket handlers
+
+    async def handle_info(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency or self.latency_jitter:
+            await asyncio.sleep(max(0.0, self.latency + random.uniform(-self.latency_jitter, self.latency_jitter)))
+        if self.error_rate and random.random() < self.error_rate:
+            self.injected["errors"] += 1
+            return web.json_response({"error": "injected failure"}, status=500)
+        if self.throttle_rate and random.random() < self.throttle_rate:
+            self.injected["throttled"] += 1
+            return web.json_response({"error": "rate limited"}, status=429, headers={"Retry-After": "1"})
+        try:
+            body = await request.json()
+        except ValueError:
+            return web.json_response({"error": "invalid json"}, status=400)
+
+        request_type = body.get("type")
+        user = str(body.get("user", "")).lower()
+        fills = self.fills.get(user, [])
+
+        if request_type == "userFills":
+            # Newest first, capped like the real API
+            return web.json_response(list(reversed(fills[-2000:])))
+        if request_type == "userFillsByTime":
+            start = int(body.get("startTime", 0))
+            end = int(body.get("endTime") or 2 ** 62)
+            window = [fill for fill in fills if start <= fill["time"] <= end]
+            return web.json_response(window[:2000])
+        if request_type == "openOrders":
+            return web.json_response(list(self.open_orders.get(user, {}).values()))
+        return web.json_response({"error": f"unsupported type {request_type}"}, status=422)
+
+    async def handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        subs: Set[tuple] = set()
+        self._subscriptions[ws] = subs
+
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                try:
+                    message = json.loads(msg.data)
+                except ValueError:
+                    await ws.send_str(json.dumps({"channel": "error", "data": "invalid json"}))
+                    continue
+
+                method = message.get("method")
+                if method == "ping":
+                    await ws.send_str(json.dumps({"channel": "pong"}))
+                    continue
+
+                subscription = message.get("subscription", {})
+                key = (subscription.get("type"), str(subscription.get("user", "")).lower())
+                if method == "subscribe":
+                    subs.add(key)
+                    await ws.send_str(json.dumps({"channel": "subscriptionResponse", "data": message}))
+                    if key[0] == "userFills":
+                        snapshot = list(reversed(self.fills.get(key[1], [])[-2000:]))
+                        await ws.send_str(json.dumps({
+                            "channel": "userFills",
+                            "data": {"isSnapshot": True, "user": key[1], "fills": snapshot}
+                        }))
+                elif method == "unsubscribe":
+                    subs.discard(key)
+                    await ws.send_str(json.dumps({"channel": "subscriptionResponse", "data": message}))
+        finally:
+            self._subscriptions.pop(ws, None)
+        return ws
+
+
+async def _simulate(server: MockHyperliquidServer, users: List[str], rate: float):
+    """Generate random fills and order activity for the given users."""
+    while True:
+        await asyncio.sleep(random.expovariate(rate) if rate > 0 else 1)
+        user = random.choice(users)
+        coin = random.choice(COINS)
+        side = random.choice("BA")
+        px = round(random.uniform(1, 5000), 2)
+        roll = random.random()
+        if roll < 0.6:
+            server.add_fill(user, coin, side, px, round(random.uniform(0.1, 50), 3))
+        elif roll < 0.85 or not server.open_orders.get(user):
+            server.place_order(user, coin, side, px, round(random.uniform(0.1, 50), 3))
+        else:
+            server.cancel_order(user, random.choice(list(server.open_orders[user])))
+
+
+async def _main(args):
+    server = MockHyperliquidServer(
+        args.host,
+        args.port,
+        latency=args.latency_ms / 1000,
+        latency_jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate
+    )
+    users = [user.lower() for user in args.users]
+    if args.synthetic:
+        users += [synthetic_address(i) for i in range(args.synthetic)]
+        random.seed(args.seed)
+    server.seed(users, args.history, args.orders)
+    await server.start()
+    print(f"Serving {server.info_url} and {server.ws_url} - Ctrl+C to stop", flush=True)
+    if users and args.rate > 0:
+        await _simulate(server, users, args.rate)
+    else:
+        await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline stand-in for the Hyperliquid API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--users", nargs="*", default=[], help="addresses to generate activity for")
+    parser.add_argument("--rate", type=float, default=1.0, help="events per second across all users (0 = none)")
+    parser.add_argument("--synthetic", type=int, default=0, help="also serve this many generated wallets")
+    parser.add_argument("--history", type=int, default=0, help="fills per user to start with")
+    parser.add_argument("--orders", type=int, default=0, help="open orders per user to start with")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="added /info latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="+- random latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of /info requests answered 500")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="fraction of /info requests answered 429")
+    parser.add_argument("--seed", type=int, default=1)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,174 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+# Hyperliquid allows 1200 request weight per minute per IP.
+# Most info requests (userFills, openOrders, userFillsByTime) weigh 20,
+# and fill queries cost 1 extra weight per 20 items returned.
+DEFAULT_WEIGHT_PER_MINUTE = 1200
+DEFAULT_REQUEST_WEIGHT = 20
+REQUEST_WEIGHTS = {
+    "userFills": 20,
+    "userFillsByTime": 20,
+    "openOrders": 20,
+}
+ITEMS_PER_EXTRA_WEIGHT = {
+    "userFills": 20,
+    "userFillsByTime": 20,
+}
+
+
+def request_weight(request_type: str) -> int:
+    """Base weight of an info request."""
+    return REQUEST_WEIGHTS.get(request_type, DEFAULT_REQUEST_WEIGHT)
+
+
+def response_weight(request_type: str, item_count: int) -> int:
+    """Extra weight charged after the fact for large responses."""
+    per = ITEMS_PER_EXTRA_WEIGHT.get(request_type)
+    if not per or item_count <= 0:
+        return 0
+    return item_count // per
+
+
+class WeightRateLimiter:
+    """Token bucket modelling Hyperliquid's per-IP request-weight budget.
+
+    Callers reserve weight up front; when the bucket is empty the reservation
+    pushes the balance negative and the caller sleeps until it is repaid, so
+    concurrent callers are served in arrival order at the refill rate instead
+    of bursting. The limiter holds no loop-bound primitives, so it can be
+    shared across event loops.
+    """
+
+    def __init__(
+        self,
+        weight_per_minute: float = DEFAULT_WEIGHT_PER_MINUTE,
+        burst: Optional[float] = None
+    ):
+        self.weight_per_minute = weight_per_minute
+        self.rate = weight_per_minute / 60.0  # weight per second
+        # Small default burst so a cycle starts smoothly rather than dumping
+        # the whole minute's budget in the first second
+        self.capacity = burst if burst is not None else max(DEFAULT_REQUEST_WEIGHT * 2, self.rate * 2)
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+
+        # Lifetime counters
+        self.weight_used = 0
+        self.requests = 0
+        self.throttled_requests = 0
+        self.wait_time = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.weight_per_minute > 0
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._last_refill = now
+
+    def reserve(self, weight: float) -> float:
+        """Reserve weight and return how long the caller must wait before sending."""
+        self.weight_used += weight
+        self.requests += 1
+        if not self.enabled:
+            return 0.0
+
+        self._refill(time.monotonic())
+        self._tokens -= weight
+        if self._tokens >= 0:
+            return 0.0
+
+        delay = -self._tokens / self.rate
+        self.throttled_requests += 1
+        self.wait_time += delay
+        return delay
+
+    def delay_for(self, weight: float) -> float:
+        """How long a request of this weight would wait if reserved now."""
+        if not self.enabled:
+            return 0.0
+        self._refill(time.monotonic())
+        return max(0.0, (weight - self._tokens) / self.rate)
+
+    async def acquire(
+        self,
+        weight: float = DEFAULT_REQUEST_WEIGHT,
+        timeout: Optional[float] = None,
+        interrupt: Optional[asyncio.Event] = None
+    ) -> bool:
+        """Wait until the budget allows a request of this weight.
+
+        With a timeout, returns False straight away (reserving nothing) if
+        the wait would be longer; also returns False if `interrupt` is set
+        while waiting.
+        """
+        if timeout is not None and self.delay_for(weight) > timeout:
+            return False
+        delay = self.reserve(weight)
+        if delay <= 0:
+            return True
+        if interrupt is None:
+            await asyncio.sleep(delay)
+            return True
+        try:
+            await asyncio.wait_for(interrupt.wait(), delay)
+            return False
+        except asyncio.TimeoutError:
+            return True
+
+    def charge(self, weight: float):
+        """Debit extra weight without waiting (e.g. per-item response weight)."""
+        if weight <= 0:
+            return
+        self.weight_used += weight
+        if self.enabled:
+            self._refill(time.monotonic())
+            self._tokens -= weight
+
+    def available(self) -> float:
+        """Weight that can be spent right now without waiting."""
+        self._refill(time.monotonic())
+        return self._tokens
+
+    def snapshot(self) -> Dict:
+        """Lifetime counters, used to diff per-cycle budget usage."""
+        return {
+            "weight_used": self.weight_used,
+            "requests": self.requests,
+            "throttled_requests": self.throttled_requests,
+            "wait_time": self.wait_time,
+        }
+
+
+class CycleBudget:
+    """Budget consumed by one check cycle."""
+
+    def __init__(self, limiter: WeightRateLimiter, window: Optional[float] = None):
+        self.limiter = limiter
+        self.window = window
+        self._start = limiter.snapshot()
+        self._started_at = time.monotonic()
+        self.report: Dict = {}
+
+    def finish(self) -> Dict:
+        end = self.limiter.snapshot()
+        elapsed = time.monotonic() - self._started_at
+        weight = end["weight_used"] - self._start["weight_used"]
+        # Budget the cycle was entitled to: the configured interval if known,
+        # otherwise however long it actually took (but at least a second)
+        window = self.window if self.window else max(elapsed, 1.0)
+        budget = self.limiter.rate * window
+        self.report = {
+            "weight_used": weight,
+            "requests": end["requests"] - self._start["requests"],
+            "throttled_requests": end["throttled_requests"] - self._start["throttled_requests"],
+            "throttle_wait": round(end["wait_time"] - self._start["wait_time"], 3),
+            "budget": budget,
+            "utilization": weight / budget if budget else 0.0,
+            "elapsed": round(elapsed, 3),
+        }
+        return self.report
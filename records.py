@@ -0,0 +1,214 @@
+import sys
+import time
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Interned action / order type strings shared by every record
+BUY = sys.intern("BUY")
+SELL = sys.intern("SELL")
+BUY_LIMIT = sys.intern("BUY LIMIT")
+SELL_LIMIT = sys.intern("SELL LIMIT")
+FILLED = sys.intern("FILLED")
+LIMIT_OPEN = sys.intern("LIMIT_OPEN")
+
+_coins: Dict[str, str] = {}
+
+
+def intern_coin(coin: str) -> str:
+    """One shared string object per coin name."""
+    interned = _coins.get(coin)
+    if interned is None:
+        interned = _coins[coin] = sys.intern(str(coin))
+    return interned
+
+
+class Transaction:
+    """One fill or new limit order.
+
+    Slotted and keeps the raw epoch-ms time; the `timestamp` datetime is only
+    built when something asks for it. Supports the read-only dict protocol
+    (tx["coin"], tx.get(...), dict(tx)) so code written against the old
+    per-fill dicts keeps working.
+    """
+
+    __slots__ = (
+        "time_ms", "address", "action", "coin", "quantity", "price",
+        "value_usd", "fee", "tx_hash", "closed_pnl", "order_type", "tid",
+    )
+
+    KEYS = (
+        "timestamp", "address", "action", "coin", "quantity", "price",
+        "value_usd", "fee", "tx_hash", "closed_pnl", "order_type",
+    )
+
+    def __init__(
+        self,
+        time_ms: int,
+        address: str,
+        action: str,
+        coin: str,
+        quantity: float,
+        price: float,
+        fee: float = 0.0,
+        tx_hash: Optional[str] = None,
+        closed_pnl: float = 0.0,
+        order_type: str = FILLED,
+        tid: Optional[int] = None,
+        value_usd: Optional[float] = None
+    ):
+        self.time_ms = time_ms if time_ms else int(time.time() * 1000)
+        self.address = address
+        self.action = action
+        self.coin = intern_coin(coin)
+        self.quantity = quantity
+        self.price = price
+        self.value_usd = quantity * price if value_usd is None else value_usd
+        self.fee = fee
+        self.tx_hash = tx_hash
+        self.closed_pnl = closed_pnl
+        self.order_type = order_type
+        self.tid = tid
+
+    @property
+    def timestamp(self) -> datetime:
+        return datetime.fromtimestamp(self.time_ms / 1000)
+
+    # Read-only mapping protocol
+
+    def __getitem__(self, key: str):
+        if key == "timestamp":
+            return self.timestamp
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def get(self, key: str, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key: str) -> bool:
+        return key == "timestamp" or key in self.__slots__
+
+    def keys(self) -> Tuple[str, ...]:
+        return self.KEYS
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.KEYS)
+
+    def items(self) -> List[Tuple[str, object]]:
+        return [(key, self[key]) for key in self.KEYS]
+
+    def to_dict(self) -> Dict:
+        return dict(self.items())
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Transaction):
+            return NotImplemented
+        return all(getattr(self, slot) == getattr(other, slot) for slot in self.__slots__)
+
+    # Equal records compare by value but are mutable, so they stay unhashable
+    # (dedupe by tid, not by putting records in sets)
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"Transaction({self.order_type} {self.action} {self.quantity} {self.coin} "
+            f"@ {self.price} by {self.address[:10]}... at {self.time_ms})"
+        )
+
+    def __getstate__(self):
+        return tuple(getattr(self, slot) for slot in self.__slots__)
+
+    def __setstate__(self, state):
+        for slot, value in zip(self.__slots__, state):
+            setattr(self, slot, value)
+
+
+class TransactionBatch:
+    """Columnar (struct-of-arrays) form of many transactions.
+
+    Numbers live in typed arrays and strings in lists of shared objects, which
+    is far smaller than a list of records when batches cross the worker queue
+    or go into a DataFrame.
+    """
+
+    NUMERIC = ("quantity", "price", "value_usd", "fee", "closed_pnl")
+    STRINGS = ("address", "action", "coin", "tx_hash", "order_type")
+
+    def __init__(self):
+        self.time_ms = array("q")
+        self.tid = array("q")  # -1 when unknown
+        for column in self.NUMERIC:
+            setattr(self, column, array("d"))
+        for column in self.STRINGS:
+            setattr(self, column, [])
+
+    @classmethod
+    def from_records(cls, records: Iterable) -> "TransactionBatch":
+        if isinstance(records, cls):
+            return records
+        batch = cls()
+        for record in records:
+            batch.append(record)
+        return batch
+
+    def append(self, record):
+        """Add a Transaction (or an old-style dict); a bad record raises and adds nothing."""
+        if isinstance(record, Transaction):
+            time_ms, tid = record.time_ms, record.tid
+        else:
+            time_ms = round(record["timestamp"].timestamp() * 1000)
+            tid = record.get("tid")
+        numbers = [float(record[column] or 0) for column in self.NUMERIC]
+        strings = [record.get(column) for column in self.STRINGS]
+        self.time_ms.append(time_ms)
+        self.tid.append(tid if tid is not None else -1)
+        for column, value in zip(self.NUMERIC, numbers):
+            getattr(self, column).append(value)
+        for column, value in zip(self.STRINGS, strings):
+            getattr(self, column).append(value)
+
+    def __len__(self) -> int:
+        return len(self.time_ms)
+
+    def __iter__(self) -> Iterator[Transaction]:
+        for i in range(len(self)):
+            yield self.record(i)
+
+    def record(self, i: int) -> Transaction:
+        tid = self.tid[i]
+        return Transaction(
+            time_ms=self.time_ms[i],
+            address=self.address[i],
+            action=self.action[i],
+            coin=self.coin[i],
+            quantity=self.quantity[i],
+            price=self.price[i],
+            fee=self.fee[i],
+            tx_hash=self.tx_hash[i],
+            closed_pnl=self.closed_pnl[i],
+            order_type=self.order_type[i] or FILLED,
+            tid=tid if tid >= 0 else None,
+            value_usd=self.value_usd[i]
+        )
+
+    def timestamps(self) -> List[datetime]:
+        return [datetime.fromtimestamp(time_ms / 1000) for time_ms in self.time_ms]
+
+    def tids(self) -> List[Optional[int]]:
+        return [tid if tid >= 0 else None for tid in self.tid]
+
+    def columns(self) -> Dict[str, object]:
+        """Column name -> array/list, e.g. for pandas.DataFrame(batch.columns())."""
+        columns = {"time_ms": self.time_ms, "tid": self.tid}
+        for column in self.NUMERIC + self.STRINGS:
+            columns[column] = getattr(self, column)
+        return columns
+
+    def nbytes(self) -> int:
+        """Approximate memory of the columns (string objects are shared, so counted once)."""
+        return sum(sys.getsizeof(column) for column in self.columns().values())
@@ -0,0 +1,108 @@
+import random
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from scraper import normalize_address
+
+ADDRESS_RE = re.compile(r"^0x[0-9a-f]{40}$")
+
+
+def validate_address(address: str) -> Optional[str]:
+    """Normalized address (as AddressWatcher keys it), or None if it isn't a 20-byte hex address."""
+    address = normalize_address(address.replace(" ", ""))
+    return address if ADDRESS_RE.match(address) else None
+
+
+def split_addresses(text: str) -> List[str]:
+    """Addresses pasted or uploaded one per line or comma-separated."""
+    return [part.strip() for part in re.split(r"[,\n\r]+", text) if part.strip()]
+
+
+class AddressRegistry:
+    """Watchlist index: normalized address -> display name.
+
+    Membership checks are dict lookups and names come off a shuffled free
+    list, so adding n addresses costs O(n) however long the watchlist is.
+    When the name pool runs out, names continue as "Whale <n>".
+    """
+
+    def __init__(self, entries: Dict[str, Optional[str]], name_pool: Sequence[str] = ()):
+        self.names: Dict[str, Optional[str]] = dict(entries)
+        self.used_names = {name for name in self.names.values() if name}
+        self._pool = set(name_pool)
+        self._free = [name for name in name_pool if name not in self.used_names]
+        random.shuffle(self._free)
+        self._next_number = len(self.used_names) + 1
+
+    def __contains__(self, address: str) -> bool:
+        return address in self.names
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def peek_name(self) -> str:
+        """The name allocate_name() would hand out next."""
+        return self._free[-1] if self._free else self._numbered_name(reserve=False)
+
+    def allocate_name(self) -> str:
+        """An unused name, marked as used."""
+        while self._free:
+            name = self._free.pop()
+            if name not in self.used_names:
+                self.used_names.add(name)
+                return name
+        return self._numbered_name(reserve=True)
+
+    def _numbered_name(self, reserve: bool) -> str:
+        number = self._next_number
+        while f"Whale {number}" in self.used_names:
+            number += 1
+        if reserve:
+            self._next_number = number + 1
+            self.used_names.add(f"Whale {number}")
+        return f"Whale {number}"
+
+    def add(self, address: str, name: Optional[str] = None) -> Optional[Tuple[str, str]]:
+        """Register one address; returns (address, name), or None if invalid or already present."""
+        added, _, _ = self.bulk_add([address], [name] if name else None)
+        return added[0] if added else None
+
+    def bulk_add(
+        self,
+        addresses: Iterable[str],
+        names: Optional[Sequence[Optional[str]]] = None
+    ) -> Tuple[List[Tuple[str, str]], int, int]:
+        """Register many addresses at once.
+
+        Returns the (address, name) pairs that were new - ready for one
+        watchlist write - plus the duplicate and invalid counts.
+        """
+        added: List[Tuple[str, str]] = []
+        duplicates = invalid = 0
+        for i, raw in enumerate(addresses):
+            address = validate_address(raw)
+            if address is None:
+                invalid += 1
+                continue
+            if address in self.names:
+                duplicates += 1
+                continue
+            name = names[i] if names is not None and i < len(names) else None
+            if name:
+                self.used_names.add(name)
+            else:
+                name = self.allocate_name()
+            self.names[address] = name
+            added.append((address, name))
+        return added, duplicates, invalid
+
+    def remove(self, address: str):
+        """Forget an address; a name from the pool goes back on the free list."""
+        name = self.names.pop(address, None)
+        if name:
+            self.used_names.discard(name)
+            if name in self._pool:
+                self._free.append(name)
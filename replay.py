@@ -0,0 +1,275 @@
+"""Record raw /info traffic and replay it without the network.
+
+Recording: AsyncHyperliquidScraper(record_path="traffic.ndjson.gz") appends
+every request payload and raw response body, with its timestamp, to a
+gzip-compressed NDJSON log.
+
+Replay: AsyncHyperliquidScraper(replay_path="traffic.ndjson.gz", replay_speed=10)
+answers each request from the log instead of the API, at the recorded pace
+scaled by replay_speed (0 = as fast as possible). Or from the command line:
+
+    python replay.py traffic.ndjson.gz --speed 0 --profile
+    python replay.py traffic.ndjson.gz --speed 60 --db replay.db
+"""
+import argparse
+import asyncio
+import cProfile
+import gzip
+import json
+import logging
+import pstats
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+import aiohttp
+from multidict import CIMultiDict, CIMultiDictProxy
+from yarl import URL
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def request_key(payload: Dict) -> Tuple[str, str]:
+    """Responses are matched to requests by (request type, user), in recorded order."""
+    return str(payload.get("type", "")), str(payload.get("user", "")).lower()
+
+
+def read_log(path: str) -> Iterator[Dict]:
+    """Entries of a traffic log, oldest first (multi-member gzip from appends is fine)."""
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # A crash mid-write can leave a torn last line
+                logger.warning(f"Skipping unreadable line in {path}")
+
+
+class TrafficRecorder:
+    """Append-only, gzip-compressed request/response log.
+
+    record() only queues the entry; a background thread serialises,
+    compresses and writes it, so recording adds almost nothing to the
+    event loop. Each run appends a new gzip member to the same file.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.records = 0
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="traffic-recorder", daemon=True)
+        self._thread.start()
+
+    def record(self, payload: Dict, status: int, body: bytes, retry_after: Optional[str] = None):
+        self.records += 1
+        self._queue.put((time.time(), payload, status, body, retry_after))
+
+    def close(self, timeout: float = 10.0):
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        with gzip.open(self.path, "ab") as f:
+            last_flush = time.monotonic()
+            while True:
+                try:
+                    item = self._queue.get(timeout=self.flush_interval)
+                except queue.Empty:
+                    item = None
+                if item is _STOP:
+                    return
+                if item is not None:
+                    recorded_at, payload, status, body, retry_after = item
+                    entry = {
+                        "t": recorded_at,
+                        "request": payload,
+                        "status": status,
+                        "body": body.decode("utf-8", errors="replace"),
+                    }
+                    if retry_after is not None:
+                        entry["retry_after"] = retry_after
+                    f.write(json.dumps(entry, separators=(",", ":")).encode() + b"\n")
+                if time.monotonic() - last_flush >= self.flush_interval:
+                    # Complete the deflate block so a crash loses at most this interval
+                    f.flush()
+                    last_flush = time.monotonic()
+
+
+class ReplayResponse:
+    """The parts of aiohttp.ClientResponse the scraper uses."""
+
+    def __init__(self, url: str, status: int, body: bytes, retry_after: Optional[str] = None):
+        self.url = URL(url)
+        self.status = status
+        self._body = body
+        headers = CIMultiDict()
+        if retry_after is not None:
+            headers["Retry-After"] = retry_after
+        self.headers = CIMultiDictProxy(headers)
+
+    async def read(self) -> bytes:
+        return self._body
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            request_info = aiohttp.RequestInfo(self.url, "POST", CIMultiDictProxy(CIMultiDict()), self.url)
+            raise aiohttp.ClientResponseError(request_info, (), status=self.status, message="replayed error")
+
+    async def __aenter__(self) -> "ReplayResponse":
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class ReplaySession:
+    """Stands in for the scraper's aiohttp session, answering from a traffic log.
+
+    Each (request type, user) gets its recorded responses in order. A
+    response is held back until its recorded time, measured from the first
+    entry and divided by speed; speed=0 never waits. Once a key's responses
+    run out it is answered with an empty list.
+    """
+
+    def __init__(self, path: str, speed: float = 1.0):
+        self.path = path
+        self.speed = speed
+        self._responses: Dict[Tuple[str, str], Deque[Dict]] = defaultdict(deque)
+        self.first_time: Optional[float] = None
+        self.last_time: Optional[float] = None
+        self.total = 0
+        for entry in read_log(path):
+            self._responses[request_key(entry.get("request", {}))].append(entry)
+            if self.first_time is None:
+                self.first_time = entry["t"]
+            self.last_time = entry["t"]
+            self.total += 1
+        self.served = 0
+        self.misses = 0
+        self._started: Optional[float] = None
+        self.closed = False
+
+    def users(self) -> List[str]:
+        """Every user the log has traffic for, in first-seen order."""
+        return list(dict.fromkeys(user for _, user in self._responses if user))
+
+    @property
+    def exhausted(self) -> bool:
+        return self.served >= self.total
+
+    @property
+    def recorded_duration(self) -> float:
+        if self.first_time is None:
+            return 0.0
+        return self.last_time - self.first_time
+
+    def post(self, url: str, json: Optional[Dict] = None, **kwargs) -> "_PendingResponse":
+        return _PendingResponse(self, url, json or {})
+
+    async def _respond(self, url: str, payload: Dict) -> ReplayResponse:
+        responses = self._responses.get(request_key(payload))
+        if not responses:
+            self.misses += 1
+            return ReplayResponse(url, 200, b"[]")
+        entry = responses.popleft()
+        if self.speed > 0:
+            now = time.monotonic()
+            if self._started is None:
+                self._started = now
+            due = self._started + (entry["t"] - self.first_time) / self.speed
+            if due > now:
+                await asyncio.sleep(due - now)
+        self.served += 1
+        return ReplayResponse(url, entry.get("status", 200), entry.get("body", "").encode(), entry.get("retry_after"))
+
+    async def close(self):
+        self.closed = True
+
+
+class _PendingResponse:
+    """`async with session.post(...)` support for ReplaySession."""
+
+    def __init__(self, session: ReplaySession, url: str, payload: Dict):
+        self._session = session
+        self._url = url
+        self._payload = payload
+
+    async def __aenter__(self) -> ReplayResponse:
+        return await self._session._respond(self._url, self._payload)
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+async def _replay(args) -> Dict:
+    from scraper import AsyncHyperliquidScraper
+
+    scraper = AsyncHyperliquidScraper(
+        db_path=args.db or "replay.db",
+        persist=bool(args.db),
+        warm_start=False,
+        weight_per_minute=0,
+        cycle_timeout=None,
+        incremental_fills=args.incremental,
+        replay_path=args.log,
+        replay_speed=args.speed
+    )
+    replay = scraper.replay_session
+    for user in replay.users():
+        scraper.add_address(user)
+    print(
+        f"Replaying {replay.total} responses for {len(scraper.watchers)} users "
+        f"({replay.recorded_duration:.0f}s recorded) at "
+        f"{'max speed' if args.speed <= 0 else f'{args.speed:g}x'}",
+        flush=True
+    )
+
+    profiler = cProfile.Profile() if args.profile else None
+    transactions = 0
+    cycles = 0
+    started = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    while not replay.exhausted:
+        served = replay.served
+        transactions += len(await scraper.check_all_addresses())
+        cycles += 1
+        if replay.served == served:
+            break  # nothing left that these watchers ask for
+    if profiler is not None:
+        profiler.disable()
+    elapsed = time.perf_counter() - started
+    await scraper.close()
+    if scraper.writer is not None:
+        scraper.writer.stop()
+
+    print(
+        f"{cycles} cycles, {replay.served} responses, {transactions} transactions "
+        f"in {elapsed:.2f}s ({replay.misses} requests had no recorded response)"
+    )
+    if profiler is not None:
+        stats = pstats.Stats(profiler).sort_stats(args.sort)
+        stats.print_stats(args.profile_lines)
+    return {"cycles": cycles, "responses": replay.served, "transactions": transactions, "elapsed": elapsed}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded Hyperliquid /info traffic through the scraper")
+    parser.add_argument("log", help="traffic log written with record_path=...")
+    parser.add_argument("--speed", type=float, default=0.0, help="1 = recorded pace, 10 = 10x faster, 0 = no waiting")
+    parser.add_argument("--db", help="write replayed transactions to this SQLite store")
+    parser.add_argument("--incremental", action="store_true", help="replay a log recorded with incremental_fills")
+    parser.add_argument("--profile", action="store_true", help="profile the replay with cProfile")
+    parser.add_argument("--profile-lines", type=int, default=30)
+    parser.add_argument("--sort", default="tottime", help="pstats sort key, e.g. tottime or cumulative")
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(message)s')
+    asyncio.run(_replay(parser.parse_args()))
@@ -0,0 +1,103 @@
+"""Backfill and inspect the store's flow rollups.
+
+The writer keeps flow_rollups current as fills are inserted (see
+store.update_rollups). Fills stored before the table existed, including
+archived ones, are added by a backfill, which rebuilds every bucket:
+
+    python rollups.py backfill --db hyperliquid.db
+    python rollups.py show --coin ETH --resolution 1h --since 2025-01-01
+
+A collector can keep writing during a backfill: rows written after it
+starts are counted by the writer. Don't run it alongside a compaction.
+"""
+import argparse
+import logging
+import os
+import time
+from datetime import datetime
+from itertools import islice
+from typing import Optional
+
+from archive import archived_rows, default_archive_dir, pq
+from store import ROLLUP_RESOLUTIONS, TAIL_COLUMNS, connect, init_db, query_rollups, update_rollups
+
+logger = logging.getLogger(__name__)
+
+
+def backfill(db_path: str, archive_dir: Optional[str] = None, chunk_rows: int = 100_000) -> int:
+    """Rebuild flow_rollups from every stored fill; returns the rows read."""
+    started = time.perf_counter()
+    init_db(db_path)
+    conn = connect(db_path)
+    try:
+        # Rows up to `upto` are ours; the writer counts anything newer. The
+        # sequence, not MAX(id): the newest rows may already be archived.
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            upto = conn.execute(
+                "SELECT COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'transactions'), "
+                "(SELECT MAX(id) FROM transactions), 0)"
+            ).fetchone()[0]
+            conn.execute("DELETE FROM flow_rollups")
+        total = 0
+
+        archive_dir = archive_dir or default_archive_dir(db_path)
+        if pq is not None and os.path.isdir(archive_dir):
+            # Archived rows go through a temp table so the same SQL rolls them up
+            conn.execute(f"CREATE TEMP TABLE rollup_source AS SELECT {TAIL_COLUMNS} FROM transactions WHERE 0")
+            rows = archived_rows(db_path, archive_dir)
+            placeholders = ", ".join("?" * len(TAIL_COLUMNS.split(",")))
+            while True:
+                chunk = list(islice(rows, chunk_rows))
+                if not chunk:
+                    break
+                with conn:
+                    conn.executemany(f"INSERT INTO temp.rollup_source VALUES ({placeholders})", chunk)
+                    update_rollups(conn, -1, upto, source="temp.rollup_source")
+                    conn.execute("DELETE FROM temp.rollup_source")
+                total += len(chunk)
+
+        first = conn.execute("SELECT MIN(id) FROM transactions").fetchone()[0]
+        if first is not None:
+            for after_id in range(first - 1, upto, chunk_rows):
+                with conn:
+                    update_rollups(conn, after_id, min(after_id + chunk_rows, upto))
+            total += conn.execute("SELECT COUNT(*) FROM transactions WHERE id <= ?", (upto,)).fetchone()[0]
+        buckets = conn.execute("SELECT COUNT(*) FROM flow_rollups").fetchone()[0]
+    finally:
+        conn.close()
+    logger.info(f"📊 Rolled up {total:,} rows into {buckets:,} buckets in {time.perf_counter() - started:.1f}s")
+    return total
+
+
+def _iso(value: Optional[str]) -> Optional[str]:
+    return datetime.fromisoformat(value).isoformat() if value else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Flow rollups")
+    parser.add_argument("command", choices=["backfill", "show"])
+    parser.add_argument("--db", default="hyperliquid.db")
+    parser.add_argument("--archive-dir", help="default: <db name>-archive/ next to the database")
+    parser.add_argument("--resolution", choices=list(ROLLUP_RESOLUTIONS), default="1h")
+    parser.add_argument("--coin")
+    parser.add_argument("--address")
+    parser.add_argument("--since", help="ISO date or time (inclusive)")
+    parser.add_argument("--until", help="ISO date or time (exclusive)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(message)s')
+
+    if args.command == "backfill":
+        backfill(args.db, args.archive_dir)
+    else:
+        buckets = query_rollups(
+            args.db, args.resolution, args.coin, args.address.lower() if args.address else None,
+            _iso(args.since), _iso(args.until)
+        )
+        print(f"{'bucket':<17} {'fills':>8} {'volume':>16} {'net':>16} {'vwap':>12} {'pnl':>12}")
+        for bucket in buckets:
+            vwap = f"{bucket['vwap']:,.4f}" if bucket["vwap"] else "-"
+            print(
+                f"{bucket['bucket']:<17} {bucket['fills']:>8,} {bucket['volume']:>16,.2f} "
+                f"{bucket['net_notional']:>16,.2f} {vwap:>12} {bucket['realized_pnl']:>12,.2f}"
+            )
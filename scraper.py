@@ -1,105 +1,309 @@
 import asyncio
 import aiohttp
 import logging
-from datetime import datetime
-from typing import List, Dict, Set, Optional
-import sqlite3
-from asyncio import sleep
+from typing import Callable, Iterable, List, Dict, Set, Optional, Tuple
+import time
+from contextvars import ContextVar
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+from breaker import HALF_OPEN, CircuitBreaker, backoff_delay, parse_retry_after
+from cadence import SHED, AdaptiveCadence, FixedRateTicker
+from decoding import ACCEPT_ENCODING, count_fills, decode_fills, loads
+from dedupe import RecentIdWindow, id_key
+from records import BUY, BUY_LIMIT, FILLED, LIMIT_OPEN, SELL, SELL_LIMIT, Transaction
+from logpipe import BraceMessage, configure_logging
+import metrics
+from replay import ReplaySession, TrafficRecorder
+from ratelimit import CycleBudget, WeightRateLimiter, request_weight, response_weight
+from store import StateUpdate, TransactionWriter, WatcherState, init_db, load_state
+from stream import WS_URL, HyperliquidStream
+
+# Configure logging (queued; records are formatted and written off the event loop)
+configure_logging()
 logger = logging.getLogger(__name__)
+# Per-fill and per-order lines; sampled above HL_LOG_FILL_RATE messages/s
+fill_logger = logging.getLogger(f"{__name__}.fills")
+order_logger = logging.getLogger(f"{__name__}.orders")
+
+# Monotonic deadline of the check cycle the current task belongs to (None outside a cycle)
+_cycle_deadline: ContextVar[Optional[float]] = ContextVar("cycle_deadline", default=None)
+
+# userFills / userFillsByTime return at most this many fills per response
+FILLS_PAGE_LIMIT = 2000
+
+
+def _error_type(error: Exception) -> str:
+    """Metric label for a failed request."""
+    if isinstance(error, asyncio.TimeoutError):
+        return "timeout"
+    if isinstance(error, aiohttp.ClientResponseError):
+        return "http_5xx" if error.status >= 500 else "http_4xx"
+    return "connection"
+
+
+def normalize_address(address: str) -> str:
+    """Lowercase an address and add the 0x prefix if it was left off."""
+    address = address.strip().lower()
+    if not address.startswith('0x') and len(address) == 40:
+        address = '0x' + address
+    return address
 
 
 class AddressWatcher:
     """Individual watcher for a single address - tracks BOTH fills and open orders."""
     
     def __init__(self, address: str, scraper: 'AsyncHyperliquidScraper'):
-        self.address = address.strip().lower()
-        if not self.address.startswith('0x') and len(self.address) == 40:
-            self.address = '0x' + self.address
+        self.address = normalize_address(address)
         self.scraper = scraper
-        self.seen_transaction_ids: Set[str] = set()
-        self.seen_open_order_ids: Set[str] = set()  # Track open orders separately
+        # Bounded dedupe state keyed by integer tid / oid
+        self.seen_transaction_ids = RecentIdWindow(scraper.dedupe_max_ids, scraper.dedupe_window_ms)
+        self.seen_open_order_ids = RecentIdWindow(scraper.dedupe_max_ids, scraper.dedupe_window_ms)  # Track open orders separately
         self.previously_open_orders: Set[str] = set()  # Track what was open before
+        # High-water mark of fills seen so far (drives incremental fetching)
+        self.last_fill_time_ms: Optional[int] = None
+        self.last_fill_tid: Optional[int] = None
+        self.fill_gaps = 0
+        self.last_check_active = False  # Whether the last check saw any activity
+        self.last_check_failed = False  # Whether a fetch in the last check failed
+        self.last_open_orders: Optional[int] = None  # Open orders seen by the last check (None = not fetched)
+        self.last_checked_at = 0.0  # monotonic time of the last check (for shedding)
+        self.state_dirty = False  # High-water mark or open orders changed since last persisted
+    
+    def restore(self, state: WatcherState):
+        """Resume from persisted state so old fills and open orders aren't reported again."""
+        if state.last_fill_tid is not None:
+            self.last_fill_tid = state.last_fill_tid
+            self.last_fill_time_ms = state.last_fill_time_ms
+            self.seen_transaction_ids.restore(state.last_fill_tid, state.last_fill_time_ms)
+        for oid in state.open_orders:
+            self.seen_open_order_ids.add(id_key(oid))
+        self.previously_open_orders = set(state.open_orders)
+    
+    def export_state(self) -> WatcherState:
+        """The state restore() takes, e.g. to move this address to another process."""
+        state = WatcherState()
+        state.last_fill_tid = self.last_fill_tid
+        state.last_fill_time_ms = self.last_fill_time_ms
+        state.open_orders = sorted(self.previously_open_orders)
+        return state
         
     async def _make_request_with_retry(
         self, 
         session: aiohttp.ClientSession, 
         payload: Dict,
-        max_retries: int = 3
+        max_retries: int = 3,
+        fills_since: Optional[int] = None
     ) -> Optional[List[Dict]]:
-        """Make POST request with exponential backoff retry logic."""
-        last_error = None
+        """Make POST request with jittered exponential backoff, behind the shared circuit breaker.
+        
+        With fills_since set the response is treated as a fills payload: fills
+        older than that time, or already in the dedupe window, are dropped
+        during decoding. Requests made inside
+        a check cycle also stop retrying once the cycle's deadline has passed.
+        Returns None if the request failed, so callers can tell a failure
+        from an empty answer.
+        """
+        scraper = self.scraper
+        request_type = payload.get("type", "")
+        limiter = scraper.rate_limiter
+        breaker = scraper.breaker
+        deadline = _cycle_deadline.get()
+        errors = metrics.REQUEST_ERRORS
         
         for attempt in range(max_retries):
+            if scraper.stopping:
+                return None
+            if not breaker.allow():
+                # Circuit open: fail fast instead of adding to the outage
+                errors.inc(1, request_type, "breaker_open")
+                logger.debug(f"[{self.address[:10]}...] Circuit {breaker.state}, skipping {request_type}")
+                return None
+            # This request is the half-open probe; exits that never send it hand it back
+            probing = breaker.state == HALF_OPEN
+            
+            # Every attempt (including retries) spends request weight; don't
+            # queue for weight the cycle's deadline won't leave time to use
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            acquired = (remaining is None or remaining > 0) and await limiter.acquire(
+                request_weight(request_type), timeout=remaining, interrupt=scraper._stop_event
+            )
+            if probing and (scraper.stopping or not acquired):
+                breaker.release_probe()
+            if scraper.stopping:
+                return None
+            if not acquired:
+                scraper._request_stats["deadline_exceeded"] += 1
+                errors.inc(1, request_type, "deadline")
+                return None
+            timeout = scraper.request_timeout
+            if deadline is not None:
+                timeout = max(0.001, min(timeout, deadline - time.monotonic()))
+            
             try:
+                started = time.monotonic()
                 async with session.post(
-                    self.scraper.base_url,
+                    scraper.base_url,
                     json=payload,
-                    timeout=aiohttp.ClientTimeout(total=10)
+                    timeout=aiohttp.ClientTimeout(total=timeout)
                 ) as response:
+                    if scraper.recorder is not None and response.status != 200:
+                        scraper.recorder.record(payload, response.status, b"", response.headers.get("Retry-After"))
+                    if response.status == 429:
+                        # Throttled - pause every watcher for as long as the server asks
+                        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                        breaker.record_throttled(retry_after)
+                        errors.inc(1, request_type, "http_429")
+                        logger.warning(
+                            f"[{self.address[:10]}...] Rate limited (429); pausing requests for "
+                            f"{breaker.retry_in():.1f}s"
+                        )
+                        return None
+                    
+                    if response.status >= 500:
+                        response.raise_for_status()
+                    
+                    # The endpoint answered; anything below is not an outage
+                    breaker.record_success()
                     if response.status == 422:
                         # Unprocessable entity - don't retry
-                        return []
+                        errors.inc(1, request_type, "http_422")
+                        return None
+                    if response.status >= 400:
+                        errors.inc(1, request_type, "http_4xx")
+                        logger.error(f"[{self.address[:10]}...] {request_type} rejected: HTTP {response.status}")
+                        return None
                     
-                    response.raise_for_status()
-                    return await response.json()
+                    raw = await response.read()
+                    metrics.REQUEST_SECONDS.observe(time.monotonic() - started, request_type)
+                    if scraper.recorder is not None:
+                        scraper.recorder.record(payload, response.status, raw)
+                    if fills_since is not None:
+                        limiter.charge(response_weight(request_type, count_fills(raw)))
+                        return decode_fills(raw, fills_since, self.seen_transaction_ids.seen)
+                    result = loads(raw)
+                    if isinstance(result, list):
+                        limiter.charge(response_weight(request_type, len(result)))
+                    return result
                     
             except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-                last_error = e
+                breaker.record_failure()
+                errors.inc(1, request_type, _error_type(e))
                 if attempt < max_retries - 1:
-                    # Exponential backoff: 1s, 2s, 4s
-                    wait_time = 2 ** attempt
+                    wait_time = backoff_delay(attempt, scraper.backoff_base, scraper.backoff_cap)
+                    if deadline is not None and time.monotonic() + wait_time >= deadline:
+                        scraper._request_stats["deadline_exceeded"] += 1
+                        errors.inc(1, request_type, "deadline")
+                        logger.warning(
+                            f"[{self.address[:10]}...] Request failed and the cycle deadline leaves "
+                            f"no time to retry. Error: {e}"
+                        )
+                        return None
+                    scraper._request_stats["retries"] += 1
+                    metrics.REQUEST_RETRIES.inc(1, request_type)
                     logger.warning(
                         f"[{self.address[:10]}...] Request failed (attempt {attempt + 1}/{max_retries}). "
-                        f"Retrying in {wait_time}s... Error: {e}"
+                        f"Retrying in {wait_time:.2f}s... Error: {e}"
                     )
-                    await sleep(wait_time)
+                    await scraper._sleep(wait_time)
                 else:
                     logger.error(
                         f"[{self.address[:10]}...] All {max_retries} attempts failed. Last error: {e}"
                     )
             except Exception as e:
                 # Unexpected error - don't retry
+                if probing:
+                    breaker.release_probe()
+                errors.inc(1, request_type, "unexpected")
                 logger.error(f"[{self.address[:10]}...] Unexpected error: {e}")
-                return []
+                return None
         
-        return []
+        return None
     
-    async def fetch_fills(self, session: aiohttp.ClientSession) -> List[Dict]:
-        """Fetch filled orders for this address with retry logic."""
+    async def fetch_fills(self, session: aiohttp.ClientSession) -> Optional[List[Dict]]:
+        """Fetch filled orders for this address with retry logic (None if the fetch failed)."""
         if not self.address.startswith('0x'):
             logger.error(f"Invalid address format: {self.address}")
-            return []
+            return None
+        
+        # After the first snapshot, only ask for fills since the high-water mark
+        if self.scraper.incremental_fills and self.last_fill_time_ms is not None:
+            return await self.fetch_fills_since(session, self.last_fill_time_ms)
         
         payload = {
             "type": "userFills",
             "user": self.address
         }
         
-        result = await self._make_request_with_retry(session, payload)
-        return result if result is not None else []
+        # Fills before the high-water mark are already processed - skip them while decoding
+        return await self._make_request_with_retry(session, payload, fills_since=self.last_fill_time_ms)
+    
+    async def fetch_fills_since(self, session: aiohttp.ClientSession, start_time_ms: int) -> Optional[List[Dict]]:
+        """Fetch fills at or after start_time_ms via userFillsByTime, paginating full pages.
+
+        None if the first page failed; a later failure returns the pages so far.
+        """
+        fills: List[Dict] = []
+        start = start_time_ms
+        max_pages = max(1, self.scraper.max_fill_pages)
+        
+        for page_num in range(max_pages):
+            payload = {
+                "type": "userFillsByTime",
+                "user": self.address,
+                "startTime": start
+            }
+            page = await self._make_request_with_retry(session, payload)
+            if page is None and page_num == 0:
+                return None
+            if not isinstance(page, list) or not page:
+                break
+            
+            page_times = [int(fill.get('time', 0)) for fill in page]
+            # startTime is inclusive, so the first page should still contain our
+            # last seen fill; if it starts later, older fills have aged out of the API
+            if page_num == 0 and start == self.last_fill_time_ms and min(page_times) > start:
+                self.fill_gaps += 1
+                logger.warning(
+                    f"[{self.address[:8]}...{self.address[-6:]}] Fill gap detected: last seen fill at "
+                    f"{start} (tid {self.last_fill_tid}), earliest available is {min(page_times)} - "
+                    f"fills in between may be missing"
+                )
+            
+            fills.extend(page)
+            if len(page) < FILLS_PAGE_LIMIT:
+                break
+            
+            next_start = max(page_times)
+            if next_start <= start:
+                # A full page inside one millisecond - can't page any further by time
+                logger.warning(
+                    f"[{self.address[:8]}...{self.address[-6:]}] {len(page)} fills share timestamp "
+                    f"{start}; some may be skipped"
+                )
+                break
+            start = next_start
+        else:
+            # Still full after max_fill_pages - the rest is picked up next cycle
+            logger.info(
+                f"[{self.address[:8]}...{self.address[-6:]}] Fill backlog exceeds {max_pages} pages, "
+                f"resuming from {start} next cycle"
+            )
+        
+        return fills
     
-    async def fetch_open_orders(self, session: aiohttp.ClientSession) -> List[Dict]:
-        """Fetch open orders for this address with retry logic."""
+    async def fetch_open_orders(self, session: aiohttp.ClientSession) -> Optional[List[Dict]]:
+        """Fetch open orders for this address with retry logic (None if the fetch failed)."""
         if not self.address.startswith('0x'):
             logger.error(f"Invalid address format: {self.address}")
-            return []
+            return None
         
         payload = {
             "type": "openOrders",
             "user": self.address
         }
         
-        result = await self._make_request_with_retry(session, payload)
-        return result if result is not None else []
+        return await self._make_request_with_retry(session, payload)
     
-    def process_fills(self, fills: List[Dict]) -> List[Dict]:
+    def process_fills(self, fills: List[Dict]) -> List[Transaction]:
         """Process fills - return INDIVIDUAL transactions, no aggregation."""
         transactions = []
         
@@ -121,56 +325,52 @@ class AddressWatcher:
                 else:
                     tx_hash = None
                 
-                fill_id = f"{self.address}_{tx_id}"
+                timestamp_ms = int(fill.get('time', 0))
+                self._advance_fill_mark(fill)
                 
                 # Skip if seen
-                if fill_id in self.seen_transaction_ids:
+                if not self.seen_transaction_ids.add(id_key(tx_id), timestamp_ms):
                     continue
                 
-                self.seen_transaction_ids.add(fill_id)
-                
                 # Extract details
                 coin = fill.get('coin', 'UNKNOWN')
                 side = fill.get('side', '').upper()
                 size = float(fill.get('sz', 0))
                 price = float(fill.get('px', 0))
-                timestamp_ms = int(fill.get('time', 0))
-                timestamp = datetime.fromtimestamp(timestamp_ms / 1000) if timestamp_ms else datetime.now()
                 fee = float(fill.get('fee', 0))
                 
                 # Determine action
-                action = "BUY" if side == 'B' else "SELL"
+                action = BUY if side == 'B' else SELL
                 
-                # Create transaction record
-                tx = {
-                    "timestamp": timestamp,
-                    "address": self.address,
-                    "action": action,
-                    "coin": coin,
-                    "quantity": size,
-                    "price": price,
-                    "value_usd": size * price,
-                    "fee": fee,
-                    "tx_hash": tx_hash,  # Always use actual hash for explorer links
-                    "closed_pnl": float(fill.get('closedPnl', 0)),
-                    "order_type": "FILLED"
-                }
+                # Create transaction record (datetime is built lazily from time_ms)
+                tx = Transaction(
+                    time_ms=timestamp_ms,
+                    address=self.address,
+                    action=action,
+                    coin=coin,
+                    quantity=size,
+                    price=price,
+                    fee=fee,
+                    tx_hash=tx_hash,  # Always use actual hash for explorer links
+                    closed_pnl=float(fill.get('closedPnl', 0)),
+                    order_type=FILLED,
+                    tid=id_key(tx_id)
+                )
                 
                 transactions.append(tx)
                 
-                # Log individual transaction
-                if tx_hash:
-                    hash_display = tx_hash[:10]
-                    logger.info(
-                        f"[{self.address[:8]}...{self.address[-6:]}] "
-                        f"{action} {size:,.2f} {coin} @ ${price:,.4f} "
-                        f"(${size * price:,.2f}) | Hash: {hash_display}..."
-                    )
-                else:
-                    logger.info(
-                        f"[{self.address[:8]}...{self.address[-6:]}] "
-                        f"{action} {size:,.2f} {coin} @ ${price:,.4f} "
-                        f"(${size * price:,.2f}) | TID: {tx_id}"
+                # Log individual transaction (formatted later, on the log thread)
+                if fill_logger.isEnabledFor(logging.INFO):
+                    fill_logger.info(
+                        BraceMessage(
+                            "[{}...{}] {} {:,.2f} {} @ ${:,.4f} (${:,.2f}) | {}",
+                            self.address[:8], self.address[-6:], action, size, coin, price,
+                            size * price, f"Hash: {tx_hash[:10]}..." if tx_hash else f"TID: {tx_id}"
+                        ),
+                        extra={"fields": {
+                            "event": "fill", "address": self.address, "action": action,
+                            "coin": coin, "size": size, "price": price, "tx_hash": tx_hash, "tid": tx_id
+                        }}
                     )
             except Exception as e:
                 logger.error(f"Error processing fill: {e} | Fill: {fill}")
@@ -178,7 +378,18 @@ class AddressWatcher:
         
         return transactions
     
-    def process_open_orders(self, orders: List[Dict]) -> List[Dict]:
+    def _advance_fill_mark(self, fill: Dict):
+        """Move the fill high-water mark forward past this fill."""
+        fill_time = int(fill.get('time', 0))
+        if self.last_fill_time_ms is None or fill_time > self.last_fill_time_ms:
+            self.last_fill_time_ms = fill_time
+            self.state_dirty = True
+        tid = fill.get('tid')
+        if tid is not None and (self.last_fill_tid is None or int(tid) > self.last_fill_tid):
+            self.last_fill_tid = int(tid)
+            self.state_dirty = True
+    
+    def process_open_orders(self, orders: List[Dict]) -> List[Transaction]:
         """Process open orders - alert on NEW limit orders."""
         new_orders = []
         
@@ -197,72 +408,127 @@ class AddressWatcher:
                 current_open_order_ids.add(order_id)
                 
                 # Only alert on NEW orders (not previously seen)
-                if order_id not in self.seen_open_order_ids:
-                    self.seen_open_order_ids.add(order_id)
-                    
-                    # Extract order details
-                    coin = order.get('coin', 'UNKNOWN')
-                    side = order.get('side', '').upper()
-                    size = float(order.get('sz', 0))
-                    limit_px = float(order.get('limitPx', 0))
-                    timestamp_ms = int(order.get('timestamp', 0))
-                    timestamp = datetime.fromtimestamp(timestamp_ms / 1000) if timestamp_ms else datetime.now()
-                    
-                    action = "BUY" if side == 'B' else "SELL"
-                    value_usd = size * limit_px
-                    
-                    # Create order record (no tx_hash for open orders, they haven't executed yet)
-                    order_record = {
-                        "timestamp": timestamp,
-                        "address": self.address,
-                        "action": f"{action} LIMIT",  # Mark as limit order
-                        "coin": coin,
-                        "quantity": size,
-                        "price": limit_px,
-                        "value_usd": value_usd,
-                        "fee": 0,  # No fee for open orders yet
-                        "tx_hash": None,  # No hash yet - order hasn't executed
-                        "closed_pnl": 0,
-                        "order_type": "LIMIT_OPEN"
-                    }
-                    
-                    new_orders.append(order_record)
-                    
-                    # Log new limit order
-                    logger.info(
-                        f"[{self.address[:8]}...{self.address[-6:]}] "
-                        f"🎯 NEW LIMIT ORDER: {action} {size:,.2f} {coin} @ ${limit_px:,.4f} "
-                        f"(${value_usd:,.2f}) | OID: {order_id[:10]}..."
-                    )
+                if self.seen_open_order_ids.add(id_key(order_id), int(order.get('timestamp', 0))):
+                    new_orders.append(self._build_order_record(order, order_id))
             except Exception as e:
                 logger.error(f"Error processing open order: {e} | Order: {order}")
                 continue
         
         # Detect cancelled/filled orders (were open, now closed)
-        closed_orders = self.previously_open_orders - current_open_order_ids
-        if closed_orders:
-            for oid in closed_orders:
-                logger.info(
-                    f"[{self.address[:8]}...{self.address[-6:]}] "
-                    f"📝 Limit order closed/filled: {oid[:10]}..."
-                )
+        self._log_closed_orders(self.previously_open_orders - current_open_order_ids)
         
         # Update previously open orders
+        if current_open_order_ids != self.previously_open_orders:
+            self.state_dirty = True
         self.previously_open_orders = current_open_order_ids
         
         return new_orders
     
-    async def check(self, session: aiohttp.ClientSession) -> List[Dict]:
-        """Check for both new fills AND open orders."""
-        # Fetch both concurrently
-        fills_task = self.fetch_fills(session)
-        orders_task = self.fetch_open_orders(session)
+    def process_order_updates(self, updates: List[Dict]) -> List[Transaction]:
+        """Process streamed order updates - same alerts as process_open_orders, but incremental."""
+        new_orders = []
+        closed_orders = set()
+        
+        for update in updates:
+            try:
+                order = update.get('order', {})
+                order_id = str(order.get('oid', ''))
+                if not order_id:
+                    continue
+                
+                if update.get('status') == 'open':
+                    if order_id not in self.previously_open_orders:
+                        self.state_dirty = True
+                    self.previously_open_orders.add(order_id)
+                    if self.seen_open_order_ids.add(id_key(order_id), int(order.get('timestamp', 0))):
+                        new_orders.append(self._build_order_record(order, order_id))
+                elif order_id in self.previously_open_orders:
+                    # filled, canceled, rejected, ...
+                    self.previously_open_orders.discard(order_id)
+                    closed_orders.add(order_id)
+                    self.state_dirty = True
+            except Exception as e:
+                logger.error(f"Error processing order update: {e} | Update: {update}")
+                continue
+        
+        self._log_closed_orders(closed_orders)
+        return new_orders
+    
+    def _build_order_record(self, order: Dict, order_id: str) -> Transaction:
+        """Build (and log) the alert record for a newly seen limit order."""
+        coin = order.get('coin', 'UNKNOWN')
+        side = order.get('side', '').upper()
+        size = float(order.get('sz', 0))
+        limit_px = float(order.get('limitPx', 0))
+        timestamp_ms = int(order.get('timestamp', 0))
+        
+        action = "BUY" if side == 'B' else "SELL"
+        value_usd = size * limit_px
         
-        fills, orders = await asyncio.gather(fills_task, orders_task)
+        # Create order record (no tx_hash for open orders, they haven't executed yet)
+        order_record = Transaction(
+            time_ms=timestamp_ms,
+            address=self.address,
+            action=BUY_LIMIT if side == 'B' else SELL_LIMIT,  # Mark as limit order
+            coin=coin,
+            quantity=size,
+            price=limit_px,
+            value_usd=value_usd,
+            fee=0.0,  # No fee for open orders yet
+            tx_hash=None,  # No hash yet - order hasn't executed
+            closed_pnl=0.0,
+            order_type=LIMIT_OPEN,
+            tid=id_key(order_id)
+        )
         
-        # Process both
-        filled_txs = self.process_fills(fills)
-        open_order_alerts = self.process_open_orders(orders)
+        # Log new limit order
+        if order_logger.isEnabledFor(logging.INFO):
+            order_logger.info(
+                BraceMessage(
+                    "[{}...{}] 🎯 NEW LIMIT ORDER: {} {:,.2f} {} @ ${:,.4f} (${:,.2f}) | OID: {}...",
+                    self.address[:8], self.address[-6:], action, size, coin, limit_px,
+                    value_usd, order_id[:10]
+                ),
+                extra={"fields": {
+                    "event": "order_open", "address": self.address, "action": action,
+                    "coin": coin, "size": size, "price": limit_px, "oid": order_id
+                }}
+            )
+        return order_record
+    
+    def _log_closed_orders(self, closed_orders: Set[str]):
+        """Log limit orders that are no longer open (cancelled or filled)."""
+        for oid in closed_orders:
+            order_logger.info(
+                "[%s...%s] 📝 Limit order closed/filled: %s...",
+                self.address[:8], self.address[-6:], oid[:10],
+                extra={"fields": {"event": "order_closed", "address": self.address, "oid": oid}}
+            )
+    
+    async def check(self, session: aiohttp.ClientSession, include_orders: bool = True) -> List[Dict]:
+        """Check for both new fills AND open orders (orders can be skipped for idle wallets)."""
+        previously_open = self.previously_open_orders
+        self.last_checked_at = time.monotonic()
+        
+        if include_orders:
+            # Fetch both concurrently
+            fills_task = self.fetch_fills(session)
+            orders_task = self.fetch_open_orders(session)
+            
+            fills, orders = await asyncio.gather(fills_task, orders_task)
+        else:
+            fills, orders = await self.fetch_fills(session), None
+        
+        # Process both; a failed fetch says nothing about what is (still) open
+        filled_txs = self.process_fills(fills) if fills is not None else []
+        open_order_alerts = self.process_open_orders(orders) if orders is not None else []
+        self.last_check_failed = fills is None or (include_orders and orders is None)
+        self.last_open_orders = len(self.previously_open_orders) if orders is not None else None
+        
+        # New fills/orders or orders closing all count as activity
+        self.last_check_active = bool(filled_txs or open_order_alerts) or (
+            self.previously_open_orders != previously_open
+        )
         
         # Combine results
         return filled_txs + open_order_alerts
@@ -271,139 +537,594 @@ class AddressWatcher:
 class AsyncHyperliquidScraper:
     """Async scraper with individual watchers - ALL transactions visible."""
     
-    def __init__(self, db_path: str = "hyperliquid.db"):
-        self.base_url = "https://api.hyperliquid.xyz/info"
+    def __init__(
+        self,
+        db_path: str = "hyperliquid.db",
+        base_url: str = "https://api.hyperliquid.xyz/info",
+        ws_url: str = WS_URL,
+        pool_size: int = 100,
+        per_host_limit: int = 0,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        max_concurrency: int = 20,
+        weight_per_minute: float = 1200,
+        rate_burst: Optional[float] = None,
+        spread_fraction: float = 0.0,
+        overrun_policy: str = "skip",
+        incremental_fills: bool = False,
+        max_fill_pages: int = 5,
+        dedupe_max_ids: int = 2500,
+        dedupe_window_hours: float = 24.0,
+        adaptive_min_interval: float = 10.0,
+        adaptive_max_interval: float = 300.0,
+        adaptive_decay: float = 1.5,
+        orders_idle_after: float = 3600.0,
+        persist: bool = True,
+        db_batch_size: int = 500,
+        db_flush_interval: float = 1.0,
+        request_timeout: float = 10.0,
+        cycle_timeout: Optional[float] = 30.0,
+        backoff_base: float = 1.0,
+        backoff_cap: float = 8.0,
+        breaker_failure_threshold: int = 5,
+        breaker_reset_timeout: float = 15.0,
+        breaker_max_reset_timeout: float = 300.0,
+        warm_start: bool = True,
+        record_path: Optional[str] = None,
+        replay_path: Optional[str] = None,
+        replay_speed: float = 1.0
+    ):
+        self.base_url = base_url
+        self.ws_url = ws_url
         self.watchers: Dict[str, AddressWatcher] = {}
         self.db_path = db_path
+        self.persist = persist  # False when another process owns the database (sharded workers)
         self.is_running = False
+        # Set by stop() to cut run()'s sleeps short; bound to run()'s loop
+        self._stop_event: Optional[asyncio.Event] = None
+        self._run_loop: Optional[asyncio.AbstractEventLoop] = None
         self._logged_addresses = set()  # Track logged addresses to avoid duplicates
+        
+        # Connection pool settings (0 = unlimited for the aiohttp limits)
+        self.pool_size = pool_size
+        self.per_host_limit = per_host_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+        
+        # One long-lived session, bound to the event loop that created it
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pool_stats = {
+            "sessions_opened": 0,
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+        }
+        
+        # Request scheduling: cap on watchers checked at once, plus a shared
+        # token bucket for the per-IP weight budget (weight_per_minute=0 disables it)
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = WeightRateLimiter(weight_per_minute, burst=rate_burst)
+        # Fraction of the interval over which watcher starts are staggered (0 = no staggering)
+        self.spread_fraction = spread_fraction
+        self.last_cycle_budget: Dict = {}
+        
+        # Failure handling: one breaker for the info endpoint shared by every
+        # watcher, jittered retries, and a deadline per check cycle (seconds
+        # on top of any stagger window; None = no deadline)
+        self.request_timeout = request_timeout
+        self.cycle_timeout = cycle_timeout
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.breaker = CircuitBreaker(
+            base_url,
+            failure_threshold=breaker_failure_threshold,
+            reset_timeout=breaker_reset_timeout,
+            max_reset_timeout=breaker_max_reset_timeout
+        )
+        self._request_stats = {"retries": 0, "deadline_exceeded": 0}
+        
+        # Raw traffic capture, or answering requests from a capture instead of the API
+        self.recorder: Optional[TrafficRecorder] = TrafficRecorder(record_path) if record_path else None
+        self.replay_session: Optional[ReplaySession] = (
+            ReplaySession(replay_path, speed=replay_speed) if replay_path else None
+        )
+        
+        # Poll interval, for counting cycle overruns (set by run() or the caller).
+        # run() polls on a fixed-rate grid; overrun_policy is skip, catch_up or shed.
+        self.cycle_interval: Optional[float] = None
+        self.overrun_policy = overrun_policy
+        self.ticker: Optional[FixedRateTicker] = None
+        metrics.track_scraper(self)
+        
+        # Incremental mode: userFillsByTime from each watcher's high-water mark
+        self.incremental_fills = incremental_fills
+        self.max_fill_pages = max_fill_pages
+        self.stream: Optional[HyperliquidStream] = None
+        
+        # Per-watcher dedupe bounds (count and time window)
+        self.dedupe_max_ids = dedupe_max_ids
+        self.dedupe_window_ms = int(dedupe_window_hours * 3600 * 1000) if dedupe_window_hours else None
+        
+        # Per-address deadlines for mode="adaptive"
+        self.cadence = AdaptiveCadence(
+            min_interval=adaptive_min_interval,
+            max_interval=adaptive_max_interval,
+            decay=adaptive_decay,
+            orders_idle_after=orders_idle_after
+        )
+        
+        # Rows go to SQLite through a background writer thread in batches
+        self.writer: Optional[TransactionWriter] = (
+            TransactionWriter(db_path, batch_size=db_batch_size, flush_interval=db_flush_interval)
+            if persist else None
+        )
         self._init_db()
+        
+        # Watchlist, fill high-water marks and open orders survive restarts
+        self.address_names: Dict[str, str] = {}
+        self._state_changes = StateUpdate()
+        self._restored_state: Dict[str, WatcherState] = {}
+        if persist and warm_start:
+            self._restore_state()
     
     def _init_db(self):
         """Initialize SQLite database for persistence."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS transactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp DATETIME,
-                    address TEXT,
-                    action TEXT,
-                    coin TEXT,
-                    quantity REAL,
-                    price REAL,
-                    value_usd REAL,
-                    fee REAL,
-                    tx_hash TEXT,
-                    closed_pnl REAL,
-                    order_type TEXT DEFAULT 'FILLED',
-                    UNIQUE(address, tx_hash, timestamp)
-                )
-            """)
-            conn.commit()
-    
-    def add_address(self, address: str):
-        """Add an address to monitor."""
-        address = address.strip().lower()
-        if not address.startswith('0x') and len(address) == 40:
-            address = '0x' + address
-        
-        if address not in self.watchers:
-            watcher = AddressWatcher(address, self)
-            self.watchers[address] = watcher
-            # Only log if not already logged
-            if not hasattr(self, '_logged_addresses'):
-                self._logged_addresses = set()
-            if address not in self._logged_addresses:
-                logger.info(f"✓ Watcher added: {address[:8]}...{address[-6:]}")
-                self._logged_addresses.add(address)
+        if not self.persist:
+            return
+        init_db(self.db_path)
+    
+    def _restore_state(self):
+        """Re-add the persisted watchlist with each watcher's saved state."""
+        started = time.monotonic()
+        self._restored_state = load_state(self.db_path)
+        restored = list(self._restored_state.items())
+        for address, state in restored:
+            self.add_address(address, name=state.name)
+        if restored:
+            logger.info(
+                f"♻️  Restored {len(restored)} watchers from {self.db_path} "
+                f"in {(time.monotonic() - started) * 1000:.0f}ms"
+            )
+    
+    def add_address(self, address: str, name: Optional[str] = None, log: bool = True) -> bool:
+        """Add an address to monitor (name is an optional display label, persisted with the watchlist).
+        
+        Returns whether a new watcher was created.
+        """
+        address = normalize_address(address)
+        if name:
+            self.address_names[address] = name
+        
+        if address in self.watchers:
+            return False
+        watcher = AddressWatcher(address, self)
+        restored = self._restored_state.pop(address, None)
+        if restored is not None:
+            watcher.restore(restored)
+        elif self.writer is not None:
+            self._state_changes.add_address(address, name)
+        self.watchers[address] = watcher
+        self.cadence.schedule(address)
+        # Only log if not already logged
+        if log and address not in self._logged_addresses:
+            logger.info(f"✓ Watcher added: {address[:8]}...{address[-6:]}")
+            self._logged_addresses.add(address)
+        return True
+    
+    def add_addresses(self, entries: Iterable[Tuple[str, Optional[str]]]) -> int:
+        """Add many (address, name) pairs in one batch: one log line and one watchlist write."""
+        added = sum(self.add_address(address, name, log=False) for address, name in entries)
+        if added:
+            logger.info(f"✓ {added} watchers added ({len(self.watchers)} total)")
+            self.save_state()
+        return added
     
     def remove_address(self, address: str):
         """Remove an address from monitoring."""
-        address = address.strip().lower()
+        address = normalize_address(address)
         if address in self.watchers:
             del self.watchers[address]
+            self.cadence.discard(address)
+            self.address_names.pop(address, None)
+            if self.writer is not None:
+                self._state_changes.remove_address(address)
             logger.info(f"✗ Watcher removed: {address[:8]}...{address[-6:]}")
     
-    async def check_all_addresses(self) -> List[Dict]:
-        """Check all addresses concurrently."""
-        if not self.watchers:
+    def _make_trace_config(self) -> aiohttp.TraceConfig:
+        """Build trace hooks that count new vs reused pooled connections."""
+        stats = self._pool_stats
+        
+        async def on_request_start(session, ctx, params):
+            stats["requests"] += 1
+        
+        async def on_connection_create_end(session, ctx, params):
+            stats["connections_created"] += 1
+        
+        async def on_connection_reuseconn(session, ctx, params):
+            stats["connections_reused"] += 1
+        
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use in this event loop."""
+        if self.replay_session is not None:
+            return self.replay_session
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed and self._session_loop is loop:
+            return self._session
+        
+        # A session can't be shared across event loops (e.g. the Streamlit
+        # worker thread restarting with a fresh asyncio.run()), so replace it.
+        old_session, old_loop = self._session, self._session_loop
+        if old_session is not None and not old_session.closed:
+            if old_loop is not None and old_loop.is_running():
+                asyncio.run_coroutine_threadsafe(old_session.close(), old_loop)
+        
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            limit_per_host=self.per_host_limit,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            headers={"Accept-Encoding": ACCEPT_ENCODING},
+            trace_configs=[self._make_trace_config()]
+        )
+        self._session_loop = loop
+        self._pool_stats["sessions_opened"] += 1
+        return self._session
+    
+    def dedupe_stats(self) -> Dict:
+        """Dedupe memory footprint and worst-case false-positive rate across all watchers."""
+        totals = {"ids": 0, "memory_bytes": 0, "checks": 0, "duplicates": 0, "evictions": 0, "floor_hits": 0}
+        for watcher in self.watchers.values():
+            for window in (watcher.seen_transaction_ids, watcher.seen_open_order_ids):
+                for key, value in window.stats().items():
+                    if key in totals:
+                        totals[key] += value
+        totals["max_false_positive_rate"] = totals["floor_hits"] / totals["checks"] if totals["checks"] else 0.0
+        return totals
+    
+    def cadence_stats(self) -> Dict:
+        """How many watchers are hot vs dormant under adaptive polling."""
+        return self.cadence.stats()
+    
+    def breaker_stats(self) -> Dict:
+        """Circuit breaker state and trip counts, plus retry / deadline counters."""
+        stats = self.breaker.stats()
+        stats.update(self._request_stats)
+        return stats
+    
+    def _start_cycle_deadline(self, extra: float = 0.0):
+        """Set the deadline seen by tasks created until the returned token is reset."""
+        deadline = time.monotonic() + extra + self.cycle_timeout if self.cycle_timeout is not None else None
+        return _cycle_deadline.set(deadline)
+    
+    def pool_stats(self) -> Dict:
+        """Connection pool usage - reuse_ratio near 1.0 means keep-alive is working."""
+        stats = dict(self._pool_stats)
+        total = stats["connections_created"] + stats["connections_reused"]
+        stats["reuse_ratio"] = stats["connections_reused"] / total if total else 0.0
+        connector = self._session.connector if self._session is not None else None
+        stats["pool_size"] = self.pool_size
+        stats["per_host_limit"] = self.per_host_limit
+        stats["session_open"] = self._session is not None and not self._session.closed
+        stats["idle_connections"] = (
+            sum(len(conns) for conns in connector._conns.values())
+            if connector is not None and not connector.closed else 0
+        )
+        return stats
+    
+    async def close(self):
+        """Close the shared session and its connection pool."""
+        session = self._session
+        self._session = None
+        self._session_loop = None
+        if session is not None and not session.closed:
+            await session.close()
+    
+    async def _check_scheduled(
+        self,
+        watcher: AddressWatcher,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore,
+        start_delay: float
+    ) -> List[Dict]:
+        """Run one watcher check at its staggered start time, within the concurrency cap."""
+        if start_delay > 0:
+            await self._sleep(start_delay)
+        async with semaphore:
+            return await watcher.check(session)
+    
+    async def check_all_addresses(
+        self,
+        spread_over: Optional[float] = None,
+        watchers: Optional[List[AddressWatcher]] = None
+    ) -> List[Dict]:
+        """Check all (or the given) watchers with bounded concurrency, optionally staggered over spread_over seconds."""
+        if watchers is None:
+            watchers = list(self.watchers.values())
+        if not watchers:
             return []
         
-        async with aiohttp.ClientSession() as session:
-            # Run all watchers concurrently
+        session = await self.get_session()
+        budget = CycleBudget(self.rate_limiter, window=spread_over)
+        
+        # Created per cycle: asyncio primitives are bound to the running loop
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        step = spread_over / len(watchers) if spread_over else 0.0
+        deadline_token = self._start_cycle_deadline(spread_over or 0.0)
+        try:
             tasks = [
-                watcher.check(session)
-                for watcher in self.watchers.values()
+                self._check_scheduled(watcher, session, semaphore, i * step)
+                for i, watcher in enumerate(watchers)
             ]
             
             # Gather all results
             results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            # Flatten and filter errors
-            transactions = []
-            for result in results:
-                if isinstance(result, Exception):
-                    logger.error(f"Watcher error: {result}")
-                elif isinstance(result, list):
-                    transactions.extend(result)
-            
-            # Save to database
-            self._save_transactions(transactions)
-            
-            return transactions
+        finally:
+            _cycle_deadline.reset(deadline_token)
+        return await self._finish_cycle(results, budget)
     
-    def _save_transactions(self, transactions: List[Dict]):
-        """Save transactions to database."""
-        if not transactions:
+    async def _check_adaptive(
+        self,
+        watcher: AddressWatcher,
+        session: aiohttp.ClientSession,
+        semaphore: asyncio.Semaphore
+    ) -> List[Dict]:
+        """Check one due watcher and schedule its next poll from what it saw."""
+        include_orders = self.cadence.should_check_orders(watcher.address)
+        watcher.last_check_active = False
+        watcher.last_check_failed = True  # until the check says otherwise
+        watcher.last_open_orders = None
+        try:
+            async with semaphore:
+                return await watcher.check(session, include_orders=include_orders)
+        finally:
+            # Always reschedule; a failed check keeps the current interval
+            if watcher.address in self.watchers:
+                if watcher.last_check_failed and not watcher.last_check_active:
+                    self.cadence.reschedule(watcher.address)
+                else:
+                    self.cadence.record(watcher.address, watcher.last_check_active, watcher.last_open_orders)
+    
+    async def check_due_addresses(self) -> List[Dict]:
+        """Check only the watchers whose adaptive deadline has passed."""
+        due = [self.watchers[address] for address in self.cadence.pop_due() if address in self.watchers]
+        if not due:
+            return []
+        
+        session = await self.get_session()
+        budget = CycleBudget(self.rate_limiter)
+        semaphore = asyncio.Semaphore(max(1, self.max_concurrency))
+        deadline_token = self._start_cycle_deadline()
+        try:
+            results = await asyncio.gather(
+                *(self._check_adaptive(watcher, session, semaphore) for watcher in due),
+                return_exceptions=True
+            )
+        finally:
+            _cycle_deadline.reset(deadline_token)
+        return await self._finish_cycle(results, budget, mode="adaptive")
+    
+    async def _finish_cycle(self, results: List, budget: CycleBudget, mode: str = "poll") -> List[Dict]:
+        """Flatten watcher results, persist them and record the cycle's budget."""
+        # Flatten and filter errors
+        transactions = []
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Watcher error: {result}")
+            elif isinstance(result, list):
+                transactions.extend(result)
+        
+        # Save to database
+        await self._save_transactions(transactions)
+        
+        self.last_cycle_budget = budget.finish()
+        logger.debug(
+            f"Cycle budget: {self.last_cycle_budget['weight_used']:.0f}/{self.last_cycle_budget['budget']:.0f} weight "
+            f"({self.last_cycle_budget['utilization']:.0%}), {self.last_cycle_budget['requests']} requests, "
+            f"{self.last_cycle_budget['throttle_wait']:.1f}s throttled"
+        )
+        
+        elapsed = self.last_cycle_budget["elapsed"]
+        metrics.CYCLE_SECONDS.observe(elapsed, mode)
+        metrics.CYCLE_FILLS.observe(len(transactions), mode)
+        if mode == "poll" and self.cycle_interval and elapsed > self.cycle_interval:
+            metrics.CYCLE_OVERRUNS.inc(1, mode)
+        
+        return transactions
+    
+    async def _save_transactions(self, transactions: List[Dict]):
+        """Queue transactions for the database writer (waits for queue space, never for the write).
+
+        When the writer is behind, the wait happens off the event loop, so
+        other watchers and the stream keep running meanwhile.
+        """
+        if self.writer is None:
+            return
+        await self.writer.submit_async(transactions)
+        self.save_state()
+    
+    def save_state(self, wait: bool = False):
+        """Queue watchlist changes and dirty watcher state behind any rows already submitted."""
+        if self.writer is None:
             return
+        update, self._state_changes = self._state_changes, StateUpdate()
+        for address, watcher in self.watchers.items():
+            if watcher.state_dirty:
+                watcher.state_dirty = False
+                update.set_mark(address, watcher.last_fill_tid, watcher.last_fill_time_ms)
+                update.set_open_orders(address, watcher.previously_open_orders)
+        self.writer.submit_state(update)
+        if wait:
+            self.writer.flush()
+    
+    def db_stats(self) -> Dict:
+        """Writer throughput, latency and backpressure."""
+        return self.writer.stats() if self.writer is not None else {}
+    
+    async def run(
+        self,
+        interval: int = 60,
+        mode: str = "poll",
+        on_transactions: Optional[Callable[[List[Dict]], None]] = None
+    ):
+        """Run the scraper continuously.
         
-        with sqlite3.connect(self.db_path) as conn:
-            for tx in transactions:
-                try:
-                    conn.execute("""
-                        INSERT OR IGNORE INTO transactions 
-                        (timestamp, address, action, coin, quantity, price, value_usd, fee, tx_hash, closed_pnl, order_type)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        tx["timestamp"].isoformat(),
-                        tx["address"],
-                        tx["action"],
-                        tx["coin"],
-                        tx["quantity"],
-                        tx["price"],
-                        tx["value_usd"],
-                        tx["fee"],
-                        tx["tx_hash"],
-                        tx["closed_pnl"],
-                        tx.get("order_type", "FILLED")
-                    ))
-                except Exception as e:
-                    logger.error(f"DB error: {e}")
-            conn.commit()
-    
-    async def run(self, interval: int = 60):
-        """Run the scraper continuously."""
+        mode="poll" checks every watcher each interval. mode="adaptive" polls
+        each watcher on its own activity-driven cadence (interval is ignored).
+        mode="stream" pushes fills and order updates over a WebSocket instead,
+        and only polls the watchers beyond the stream's subscription cap.
+        """
         self.is_running = True
+        self._stop_event = asyncio.Event()
+        self._run_loop = asyncio.get_running_loop()
+        self.cycle_interval = interval
         logger.info(f"🚀 Async scraper started: {len(self.watchers)} watchers")
         logger.info(f"⏱️  Check interval: {interval}s")
         
+        stream_task = None
+        if mode == "stream":
+            self.stream = HyperliquidStream(self, url=self.ws_url)
+            stream_task = asyncio.create_task(self.stream.run(on_transactions))
+        
+        ticker = None
+        if mode != "adaptive":
+            ticker = self.ticker = FixedRateTicker(interval, overrun=self.overrun_policy)
+            logger.info(f"⏱️  Fixed-rate cycles, overrun policy: {ticker.overrun}")
+        
         while self.is_running:
+            if mode == "adaptive":
+                await self._run_adaptive_tick(on_transactions)
+                continue
             try:
-                start_time = datetime.now()
-                await self.check_all_addresses()
-                elapsed = (datetime.now() - start_time).total_seconds()
-                
-                logger.debug(f"✓ Check completed in {elapsed:.2f}s")
-                await asyncio.sleep(interval)
+                # Ticks are on an absolute grid, so cycle time doesn't add to the interval
+                lag = await ticker.wait(self._stop_event)
+                if lag is None or not self.is_running:
+                    break
+                metrics.CYCLE_LAG.observe(lag, "poll")
+                spread_over = interval * self.spread_fraction if self.spread_fraction else None
+                watchers = self.stream.polled_watchers() if stream_task else None
+                if ticker.overrun == SHED:
+                    watchers = self._shed_watchers(watchers, ticker)
+                if watchers is None or watchers:
+                    transactions = await self.check_all_addresses(spread_over=spread_over, watchers=watchers)
+                    if transactions and on_transactions is not None:
+                        on_transactions(transactions)
+                self._complete_tick(ticker)
                 
             except asyncio.CancelledError:
                 logger.info("⏹️  Scraper stopped")
                 break
             except Exception as e:
                 logger.error(f"❌ Error in main loop: {e}")
-                await asyncio.sleep(interval)
+                self._complete_tick(ticker)
+        
+        if stream_task is not None:
+            await self.stream.close()
+            stream_task.cancel()
+            await asyncio.gather(stream_task, return_exceptions=True)
+        await self.close()
+        if self.writer is not None:
+            self.save_state()
+            self.writer.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+        self._stop_event = self._run_loop = None
+    
+    def _complete_tick(self, ticker: FixedRateTicker):
+        skipped = ticker.complete()
+        logger.debug(f"✓ Check completed in {ticker.last_duration:.2f}s (started {ticker.last_lag:.2f}s late)")
+        if skipped:
+            metrics.CYCLE_SKIPPED.inc(skipped, "poll")
+            logger.warning(
+                f"⏱️  Cycle took {ticker.last_duration:.1f}s (interval {ticker.interval:g}s), "
+                f"skipped {skipped} tick(s)"
+            )
+    
+    def _shed_watchers(
+        self,
+        watchers: Optional[List[AddressWatcher]],
+        ticker: FixedRateTicker
+    ) -> List[AddressWatcher]:
+        """The share of watchers that fits in one interval: recently active first, then the longest unchecked."""
+        if watchers is None:
+            watchers = list(self.watchers.values())
+        keep = ticker.shed_count(len(watchers))
+        if keep >= len(watchers):
+            return watchers
+        metrics.WATCHERS_SHED.inc(len(watchers) - keep)
+        ranked = sorted(watchers, key=lambda watcher: (not watcher.last_check_active, watcher.last_checked_at))
+        return ranked[:keep]
+    
+    async def _run_adaptive_tick(self, on_transactions: Optional[Callable[[List[Dict]], None]]):
+        """Check due watchers, then sleep until the next deadline (at most 1s, to pick up new watchers)."""
+        try:
+            transactions = await self.check_due_addresses()
+            if transactions and on_transactions is not None:
+                on_transactions(transactions)
+            
+            next_deadline = self.cadence.next_deadline()
+            wait = 1.0 if next_deadline is None else next_deadline - time.monotonic()
+            await self._sleep(min(max(wait, 0.0), 1.0))
+        except asyncio.CancelledError:
+            logger.info("⏹️  Scraper stopped")
+            self.is_running = False
+        except Exception as e:
+            logger.error(f"❌ Error in main loop: {e}")
+            await self._sleep(1.0)
+    
+    @property
+    def stopping(self) -> bool:
+        """Whether stop() has been called on a running run()."""
+        return self._stop_event is not None and self._stop_event.is_set()
+    
+    async def _sleep(self, delay: float):
+        """Sleep for delay seconds, or until stop() is called."""
+        if self._stop_event is None:
+            await asyncio.sleep(delay)
+            return
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), delay)
+        except asyncio.TimeoutError:
+            pass
     
     def stop(self):
-        """Stop the scraper."""
+        """Stop the scraper, flush pending database rows and close the shared session."""
         self.is_running = False
+        try:
+            current_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            current_loop = None
+        
+        # Wake run() so it exits now rather than after its next cycle
+        event, run_loop = self._stop_event, self._run_loop
+        if event is not None and run_loop is not None and not run_loop.is_closed():
+            if current_loop is run_loop:
+                event.set()
+            else:
+                run_loop.call_soon_threadsafe(event.set)
+        
+        if self.writer is not None:
+            self.save_state()
+            self.writer.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+        
+        loop = self._session_loop
+        if self._session is None or loop is None or loop.is_closed():
+            return
+        
+        if current_loop is loop:
+            loop.create_task(self.close())
+        elif loop.is_running():
+            # Called from another thread (e.g. the Streamlit UI)
+            asyncio.run_coroutine_threadsafe(self.close(), loop)
 
@@ -0,0 +1,333 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import queue
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from records import TransactionBatch
+from scraper import AsyncHyperliquidScraper, normalize_address
+from store import StateUpdate, TransactionWriter, WatcherState, init_db, load_state
+
+logger = logging.getLogger(__name__)
+
+
+def _hash(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+class ConsistentHashRing:
+    """Maps addresses to shards so that membership changes move as few addresses as possible."""
+
+    def __init__(self, shards: Iterable[int] = (), vnodes: int = 128):
+        self.vnodes = vnodes
+        self._ring: List[int] = []
+        self._owners: Dict[int, int] = {}
+        for shard in shards:
+            self.add_shard(shard)
+
+    @property
+    def shards(self) -> List[int]:
+        return sorted(set(self._owners.values()))
+
+    def add_shard(self, shard: int):
+        for vnode in range(self.vnodes):
+            point = _hash(f"shard-{shard}-{vnode}")
+            if point not in self._owners:
+                bisect.insort(self._ring, point)
+                self._owners[point] = shard
+
+    def remove_shard(self, shard: int):
+        points = [point for point, owner in self._owners.items() if owner == shard]
+        for point in points:
+            del self._owners[point]
+            self._ring.pop(bisect.bisect_left(self._ring, point))
+
+    def shard_for(self, address: str) -> int:
+        if not self._ring:
+            raise ValueError("Hash ring has no shards")
+        index = bisect.bisect(self._ring, _hash(address)) % len(self._ring)
+        return self._owners[self._ring[index]]
+
+
+def _shard_main(
+    shard_id: int,
+    commands: multiprocessing.Queue,
+    results: multiprocessing.Queue,
+    interval: int,
+    mode: str,
+    scraper_options: Dict,
+    watchers: Dict[str, Optional[WatcherState]]
+):
+    """Worker process: one event loop and one scraper (and session) per shard.
+
+    Results go back as (shard, transactions, states, released): states holds
+    the watcher state of addresses whose state changed, released the
+    addresses this shard gave up (their final state is in states).
+    """
+    async def main():
+        # The parent process owns the database; workers only ship results back
+        scraper = AsyncHyperliquidScraper(persist=False, **scraper_options)
+        loop = asyncio.get_running_loop()
+
+        def add(address: str, state: Optional[WatcherState]):
+            if scraper.add_address(address, log=False) and state is not None:
+                scraper.watchers[address].restore(state)
+
+        def export(addresses: Iterable[str], dirty_only: bool = False) -> Dict[str, WatcherState]:
+            states = {}
+            for address in addresses:
+                watcher = scraper.watchers.get(address)
+                if watcher is not None and (watcher.state_dirty or not dirty_only):
+                    watcher.state_dirty = False
+                    states[address] = watcher.export_state()
+            return states
+
+        def on_transactions(transactions: List[Dict]):
+            # Columnar, so the batch pickles as a few arrays rather than one object per fill
+            batch = TransactionBatch.from_records(transactions)
+            results.put((shard_id, batch, export(list(scraper.watchers), dirty_only=True), []))
+
+        async def read_commands():
+            while True:
+                command = await loop.run_in_executor(None, commands.get)
+                action = command[0]
+                if action == "add":
+                    add(command[1], command[2])
+                elif action == "remove":
+                    results.put((shard_id, TransactionBatch(), export([command[1]]), [command[1]]))
+                    scraper.remove_address(command[1])
+                elif action == "stop":
+                    addresses = list(scraper.watchers)
+                    results.put((shard_id, TransactionBatch(), export(addresses), addresses))
+                    scraper.stop()
+                    return
+
+        # Watchers are in place before the first tick
+        for address, state in watchers.items():
+            add(address, state)
+        logger.info(f"Shard {shard_id}: {len(scraper.watchers)} watchers")
+        # run() is entered before the reader starts, so a stop can't precede it
+        reader = asyncio.create_task(read_commands())
+        await scraper.run(interval, mode=mode, on_transactions=on_transactions)
+        reader.cancel()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+class ShardedScraper:
+    """Splits the watchlist across worker processes by consistent hashing of the address.
+
+    Each shard runs its own AsyncHyperliquidScraper in its own process and
+    event loop. Transactions come back over a shared queue; the parent writes
+    them to the one SQLite store and hands them to the caller, so consumers
+    see a single merged transaction stream. Watcher state (fill high-water
+    marks and open orders) comes back too: the parent persists it, and hands
+    it to whichever shard takes an address on, so neither a restart nor a
+    resize reports old fills again.
+    """
+
+    def __init__(
+        self,
+        num_shards: int = 4,
+        db_path: str = "hyperliquid.db",
+        interval: int = 60,
+        mode: str = "poll",
+        vnodes: int = 128,
+        **scraper_options
+    ):
+        self.db_path = db_path
+        self.interval = interval
+        self.mode = mode
+        self.scraper_options = scraper_options
+        self.ring = ConsistentHashRing(range(num_shards), vnodes=vnodes)
+        self.assignments: Dict[str, int] = {}  # address -> shard
+
+        # Spawn (not fork): the parent may already be running threads
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue()
+        self._commands: Dict[int, multiprocessing.Queue] = {}
+        self._processes: Dict[int, multiprocessing.Process] = {}
+        self._received: List[Dict] = []  # transactions not yet returned by drain()
+        self._released: Set[str] = set()  # addresses a shard has handed back
+        self.is_running = False
+        init_db(db_path)
+        self.states: Dict[str, WatcherState] = load_state(db_path)
+        self.writer = TransactionWriter(db_path)
+
+    def start(self):
+        """Start one worker process per shard, each with its share of the watchlist."""
+        self.is_running = True
+        for shard in self.ring.shards:
+            self._start_shard(shard)
+        logger.info(f"🚀 Sharded scraper started: {len(self._processes)} shards, {len(self.assignments)} watchers")
+
+    def _start_shard(self, shard: int):
+        watchers = {
+            address: self.states.get(address)
+            for address, owner in self.assignments.items()
+            if owner == shard
+        }
+        commands = self._context.Queue()
+        process = self._context.Process(
+            target=_shard_main,
+            args=(shard, commands, self._results, self.interval, self.mode, self.scraper_options, watchers),
+            name=f"scraper-shard-{shard}",
+            daemon=True
+        )
+        process.start()
+        self._commands[shard] = commands
+        self._processes[shard] = process
+
+    def _stop_shard(self, shard: int, timeout: float = 10.0):
+        commands = self._commands.pop(shard, None)
+        process = self._processes.pop(shard, None)
+        if commands is not None:
+            commands.put(("stop",))
+        if process is None:
+            return
+        # Keep reading results while waiting: a child can't exit until the
+        # parent has taken what it queued
+        deadline = time.monotonic() + timeout
+        while process.is_alive() and time.monotonic() < deadline:
+            self._receive(0.1)
+            process.join(0)
+        if process.is_alive():
+            logger.error(f"Shard {shard} did not stop within {timeout}s - terminating")
+            process.terminate()
+        process.join()
+        while self._receive(0):
+            pass
+
+    def add_address(self, address: str):
+        address = normalize_address(address)
+        if address in self.assignments:
+            return
+        shard = self.ring.shard_for(address)
+        self.assignments[address] = shard
+        update = StateUpdate()
+        update.add_address(address)
+        self.writer.submit_state(update)
+        if shard in self._commands:
+            self._commands[shard].put(("add", address, self.states.get(address)))
+
+    def remove_address(self, address: str):
+        address = normalize_address(address)
+        shard = self.assignments.pop(address, None)
+        self.states.pop(address, None)
+        update = StateUpdate()
+        update.remove_address(address)
+        self.writer.submit_state(update)
+        if shard is not None and shard in self._commands:
+            self._commands[shard].put(("remove", address))
+
+    def resize(self, num_shards: int, timeout: float = 10.0):
+        """Change the shard count; only addresses whose ring owner changes are moved.
+
+        A moved address resumes on its new shard from the state its old
+        shard handed back, so it doesn't report old fills or orders again.
+        """
+        current = set(self.ring.shards)
+        wanted = set(range(num_shards))
+        for shard in wanted - current:
+            self.ring.add_shard(shard)
+        for shard in current - wanted:
+            self.ring.remove_shard(shard)
+
+        moves = {}
+        for address, old_shard in self.assignments.items():
+            new_shard = self.ring.shard_for(address)
+            if new_shard != old_shard:
+                moves[address] = (old_shard, new_shard)
+        for address, (_, new_shard) in moves.items():
+            self.assignments[address] = new_shard
+
+        if self.is_running:
+            releasing = set()
+            for address, (old_shard, _) in moves.items():
+                if old_shard in self._commands and old_shard in wanted:
+                    self._commands[old_shard].put(("remove", address))
+                    releasing.add(address)
+            for shard in current - wanted:
+                self._stop_shard(shard, timeout)
+            self._await_released(releasing, timeout)
+            for shard in sorted(wanted - current):
+                self._start_shard(shard)
+            for address, (_, new_shard) in moves.items():
+                if new_shard in current:
+                    self._commands[new_shard].put(("add", address, self.states.get(address)))
+
+        logger.info(f"Resharded {len(current)} -> {num_shards} shards: moved {len(moves)}/{len(self.assignments)} addresses")
+        return moves
+
+    def _await_released(self, addresses: Set[str], timeout: float):
+        """Wait until shards have handed back the final state of these addresses."""
+        deadline = time.monotonic() + timeout
+        while addresses - self._released and time.monotonic() < deadline:
+            self._receive(min(0.1, max(0.0, deadline - time.monotonic())))
+        missing = addresses - self._released
+        if missing:
+            logger.warning(f"{len(missing)} moved addresses resume from their last reported state")
+        self._released -= addresses
+
+    def _receive(self, timeout: float) -> bool:
+        """Take one shard message: queue its transactions for the store and keep its state."""
+        try:
+            if timeout > 0:
+                _, transactions, states, released = self._results.get(timeout=timeout)
+            else:
+                _, transactions, states, released = self._results.get_nowait()
+        except queue.Empty:
+            return False
+
+        self.writer.submit(transactions)
+        self._received.extend(transactions)  # as Transaction records
+        update = StateUpdate()
+        for address, state in states.items():
+            if address not in self.assignments:
+                continue  # removed meanwhile
+            self.states[address] = state
+            update.set_mark(address, state.last_fill_tid, state.last_fill_time_ms)
+            update.set_open_orders(address, state.open_orders)
+        # Committed with (never ahead of) the rows just submitted
+        self.writer.submit_state(update)
+        self._released.update(released)
+        return True
+
+    def drain(self, timeout: float = 0.0) -> List[Dict]:
+        """Collect transactions from all shards, queue them for the store and return them."""
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if not self._receive(remaining if remaining > 0 and not self._received else 0):
+                break
+        transactions, self._received = self._received, []
+        return transactions
+
+    def run(self, on_transactions: Optional[Callable[[List[Dict]], None]] = None, poll: float = 1.0):
+        """Block, merging shard results into the store until stop() is called."""
+        if not self.is_running:
+            self.start()
+        while self.is_running:
+            transactions = self.drain(timeout=poll)
+            if transactions and on_transactions is not None:
+                on_transactions(transactions)
+
+    def stop(self):
+        """Stop every shard and flush what they already sent."""
+        self.is_running = False
+        for shard in list(self._processes):
+            self._stop_shard(shard)
+        self.drain()
+        self.writer.stop()
+
+    def shard_sizes(self) -> Dict[int, int]:
+        sizes = {shard: 0 for shard in self.ring.shards}
+        for shard in self.assignments.values():
+            sizes[shard] = sizes.get(shard, 0) + 1
+        return sizes
@@ -0,0 +1,1046 @@
+import asyncio
+import atexit
+import logging
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import metrics
+from records import BUY, BUY_LIMIT, FILLED, SELL, SELL_LIMIT, Transaction, TransactionBatch
+
+logger = logging.getLogger(__name__)
+
+# Applied to every long-lived connection: WAL lets readers (the dashboard)
+# run alongside the writer, and NORMAL sync is durable across app crashes.
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Rows migrated from version 0 have no tid, so the unique key can't match
+# them; a re-fetched fill is also skipped if a tid-less row has the old
+# (address, tx_hash, timestamp) key (see idx_transactions_legacy). Rows
+# moved to the archive leave their key in archived_keys, checked the same way.
+INSERT_TRANSACTION_SQL = """
+    INSERT OR IGNORE INTO transactions
+    (timestamp, address, action, coin, quantity, price, value_usd, fee, tx_hash, closed_pnl, order_type, tid)
+    SELECT ?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?9, ?10, ?11, ?12
+    WHERE NOT EXISTS (
+        SELECT 1 FROM transactions
+        WHERE tid IS NULL AND address = ?2 AND tx_hash = ?9 AND timestamp = ?1
+    ) AND NOT EXISTS (
+        SELECT 1 FROM archived_keys
+        WHERE address = ?2 AND tid = ?12 AND order_type = ?11
+    ) AND NOT EXISTS (
+        SELECT 1 FROM archived_keys
+        WHERE tid IS NULL AND address = ?2 AND tx_hash = ?9 AND timestamp = ?1
+    )
+"""
+
+# PRAGMA user_version of a current store. Version 0 keyed transactions on
+# UNIQUE(address, tx_hash, timestamp), which let limit orders (NULL hash)
+# repeat and merged fills sharing a hash and time. Version 1 keys them on
+# (address, tid, order_type), tid being the fill tid or the order oid.
+# Version 2 adds the flow_rollups table, version 3 the archived_keys table;
+# version 4 stamps every archived key with its row's timestamp so that keys
+# past the refetch horizon can be pruned.
+SCHEMA_VERSION = 4
+
+TRANSACTIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME,
+        address TEXT,
+        action TEXT,
+        coin TEXT,
+        quantity REAL,
+        price REAL,
+        value_usd REAL,
+        fee REAL,
+        tx_hash TEXT,
+        closed_pnl REAL,
+        order_type TEXT DEFAULT 'FILLED',
+        tid INTEGER,
+        UNIQUE(address, tid, order_type)
+    )
+"""
+
+# Per-whale history, per-coin activity and whale-size filters, all by time
+# (plain time ranges drive exports and archiving). The trailing value_usd
+# lets volume sums run from the index alone.
+TRANSACTION_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_transactions_time ON transactions (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_transactions_address_time ON transactions (address, timestamp, value_usd)",
+    "CREATE INDEX IF NOT EXISTS idx_transactions_coin_time ON transactions (coin, timestamp, value_usd)",
+    "CREATE INDEX IF NOT EXISTS idx_transactions_value ON transactions (value_usd, timestamp)",
+    # Only migrated rows lack a tid, so this is empty in a new store
+    "CREATE INDEX IF NOT EXISTS idx_transactions_legacy ON transactions (address, tx_hash, timestamp) WHERE tid IS NULL",
+)
+
+# Fill flow per coin and per (address, coin), in 1m/1h/1d buckets, kept up
+# to date by the writer (see update_rollups). A bucket is the timestamp's
+# prefix ("2025-01-02T13" is 13:00-14:00), so it compares directly with
+# timestamps. address is '' in the per-coin rows. VWAP = volume / quantity;
+# net_notional is buys minus sells.
+ROLLUP_RESOLUTIONS = {"1m": 16, "1h": 13, "1d": 10}
+
+FLOW_ROLLUPS_TABLE = """
+    CREATE TABLE IF NOT EXISTS flow_rollups (
+        resolution TEXT NOT NULL,
+        address TEXT NOT NULL,
+        coin TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        fills INTEGER NOT NULL,
+        volume REAL NOT NULL,
+        net_notional REAL NOT NULL,
+        quantity REAL NOT NULL,
+        realized_pnl REAL NOT NULL,
+        fees REAL NOT NULL,
+        PRIMARY KEY (resolution, address, coin, bucket)
+    ) WITHOUT ROWID
+"""
+
+# WHERE is required: it keeps SQLite from reading ON CONFLICT as a join clause
+ROLLUP_SQL = """
+    INSERT INTO flow_rollups
+    (resolution, address, coin, bucket, fills, volume, net_notional, quantity, realized_pnl, fees)
+    SELECT '{resolution}', {address}, coin, replace(substr(timestamp, 1, {length}), ' ', 'T') AS bucket,
+        COUNT(*),
+        SUM(value_usd),
+        SUM(CASE WHEN action = 'BUY' THEN value_usd ELSE -value_usd END),
+        SUM(abs(quantity)),
+        SUM(COALESCE(closed_pnl, 0)),
+        SUM(COALESCE(fee, 0))
+    FROM {source}
+    WHERE id > ? AND id <= ? AND order_type = 'FILLED'
+    GROUP BY {group}
+    ON CONFLICT (resolution, address, coin, bucket) DO UPDATE SET
+        fills = fills + excluded.fills,
+        volume = volume + excluded.volume,
+        net_notional = net_notional + excluded.net_notional,
+        quantity = quantity + excluded.quantity,
+        realized_pnl = realized_pnl + excluded.realized_pnl,
+        fees = fees + excluded.fees
+"""
+
+ROLLUP_COLUMNS = "bucket, fills, volume, net_notional, quantity, realized_pnl, fees"
+
+LEGACY_COLUMNS = "timestamp, address, action, coin, quantity, price, value_usd, fee, tx_hash, closed_pnl"
+
+
+def connect(db_path: str, check_same_thread: bool = True) -> sqlite3.Connection:
+    """Open a connection with the store's pragmas applied."""
+    conn = sqlite3.connect(db_path, check_same_thread=check_same_thread)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def init_db(db_path: str):
+    """Initialize SQLite database for persistence, migrating an older schema in place."""
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA busy_timeout=5000")
+        # IMMEDIATE: two processes starting together must not both migrate
+        conn.execute("BEGIN IMMEDIATE")
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(transactions)")}
+        if columns and "tid" not in columns:
+            _migrate_transactions(conn)
+        conn.execute(TRANSACTIONS_TABLE.format(name="transactions"))
+        for sql in TRANSACTION_INDEXES:
+            conn.execute(sql)
+        # Watcher state for warm restarts (see load_state)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS watchlist (
+                address TEXT PRIMARY KEY,
+                name TEXT,
+                added_at REAL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS watcher_state (
+                address TEXT PRIMARY KEY,
+                last_fill_tid INTEGER,
+                last_fill_time_ms INTEGER,
+                updated_at REAL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS open_orders (
+                address TEXT,
+                oid TEXT,
+                PRIMARY KEY (address, oid)
+            ) WITHOUT ROWID
+        """)
+        # One row per collector daemon, refreshed every few seconds (see daemon.py)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS collectors (
+                collector_id TEXT PRIMARY KEY,
+                pid INTEGER,
+                started_at REAL,
+                last_seen REAL,
+                watchers INTEGER,
+                mode TEXT,
+                interval REAL
+            )
+        """)
+        # Parquet files holding rows moved out of `transactions` (see archive.py)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS archive_files (
+                path TEXT PRIMARY KEY,
+                day TEXT,
+                rows INTEGER,
+                min_id INTEGER,
+                max_id INTEGER,
+                created_at REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_archive_files_day ON archive_files (day)")
+        # The unique keys of archived rows, so re-fetched old fills stay out
+        # of `transactions` (see INSERT_TRANSACTION_SQL). tx_hash is only
+        # kept for tid-less (migrated) rows; timestamp ages keys out.
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS archived_keys (
+                address TEXT NOT NULL,
+                order_type TEXT NOT NULL,
+                tid INTEGER,
+                tx_hash TEXT,
+                timestamp TEXT
+            )
+        """)
+        conn.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS idx_archived_keys ON archived_keys (address, tid, order_type)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_archived_keys_legacy ON archived_keys (address, tx_hash, timestamp) "
+            "WHERE tid IS NULL"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_archived_keys_time ON archived_keys (timestamp)")
+        if version == 3:
+            # v3 keys have no timestamp; Compactor re-indexes the archive into the empty table
+            conn.execute("DELETE FROM archived_keys")
+        conn.execute(FLOW_ROLLUPS_TABLE)
+        if version < 2 and columns and conn.execute("SELECT 1 FROM transactions LIMIT 1").fetchone():
+            logger.warning("⚠️  Flow rollups start empty for existing rows - run `python rollups.py backfill` to fill them")
+        if version < SCHEMA_VERSION:
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+
+
+def _migrate_transactions(conn: sqlite3.Connection):
+    """Rebuild a pre-tid transactions table under the (address, tid, order_type) key.
+
+    SQLite can't change a table's constraints, so rows are copied into a new
+    table with their ids (dashboards tail by id) and the old one is dropped.
+    Old rows have no tid to key on (INSERT_TRANSACTION_SQL dedupes re-fetched
+    fills against them on the old key); exact repeats of the same limit
+    order, which the old key let through, are dropped on the way.
+    """
+    started = time.perf_counter()
+    total = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    logger.info(f"🗄️  Migrating transactions table to schema v{SCHEMA_VERSION} ({total:,} rows)...")
+    conn.execute(TRANSACTIONS_TABLE.format(name="transactions_v2"))
+    conn.execute(f"""
+        INSERT INTO transactions_v2 (id, {LEGACY_COLUMNS}, order_type, tid)
+        SELECT id, {LEGACY_COLUMNS}, COALESCE(order_type, 'FILLED'), NULL FROM transactions
+        WHERE COALESCE(order_type, 'FILLED') != 'LIMIT_OPEN' OR id IN (
+            SELECT MIN(id) FROM transactions WHERE order_type = 'LIMIT_OPEN'
+            GROUP BY address, coin, action, quantity, price, timestamp
+        )
+    """)
+    kept = conn.execute("SELECT changes()").fetchone()[0]
+    conn.execute("DROP TABLE transactions")
+    conn.execute("ALTER TABLE transactions_v2 RENAME TO transactions")
+    logger.info(
+        f"🗄️  Migrated {kept:,} rows ({total - kept:,} duplicate limit orders dropped) "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def update_rollups(
+    conn: sqlite3.Connection,
+    after_id: int,
+    upto_id: Optional[int] = None,
+    source: str = "transactions"
+):
+    """Add fills with after_id < id <= upto_id (in `source`) to every flow rollup.
+
+    Runs inside the caller's transaction, so rows and rollups commit together.
+    """
+    if upto_id is None:
+        upto_id = conn.execute(f"SELECT MAX(id) FROM {source}").fetchone()[0]
+        if upto_id is None:
+            return
+    for resolution, length in ROLLUP_RESOLUTIONS.items():
+        for address, group in (("''", "bucket, coin"), ("address", "bucket, address, coin")):
+            conn.execute(
+                ROLLUP_SQL.format(resolution=resolution, length=length, address=address, group=group, source=source),
+                (after_id, upto_id)
+            )
+
+
+def rollup_totals(db_path: str) -> Tuple[List[Tuple], int]:
+    """All-time flow per (address, coin) from the daily rollups, and the last id they include.
+
+    Rows are (address, coin, fills, volume, net_notional, quantity,
+    realized_pnl, fees), address "" summing every address. Read in one
+    snapshot, and the writer commits rows and rollups together, so the
+    totals cover exactly the fills up to the returned id.
+    """
+    conn = connect(db_path)
+    try:
+        conn.execute("BEGIN")
+        rows = conn.execute(
+            "SELECT address, coin, SUM(fills), SUM(volume), SUM(net_notional), SUM(quantity), "
+            "SUM(realized_pnl), SUM(fees) FROM flow_rollups WHERE resolution = '1d' GROUP BY address, coin"
+        ).fetchall()
+        upto = conn.execute("SELECT MAX(id) FROM transactions").fetchone()[0] or 0
+        conn.rollback()
+    finally:
+        conn.close()
+    return rows, upto
+
+
+def query_rollups(
+    db_path: str,
+    resolution: str = "1h",
+    coin: Optional[str] = None,
+    address: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+) -> List[Dict]:
+    """Flow buckets, oldest first, each with its VWAP.
+
+    With a coin, that coin's flow (for one address, or all of them); with
+    only an address, that address summed across coins. start/end are ISO
+    timestamps (end exclusive), matched to the buckets that contain them.
+    """
+    length = ROLLUP_RESOLUTIONS[resolution]
+    where, params = ["resolution = ?", "address = ?"], [resolution, address or ""]
+    if coin:
+        where.append("coin = ?")
+        params.append(coin)
+    if start:
+        where.append("bucket >= ?")
+        params.append(start[:length])
+    if end:
+        where.append("bucket < ?")
+        params.append(end[:length])
+    if coin:
+        sql = f"SELECT {ROLLUP_COLUMNS} FROM flow_rollups WHERE {' AND '.join(where)} ORDER BY bucket"
+    else:
+        # Across coins: add up each bucket's per-coin rows
+        sql = (
+            "SELECT bucket, SUM(fills), SUM(volume), SUM(net_notional), SUM(quantity), SUM(realized_pnl), SUM(fees) "
+            f"FROM flow_rollups WHERE {' AND '.join(where)} GROUP BY bucket ORDER BY bucket"
+        )
+    conn = connect(db_path)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    buckets = []
+    for bucket, fills, volume, net_notional, quantity, realized_pnl, fees in rows:
+        buckets.append({
+            "bucket": bucket,
+            "fills": fills,
+            "volume": volume,
+            "net_notional": net_notional,
+            "vwap": volume / quantity if coin and quantity else None,
+            "realized_pnl": realized_pnl,
+            "fees": fees,
+        })
+    return buckets
+
+
+class WatcherState:
+    """Persisted per-address state, as loaded by load_state()."""
+
+    __slots__ = ("name", "last_fill_tid", "last_fill_time_ms", "open_orders")
+
+    def __init__(self):
+        self.name: Optional[str] = None
+        self.last_fill_tid: Optional[int] = None
+        self.last_fill_time_ms: Optional[int] = None
+        self.open_orders: List[str] = []
+
+
+def load_watchlist(db_path: str) -> Dict[str, Optional[str]]:
+    """Watched address -> display name (None if unnamed), oldest first."""
+    conn = connect(db_path)
+    try:
+        return dict(conn.execute("SELECT address, name FROM watchlist ORDER BY added_at, address"))
+    finally:
+        conn.close()
+
+
+def add_to_watchlist(db_path: str, entries: Iterable[Tuple[str, Optional[str]]]):
+    """Add (address, name) pairs for the collector to pick up (blocking)."""
+    update = StateUpdate()
+    for address, name in entries:
+        update.add_address(address, name)
+    _apply_state(db_path, update)
+
+
+def remove_from_watchlist(db_path: str, addresses: Iterable[str]):
+    """Stop watching these addresses and drop their saved state (blocking)."""
+    update = StateUpdate()
+    for address in addresses:
+        update.remove_address(address)
+    _apply_state(db_path, update)
+
+
+def _apply_state(db_path: str, update: "StateUpdate"):
+    if not update:
+        return
+    conn = connect(db_path)
+    try:
+        with conn:
+            update.write(conn)
+    finally:
+        conn.close()
+
+
+def load_collectors(db_path: str) -> List[Dict]:
+    """Collector heartbeats, most recently seen first."""
+    conn = connect(db_path)
+    try:
+        conn.row_factory = sqlite3.Row
+        return [dict(row) for row in conn.execute("SELECT * FROM collectors ORDER BY last_seen DESC")]
+    finally:
+        conn.close()
+
+
+def load_state(db_path: str) -> Dict[str, WatcherState]:
+    """Watchlist, fill high-water marks and open order ids - one query per table.
+
+    Only addresses on the watchlist are returned; state rows for removed
+    addresses are ignored.
+    """
+    states: Dict[str, WatcherState] = {}
+    conn = connect(db_path)
+    try:
+        for address, name in conn.execute("SELECT address, name FROM watchlist ORDER BY added_at, address"):
+            state = states[address] = WatcherState()
+            state.name = name
+        for address, tid, time_ms in conn.execute(
+            "SELECT address, last_fill_tid, last_fill_time_ms FROM watcher_state"
+        ):
+            if address in states:
+                states[address].last_fill_tid = tid
+                states[address].last_fill_time_ms = time_ms
+        for address, oid in conn.execute("SELECT address, oid FROM open_orders"):
+            if address in states:
+                states[address].open_orders.append(oid)
+    finally:
+        conn.close()
+    return states
+
+
+class StateUpdate:
+    """Watcher state changes, written by TransactionWriter in the same commit as the rows before them.
+
+    Committing the high-water marks together with (never ahead of) the fills
+    they cover means a crash can't leave a mark pointing past unsaved fills.
+    Later updates for an address replace earlier ones, so a backlog of
+    updates collapses to one row per address.
+    """
+
+    def __init__(self):
+        self.added: Dict[str, Optional[str]] = {}  # address -> name
+        self.removed: Set[str] = set()
+        self.marks: Dict[str, Tuple[Optional[int], Optional[int]]] = {}  # address -> (tid, time_ms)
+        self.open_orders: Dict[str, List[str]] = {}
+        self.heartbeat: Optional[Tuple] = None  # collectors row
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.marks or self.open_orders or self.heartbeat)
+
+    def add_address(self, address: str, name: Optional[str] = None):
+        self.removed.discard(address)
+        self.added[address] = name
+
+    def remove_address(self, address: str):
+        self.added.pop(address, None)
+        self.marks.pop(address, None)
+        self.open_orders.pop(address, None)
+        self.removed.add(address)
+
+    def set_mark(self, address: str, tid: Optional[int], time_ms: Optional[int]):
+        self.marks[address] = (tid, time_ms)
+
+    def set_open_orders(self, address: str, oids: Iterable[str]):
+        self.open_orders[address] = list(oids)
+
+    def set_heartbeat(
+        self, collector_id: str, pid: int, started_at: float, watchers: int, mode: str, interval: float
+    ):
+        self.heartbeat = (collector_id, pid, started_at, time.time(), watchers, mode, interval)
+
+    def merge(self, other: "StateUpdate"):
+        for address in other.removed:
+            self.remove_address(address)
+        for address, name in other.added.items():
+            self.add_address(address, name)
+        self.marks.update(other.marks)
+        self.open_orders.update(other.open_orders)
+        if other.heartbeat is not None:
+            self.heartbeat = other.heartbeat
+
+    def write(self, conn: sqlite3.Connection):
+        """Apply the changes (the caller owns the transaction)."""
+        now = time.time()
+        removed = [(address,) for address in self.removed]
+        if removed:
+            conn.executemany("DELETE FROM watchlist WHERE address = ?", removed)
+            conn.executemany("DELETE FROM watcher_state WHERE address = ?", removed)
+            conn.executemany("DELETE FROM open_orders WHERE address = ?", removed)
+        if self.added:
+            conn.executemany(
+                "INSERT INTO watchlist (address, name, added_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(address) DO UPDATE SET name = COALESCE(excluded.name, name)",
+                [(address, name, now) for address, name in self.added.items()]
+            )
+        if self.marks:
+            conn.executemany(
+                "INSERT OR REPLACE INTO watcher_state (address, last_fill_tid, last_fill_time_ms, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                [(address, tid, time_ms, now) for address, (tid, time_ms) in self.marks.items()]
+            )
+        if self.open_orders:
+            conn.executemany(
+                "DELETE FROM open_orders WHERE address = ?",
+                [(address,) for address in self.open_orders]
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO open_orders (address, oid) VALUES (?, ?)",
+                [(address, oid) for address, oids in self.open_orders.items() for oid in oids]
+            )
+        if self.heartbeat is not None:
+            conn.execute("INSERT OR REPLACE INTO collectors VALUES (?, ?, ?, ?, ?, ?, ?)", self.heartbeat)
+
+
+def transaction_row(tx: Dict) -> Tuple:
+    """Column values for INSERT_TRANSACTION_SQL."""
+    return (
+        tx["timestamp"].isoformat(),
+        tx["address"],
+        tx["action"],
+        tx["coin"],
+        tx["quantity"],
+        tx["price"],
+        tx["value_usd"],
+        tx["fee"],
+        tx["tx_hash"],
+        tx["closed_pnl"],
+        tx.get("order_type", "FILLED"),
+        tx.get("tid")
+    )
+
+
+def batch_rows(batch: TransactionBatch) -> Iterator[Tuple]:
+    """INSERT_TRANSACTION_SQL values for every transaction in a batch, straight from its columns."""
+    return zip(
+        (timestamp.isoformat() for timestamp in batch.timestamps()),
+        batch.address,
+        batch.action,
+        batch.coin,
+        batch.quantity,
+        batch.price,
+        batch.value_usd,
+        batch.fee,
+        batch.tx_hash,
+        batch.closed_pnl,
+        (order_type or FILLED for order_type in batch.order_type),
+        batch.tids()
+    )
+
+
+TAIL_COLUMNS = (
+    "id, timestamp, address, action, coin, quantity, price, value_usd, fee, tx_hash, closed_pnl, order_type, tid"
+)
+
+
+def row_to_transaction(row: Tuple) -> Transaction:
+    """Transaction from a TAIL_COLUMNS row (without the leading id)."""
+    timestamp, address, action, coin, quantity, price, value_usd, fee, tx_hash, closed_pnl, order_type, tid = row
+    return Transaction(
+        time_ms=int(datetime.fromisoformat(timestamp).timestamp() * 1000),
+        address=address,
+        action=sys.intern(action),
+        coin=coin,
+        quantity=quantity or 0.0,
+        price=price or 0.0,
+        value_usd=value_usd or 0.0,
+        fee=fee or 0.0,
+        tx_hash=tx_hash,
+        closed_pnl=closed_pnl or 0.0,
+        order_type=sys.intern(order_type or FILLED),
+        tid=tid
+    )
+
+
+def batch_from_rows(rows: Iterable[Tuple]) -> TransactionBatch:
+    """TransactionBatch from TAIL_COLUMNS rows (with the leading id)."""
+    batch = TransactionBatch()
+    for row in rows:
+        batch.append(row_to_transaction(row[1:]))
+    return batch
+
+
+def tail_transactions(
+    db_path: str,
+    after_id: Optional[int] = None,
+    addresses: Optional[Iterable[str]] = None,
+    limit: int = 200
+) -> Tuple[List[Transaction], Optional[int]]:
+    """Rows written after after_id (or the latest `limit` rows when None), oldest first.
+
+    Returns the transactions and the id to pass as after_id next time.
+    Cheap to call every refresh: the id range is a rowid range scan.
+    """
+    where, params = [], []
+    if after_id is not None:
+        where.append("id > ?")
+        params.append(after_id)
+    if addresses is not None:
+        addresses = list(addresses)
+        if not addresses:
+            return [], after_id
+        where.append(f"address IN ({','.join('?' * len(addresses))})")
+        params.extend(addresses)
+    sql = f"SELECT {TAIL_COLUMNS} FROM transactions"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC LIMIT ?"
+    params.append(limit)
+
+    conn = connect(db_path)
+    try:
+        # One read snapshot, so MAX(id) can't include rows the first query missed
+        conn.execute("BEGIN")
+        rows = conn.execute(sql, params).fetchall()
+        if rows:
+            last_id = rows[0][0]
+        elif after_id is None:
+            last_id = conn.execute("SELECT MAX(id) FROM transactions").fetchone()[0]
+        else:
+            last_id = after_id
+        conn.rollback()
+    finally:
+        conn.close()
+    rows.reverse()
+    return [row_to_transaction(row[1:]) for row in rows], last_id
+
+
+def read_fills(
+    db_path: str,
+    after_id: Optional[int] = None,
+    since: Optional[str] = None,
+    limit: int = 10000,
+    until_id: Optional[int] = None
+) -> Tuple[List[Transaction], Optional[int]]:
+    """Fills with after_id < id <= until_id, in id order, none skipped (unlike tail_transactions).
+
+    With after_id None, starts at the first row stamped `since` or later
+    (or after the newest row when since is None); rows stamped before
+    `since` are skipped either way. Returns up to `limit` fills and the id
+    to pass as after_id next time; call again while a full page comes back.
+    """
+    conn = connect(db_path)
+    try:
+        if after_id is None:
+            if since is None:
+                after_id = conn.execute("SELECT MAX(id) FROM transactions").fetchone()[0] or 0
+                return [], after_id
+            first = conn.execute("SELECT MIN(id) FROM transactions WHERE timestamp >= ?", (since,)).fetchone()[0]
+            if first is None:
+                return [], conn.execute("SELECT MAX(id) FROM transactions").fetchone()[0] or 0
+            after_id = first - 1
+        sql = f"SELECT {TAIL_COLUMNS} FROM transactions WHERE id > ? AND order_type = ?"
+        params = [after_id, FILLED]
+        if since is not None:
+            sql += " AND timestamp >= ?"
+            params.append(since)
+        if until_id is not None:
+            sql += " AND id <= ?"
+            params.append(until_id)
+        # One read snapshot: a short page means every row up to MAX(id) was seen
+        conn.execute("BEGIN")
+        rows = conn.execute(sql + " ORDER BY id LIMIT ?", params + [limit]).fetchall()
+        if len(rows) < limit:
+            newest = conn.execute("SELECT MAX(id) FROM transactions").fetchone()[0] or 0
+            after_id = max(after_id, newest if until_id is None else min(newest, until_id))
+        else:
+            after_id = rows[-1][0]
+        conn.rollback()
+    finally:
+        conn.close()
+    return [row_to_transaction(row[1:]) for row in rows], after_id
+
+
+SIDES = {"BUY": (BUY, BUY_LIMIT), "SELL": (SELL, SELL_LIMIT)}
+
+# Keyset position: (timestamp, id) of the last row of the previous page
+Cursor = Tuple[str, int]
+
+
+def transaction_filters(
+    address: Optional[str] = None,
+    coin: Optional[str] = None,
+    side: Optional[str] = None,
+    order_type: Optional[str] = None,
+    min_value: Optional[float] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None
+) -> Tuple[List[str], List]:
+    """SQL conditions and parameters for the transaction filters (all optional).
+
+    side is BUY or SELL (fills and limit orders); start/end are ISO
+    timestamps, end exclusive.
+    """
+    where, params = [], []
+    if address:
+        where.append("address = ?")
+        params.append(address)
+    if coin:
+        where.append("coin = ?")
+        params.append(coin)
+    if side:
+        actions = SIDES[side.upper()]
+        where.append(f"action IN ({','.join('?' * len(actions))})")
+        params.extend(actions)
+    if order_type:
+        where.append("order_type = ?")
+        params.append(order_type)
+    if min_value:
+        where.append("value_usd >= ?")
+        params.append(min_value)
+    if start:
+        where.append("timestamp >= ?")
+        params.append(start)
+    if end:
+        where.append("timestamp < ?")
+        params.append(end)
+    return where, params
+
+
+def query_transactions(
+    db_path: str,
+    before: Optional[Cursor] = None,
+    limit: int = 50,
+    **filters
+) -> List[Tuple]:
+    """One page of TAIL_COLUMNS rows, newest first, strictly older than the `before` cursor.
+
+    Keyset pagination on (timestamp, id): each page is an index range scan
+    starting at the cursor, so page 1000 costs the same as page 1. Pass
+    the (timestamp, id) of the last row as `before` for the next page.
+    """
+    where, params = transaction_filters(**filters)
+    if before is not None:
+        where.append("(timestamp, id) < (?, ?)")
+        params.extend(before)
+    sql = f"SELECT {TAIL_COLUMNS} FROM transactions"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY timestamp DESC, id DESC LIMIT ?"
+    params.append(limit)
+    conn = connect(db_path)
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def save_transactions(db_path: str, transactions: List[Dict]):
+    """Save transactions to database in one transaction (blocking)."""
+    if not transactions:
+        return
+
+    rows = []
+    for tx in transactions:
+        try:
+            rows.append(transaction_row(tx))
+        except Exception as e:
+            logger.error(f"DB error: {e}")
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.executemany(INSERT_TRANSACTION_SQL, rows)
+    finally:
+        conn.close()
+
+
+_STOP = object()
+
+
+class TransactionWriter:
+    """Background writer thread that owns one SQLite connection.
+
+    The event loop hands over whole batches with submit(), which returns
+    immediately unless the queue is full (backpressure). Batches travel as
+    columnar TransactionBatch objects; the writer buffers them and commits
+    their rows with executemany in a single transaction once
+    batch_size rows are pending or flush_interval seconds have passed.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending_batches: int = 1000
+    ):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending_batches)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pending_rows = 0
+        self._pending_state: Optional[StateUpdate] = None  # not yet queued (queue was full)
+        self._atexit_registered = False
+
+        self.metrics = {
+            "rows_submitted": 0,
+            "rows_written": 0,
+            "rows_failed": 0,
+            "batches_written": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "last_write_ms": 0.0,
+            "max_write_ms": 0.0,
+            "total_write_ms": 0.0,
+            "max_pending_rows": 0,
+            "backpressure_waits": 0,
+            "backpressure_wait_s": 0.0,
+            "state_updates": 0,
+            "errors": 0,
+        }
+
+    @property
+    def pending_rows(self) -> int:
+        return self._pending_rows
+
+    def start(self):
+        """Start the writer thread (submit() does this on demand)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+            self._thread.start()
+            if not self._atexit_registered:
+                atexit.register(self.stop)
+                self._atexit_registered = True
+
+    def submit(self, transactions: Iterable, timeout: Optional[float] = None) -> bool:
+        """Queue a batch (a TransactionBatch or records) for writing; blocks only while the queue is full.
+
+        For threads (the shard parent, tools); code on the event loop uses submit_async().
+        """
+        batch = self._batch(transactions)
+        if not batch:
+            return True
+        self.start()
+
+        with self._lock:
+            self._pending_rows += len(batch)
+            self.metrics["rows_submitted"] += len(batch)
+            self.metrics["max_pending_rows"] = max(self.metrics["max_pending_rows"], self._pending_rows)
+        try:
+            self._queue.put_nowait(batch)
+            self._put_state()
+            return True
+        except queue.Full:
+            pass
+
+        # Backpressure: the writer is behind, so the producer has to wait
+        self.metrics["backpressure_waits"] += 1
+        started = time.monotonic()
+        try:
+            self._queue.put(batch, timeout=timeout)
+            self._put_state()
+            return True
+        except queue.Full:
+            with self._lock:
+                self._pending_rows -= len(batch)
+            self.metrics["rows_failed"] += len(batch)
+            logger.error(f"DB writer queue full - dropped {len(batch)} rows")
+            return False
+        finally:
+            self.metrics["backpressure_wait_s"] += time.monotonic() - started
+
+    def _batch(self, transactions: Iterable) -> TransactionBatch:
+        """Columnar copy of the records; ones that can't be converted are logged and counted as failed."""
+        if isinstance(transactions, TransactionBatch):
+            return transactions
+        batch = TransactionBatch()
+        for tx in transactions:
+            try:
+                batch.append(tx)
+            except Exception as e:
+                self.metrics["rows_failed"] += 1
+                logger.error(f"DB error: {e} | Transaction: {tx}")
+        return batch
+
+    async def submit_async(self, transactions: Iterable) -> bool:
+        """Like submit(), but waits for queue space in a thread instead of blocking the loop."""
+        if not transactions:
+            return True
+        if not self._queue.full():
+            return self.submit(transactions)
+        return await asyncio.to_thread(self.submit, transactions)
+
+    def submit_state(self, update: StateUpdate):
+        """Queue watcher state; it is committed with the next batch of rows (never before them).
+
+        Never blocks: if the queue is full the update is held, merged with
+        later ones, and queued behind the next batch (or by flush/stop).
+        """
+        if not update:
+            return
+        self.start()
+        self.metrics["state_updates"] += 1
+        with self._lock:
+            if self._pending_state is None:
+                self._pending_state = update
+            else:
+                self._pending_state.merge(update)
+        self._put_state()
+
+    def _put_state(self, block: bool = False):
+        """Queue the held state update, if any, keeping it if the queue is full."""
+        with self._lock:
+            update, self._pending_state = self._pending_state, None
+        if update is None:
+            return
+        try:
+            self._queue.put(update, block=block)
+        except queue.Full:
+            with self._lock:
+                if self._pending_state is not None:
+                    update.merge(self._pending_state)
+                self._pending_state = update
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until everything submitted so far is committed."""
+        if self._thread is None or not self._thread.is_alive():
+            return self._pending_rows == 0
+        self._put_state(block=True)
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def stop(self, timeout: float = 10.0):
+        """Flush pending rows and stop the writer thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self._put_state(block=True)
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        if thread.is_alive():
+            logger.error(f"DB writer did not stop within {timeout}s ({self._pending_rows} rows pending)")
+
+    def stats(self) -> Dict:
+        stats = dict(self.metrics)
+        stats["pending_rows"] = self._pending_rows
+        stats["queue_depth"] = self._queue.qsize()
+        batches = stats["batches_written"]
+        stats["avg_batch_size"] = stats["rows_written"] / batches if batches else 0.0
+        stats["avg_write_ms"] = stats["total_write_ms"] / batches if batches else 0.0
+        return stats
+
+    def _run(self):
+        conn = connect(self.db_path, check_same_thread=False)
+        buffer: List[TransactionBatch] = []
+        buffered = 0
+        state = StateUpdate()
+        deadline: Optional[float] = None
+        try:
+            while True:
+                timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    item = None
+
+                if item is _STOP:
+                    self._write(conn, buffer, state)
+                    return
+                if isinstance(item, threading.Event):
+                    self._write(conn, buffer, state)
+                    buffer, buffered, state, deadline = [], 0, StateUpdate(), None
+                    item.set()
+                    continue
+                if isinstance(item, StateUpdate):
+                    state.merge(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                elif item:
+                    buffer.append(item)
+                    buffered += len(item)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+
+                pending = buffer or state
+                if buffered >= self.batch_size or (pending and time.monotonic() >= deadline):
+                    self._write(conn, buffer, state)
+                    buffer, buffered, state, deadline = [], 0, StateUpdate(), None
+        finally:
+            conn.close()
+
+    def _write(self, conn: sqlite3.Connection, buffer: List[TransactionBatch], state: Optional[StateUpdate] = None):
+        if not buffer and not state:
+            return
+
+        rows = [row for batch in buffer for row in batch_rows(batch)]
+        submitted = len(rows)
+
+        started = time.monotonic()
+        try:
+            with conn:
+                if rows:
+                    # Under the write lock, so ids past this are exactly the rows inserted here
+                    conn.execute("BEGIN IMMEDIATE")
+                    before = conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+                    conn.executemany(INSERT_TRANSACTION_SQL, rows)
+                    update_rollups(conn, before)
+                if state:
+                    state.write(conn)
+        except sqlite3.Error as e:
+            self.metrics["errors"] += 1
+            metrics.DB_WRITE_ERRORS.inc()
+            self.metrics["rows_failed"] += len(rows)
+            logger.error(f"DB error writing batch of {len(rows)}: {e}")
+            rows = []
+        elapsed_ms = (time.monotonic() - started) * 1000
+        metrics.DB_WRITE_SECONDS.observe(elapsed_ms / 1000)
+        if buffer:
+            # State-only writes aren't batches of rows
+            metrics.DB_BATCH_ROWS.observe(len(rows))
+            with self._lock:
+                self._pending_rows -= submitted
+            self.metrics["rows_written"] += len(rows)
+            self.metrics["batches_written"] += 1
+            self.metrics["last_batch_size"] = len(rows)
+            self.metrics["max_batch_size"] = max(self.metrics["max_batch_size"], len(rows))
+            self.metrics["total_write_ms"] += elapsed_ms  # avg_write_ms is per batch
+        self.metrics["last_write_ms"] = elapsed_ms
+        self.metrics["max_write_ms"] = max(self.metrics["max_write_ms"], elapsed_ms)
@@ -0,0 +1,276 @@
+import asyncio
+import json
+import logging
+import random
+from typing import Callable, Dict, List, Optional, Set
+
+import aiohttp
+
+from decoding import loads
+
+logger = logging.getLogger(__name__)
+
+WS_URL = "wss://api.hyperliquid.xyz/ws"
+
+# Hyperliquid caps user-specific subscriptions at 10 unique users per IP;
+# watchers beyond this keep being polled over REST.
+MAX_STREAM_USERS = 10
+
+
+class HyperliquidStream:
+    """Streams userFills and orderUpdates for many watchers over one WebSocket.
+
+    Events go through the owning watcher's process_fills/process_order_updates,
+    so downstream consumers get exactly the dicts the polling path produces.
+    On every (re)connect all users are resubscribed; the userFills snapshot that
+    follows is deduplicated by the watcher, and open orders are reconciled with
+    one REST openOrders call per streamed user. Order updates that can't be
+    attributed to a user also ask for a reconcile; those requests are
+    coalesced into one pending run, at most one per reconcile_interval.
+    """
+
+    def __init__(
+        self,
+        scraper,
+        url: str = WS_URL,
+        max_users: int = MAX_STREAM_USERS,
+        ping_interval: float = 30.0,
+        reconnect_delay: float = 1.0,
+        max_reconnect_delay: float = 60.0,
+        reconcile_interval: float = 5.0
+    ):
+        self.scraper = scraper
+        self.url = url
+        self.max_users = max_users
+        self.ping_interval = ping_interval
+        self.reconnect_delay = reconnect_delay
+        self.max_reconnect_delay = max_reconnect_delay
+        self.reconcile_interval = reconcile_interval
+
+        self.subscribed: Set[str] = set()
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._on_transactions: Optional[Callable[[List[Dict]], None]] = None
+        # oid -> address, to attribute orderUpdates (which carry no user field)
+        self._oid_owner: Dict[str, str] = {}
+        self._reconcile_task: Optional[asyncio.Task] = None
+        self._reconcile_wanted = False
+        self._last_reconcile: Optional[float] = None  # loop time of the last snapshot
+
+        self.stats = {
+            "connects": 0,
+            "reconnects": 0,
+            "messages": 0,
+            "fills": 0,
+            "order_updates": 0,
+            "reconciliations": 0,
+            "reconcile_requests": 0,
+        }
+
+    def streamed_addresses(self) -> List[str]:
+        """Addresses handled by the stream (the first max_users watchers)."""
+        return list(self.scraper.watchers.keys())[:self.max_users]
+
+    def polled_watchers(self) -> List:
+        """Watchers over the subscription cap, which still need REST polling."""
+        return list(self.scraper.watchers.values())[self.max_users:]
+
+    async def run(self, on_transactions: Optional[Callable[[List[Dict]], None]] = None):
+        """Connect, subscribe and dispatch events until the scraper stops."""
+        self._on_transactions = on_transactions
+        delay = self.reconnect_delay
+
+        while self.scraper.is_running:
+            session = await self.scraper.get_session()
+            try:
+                async with session.ws_connect(self.url, heartbeat=None) as ws:
+                    self._ws = ws
+                    self.subscribed = set()
+                    if self.stats["connects"]:
+                        self.stats["reconnects"] += 1
+                        logger.info("🔌 Stream reconnected - resubscribing")
+                    else:
+                        logger.info(f"🔌 Stream connected: {self.url}")
+                    self.stats["connects"] += 1
+
+                    await self.sync_subscriptions()
+                    await self.reconcile_open_orders()
+                    delay = self.reconnect_delay
+
+                    keepalive = asyncio.create_task(self._keepalive(ws))
+                    try:
+                        async for msg in ws:
+                            if msg.type == aiohttp.WSMsgType.TEXT:
+                                await self._handle_message(msg.data)
+                            elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                                break
+                            if not self.scraper.is_running:
+                                break
+                    finally:
+                        keepalive.cancel()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Stream connection failed: {e}")
+            finally:
+                self._ws = None
+
+            if self.scraper.is_running:
+                # Jittered exponential backoff between reconnect attempts
+                wait_time = random.uniform(delay / 2, delay)
+                logger.info(f"Stream disconnected, reconnecting in {wait_time:.1f}s")
+                await asyncio.sleep(wait_time)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    async def close(self):
+        """Close the WebSocket (run() returns once the scraper stops)."""
+        if self._reconcile_task is not None:
+            self._reconcile_task.cancel()
+            await asyncio.gather(self._reconcile_task, return_exceptions=True)
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.close()
+
+    async def _keepalive(self, ws: aiohttp.ClientWebSocketResponse):
+        """Ping the server and pick up watchlist changes."""
+        ticks = 0
+        while not ws.closed:
+            await asyncio.sleep(1)
+            ticks += 1
+            await self.sync_subscriptions()
+            if ticks >= self.ping_interval:
+                ticks = 0
+                await ws.send_str(json.dumps({"method": "ping"}))
+
+    async def sync_subscriptions(self):
+        """Subscribe new watchers and unsubscribe removed ones."""
+        ws = self._ws
+        if ws is None or ws.closed:
+            return
+
+        wanted = set(self.streamed_addresses())
+        for address in wanted - self.subscribed:
+            for sub_type in ("userFills", "orderUpdates"):
+                await ws.send_str(json.dumps({
+                    "method": "subscribe",
+                    "subscription": {"type": sub_type, "user": address}
+                }))
+            self.subscribed.add(address)
+        for address in self.subscribed - wanted:
+            for sub_type in ("userFills", "orderUpdates"):
+                await ws.send_str(json.dumps({
+                    "method": "unsubscribe",
+                    "subscription": {"type": sub_type, "user": address}
+                }))
+            self.subscribed.discard(address)
+
+    async def reconcile_open_orders(self):
+        """Bring open-order state in line with a REST snapshot (missed while disconnected)."""
+        self.stats["reconciliations"] += 1
+        self._last_reconcile = asyncio.get_running_loop().time()
+        session = await self.scraper.get_session()
+        watchers = [
+            self.scraper.watchers[address]
+            for address in self.subscribed
+            if address in self.scraper.watchers
+        ]
+        snapshots = await asyncio.gather(
+            *(watcher.fetch_open_orders(session) for watcher in watchers),
+            return_exceptions=True
+        )
+
+        transactions = []
+        for watcher, orders in zip(watchers, snapshots):
+            if isinstance(orders, Exception):
+                logger.error(f"Open order reconciliation failed: {orders}")
+                continue
+            if orders is None:
+                continue  # fetch failed; keep the streamed state
+            for order in orders:
+                self._oid_owner[str(order.get('oid', ''))] = watcher.address
+            transactions.extend(watcher.process_open_orders(orders))
+        await self._emit(transactions)
+
+    async def _handle_message(self, raw: str):
+        try:
+            message = loads(raw)
+        except ValueError:
+            logger.error(f"Invalid stream message: {raw[:200]}")
+            return
+
+        self.stats["messages"] += 1
+        channel = message.get("channel")
+        data = message.get("data")
+
+        if channel == "userFills":
+            await self._handle_fills(data)
+        elif channel == "orderUpdates":
+            await self._handle_order_updates(data)
+        elif channel == "error":
+            logger.error(f"Stream error: {data}")
+
+    async def _handle_fills(self, data: Dict):
+        address = str(data.get("user", "")).lower()
+        watcher = self.scraper.watchers.get(address)
+        if watcher is None:
+            return
+
+        fills = data.get("fills", [])
+        self.stats["fills"] += len(fills)
+        await self._emit(watcher.process_fills(fills))
+
+    async def _handle_order_updates(self, updates: List[Dict]):
+        if not isinstance(updates, list):
+            return
+        self.stats["order_updates"] += len(updates)
+
+        by_address: Dict[str, List[Dict]] = {}
+        unattributed = 0
+        only_user = next(iter(self.subscribed)) if len(self.subscribed) == 1 else None
+        for update in updates:
+            oid = str(update.get("order", {}).get("oid", ""))
+            address = str(update.get("user", "")).lower() or self._oid_owner.get(oid) or only_user
+            if not address:
+                unattributed += 1
+                continue
+            if update.get("status") == "open":
+                self._oid_owner[oid] = address
+            else:
+                self._oid_owner.pop(oid, None)
+            by_address.setdefault(address, []).append(update)
+
+        transactions = []
+        for address, address_updates in by_address.items():
+            watcher = self.scraper.watchers.get(address)
+            if watcher is not None:
+                transactions.extend(watcher.process_order_updates(address_updates))
+        await self._emit(transactions)
+
+        # Order updates don't say which user they belong to; when we can't tell,
+        # fall back to a REST snapshot of the streamed users
+        if unattributed:
+            self._request_reconcile()
+
+    def _request_reconcile(self):
+        """Ask for a reconcile; requests coalesce into one pending task."""
+        self.stats["reconcile_requests"] += 1
+        self._reconcile_wanted = True
+        if self._reconcile_task is None or self._reconcile_task.done():
+            self._reconcile_task = asyncio.create_task(self._reconcile_when_due())
+
+    async def _reconcile_when_due(self):
+        # Requests made while a snapshot is in flight may postdate it, so loop for them
+        loop = asyncio.get_running_loop()
+        while self._reconcile_wanted and self.scraper.is_running:
+            if self._last_reconcile is not None:
+                wait_time = self._last_reconcile + self.reconcile_interval - loop.time()
+                if wait_time > 0:
+                    await asyncio.sleep(wait_time)
+            self._reconcile_wanted = False
+            try:
+                await self.reconcile_open_orders()
+            except Exception as e:
+                logger.error(f"Open order reconciliation failed: {e}")
+
+    async def _emit(self, transactions: List[Dict]):
+        if not transactions:
+            return
+        await self.scraper._save_transactions(transactions)
+        if self._on_transactions is not None:
+            self._on_transactions(transactions)
@@ -0,0 +1,110 @@
+import sqlite3
+import time
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import archive
+from archive import Compactor, history_page
+from records import Transaction
+from store import init_db, query_rollups, save_transactions
+
+ADDRESS = "0x" + "cd" * 20
+DAY_MS = 86_400_000
+
+
+def fills(days_ago, count=3):
+    start = int(time.time() * 1000) - days_ago * DAY_MS
+    return [
+        Transaction(time_ms=start + i * 1000, address=ADDRESS, action="BUY", coin="ETH",
+                    quantity=1.0, price=2000.0, tx_hash="0x" + "%064x" % (days_ago * 100 + i),
+                    tid=days_ago * 100 + i)
+        for i in range(count)
+    ]
+
+
+def make_store(tmp_path, days=(40, 41, 42, 1)):
+    db_path = str(tmp_path / "store.db")
+    init_db(db_path)
+    for days_ago in days:
+        save_transactions(db_path, fills(days_ago))
+    return db_path
+
+
+def count(db_path, sql):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(sql).fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_refetched_archived_fills_are_not_stored_again(tmp_path):
+    db_path = make_store(tmp_path, days=(40, 1))
+    assert Compactor(db_path, hot_days=30).compact_once() == 3
+    volume = sum(bucket["volume"] for bucket in query_rollups(db_path, "1d"))
+
+    # A cold start sees the archived fills in the API's history again
+    save_transactions(db_path, fills(40) + fills(1))
+
+    assert count(db_path, "SELECT COUNT(*) FROM transactions") == 3
+    assert sum(bucket["volume"] for bucket in query_rollups(db_path, "1d")) == volume
+
+
+def test_archive_keys_are_indexed_for_older_archives(tmp_path):
+    db_path = make_store(tmp_path, days=(40,))
+    Compactor(db_path, hot_days=30).compact_once()
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("DELETE FROM archived_keys")
+    conn.close()
+
+    Compactor(db_path, hot_days=30)
+    assert count(db_path, "SELECT COUNT(*) FROM archived_keys") == 3
+
+
+def test_history_page_reads_only_days_in_range(tmp_path, monkeypatch):
+    db_path = make_store(tmp_path)
+    Compactor(db_path, hot_days=30).compact_once()
+    read = []
+    real_read_day = archive._read_day
+
+    def read_day(archive_dir, paths, *args, **kwargs):
+        read.extend(paths)
+        return real_read_day(archive_dir, paths, *args, **kwargs)
+
+    monkeypatch.setattr(archive, "_read_day", read_day)
+    day = fills(41)[0]["timestamp"].date().isoformat()
+    page, cursor = history_page(db_path, start=day, end=day + "T23:59:59.999999", address="0xnobody")
+    assert page == [] and cursor is None
+    assert all(path.startswith(f"day={day}") for path in read)
+
+
+def test_archived_keys_past_the_refetch_horizon_are_pruned(tmp_path):
+    db_path = make_store(tmp_path, days=(100, 40, 1))
+    compactor = Compactor(db_path, hot_days=30, key_days=90)
+    assert compactor.compact_once() == 6
+
+    # Both days are archived, but only the 40-day-old keys are still kept
+    conn = sqlite3.connect(db_path)
+    try:
+        tids = sorted(row[0] for row in conn.execute("SELECT tid FROM archived_keys"))
+    finally:
+        conn.close()
+    assert tids == [4000, 4001, 4002]
+    assert compactor.stats["keys_pruned"] == 3
+
+
+def test_v3_archived_keys_are_rebuilt_with_timestamps(tmp_path):
+    db_path = make_store(tmp_path, days=(40,))
+    Compactor(db_path, hot_days=30).compact_once()
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("UPDATE archived_keys SET timestamp = NULL")
+        conn.execute("PRAGMA user_version = 3")
+    conn.close()
+
+    init_db(db_path)
+    Compactor(db_path, hot_days=30)
+    assert count(db_path, "SELECT COUNT(*) FROM archived_keys WHERE timestamp IS NOT NULL") == 3
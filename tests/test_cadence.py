@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+import cadence
+from cadence import CATCH_UP, SHED, SKIP, AdaptiveCadence, FixedRateTicker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, delay):
+        self.now += delay
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cadence.time, "monotonic", clock.monotonic)
+    monkeypatch.setattr(cadence.asyncio, "sleep", clock.sleep)
+    return clock
+
+
+def run_cycles(ticker, clock, durations):
+    """Tick once per duration; returns (lag, skipped) per tick."""
+    async def main():
+        ticks = []
+        for duration in durations:
+            lag = await ticker.wait()
+            clock.now += duration
+            ticks.append((round(lag, 6), ticker.complete()))
+        return ticks
+    return asyncio.run(main())
+
+
+def test_ticks_stay_on_the_grid(clock):
+    ticker = FixedRateTicker(10, overrun=SKIP)
+    start = clock.now
+    run_cycles(ticker, clock, [3, 4, 2])
+    # Cycle time doesn't add to the interval
+    assert ticker._next == start + 30
+    assert ticker.overruns == 0
+
+
+def test_skip_drops_missed_ticks(clock):
+    ticker = FixedRateTicker(10, overrun=SKIP)
+    start = clock.now
+    ticks = run_cycles(ticker, clock, [25, 1])
+    assert ticks[0][1] == 2  # ticks due at +10 and +20 were dropped
+    assert ticks[1] == (0.0, 0)  # the next one fires on time, on the grid
+    assert clock.now == start + 31
+    assert ticker.skipped == 2
+
+
+def test_catch_up_runs_missed_ticks_back_to_back(clock):
+    ticker = FixedRateTicker(10, overrun=CATCH_UP, max_catch_up=1)
+    ticks = run_cycles(ticker, clock, [25, 1, 1])
+    assert ticks[0][1] == 1  # one of the two missed ticks is kept
+    assert ticks[1][0] == 5.0  # and runs straight away, late
+    assert ticker.skipped == 1
+
+
+def test_shed_shrinks_and_regrows_the_share_checked(clock):
+    ticker = FixedRateTicker(10, overrun=SHED, min_shed_fraction=0.1)
+    run_cycles(ticker, clock, [30])
+    assert ticker.shed_fraction == pytest.approx(0.3)
+    assert ticker.shed_count(100) == 30
+    run_cycles(ticker, clock, [1])
+    assert ticker.shed_fraction == 1.0
+    assert ticker.shed_count(100) == 100
+
+
+def test_wait_returns_none_when_stopped(clock):
+    async def main():
+        ticker = FixedRateTicker(10)
+        stop = asyncio.Event()
+        await ticker.wait(stop)
+        stop.set()
+        return await ticker.wait(stop), ticker.ticks
+    assert asyncio.run(main()) == (None, 1)
+
+
+def test_unknown_overrun_policy_is_rejected():
+    with pytest.raises(ValueError):
+        FixedRateTicker(10, overrun="drop")
+
+
+def test_adaptive_cadence_backs_off_and_snaps_back():
+    schedule = AdaptiveCadence(min_interval=10, max_interval=40, decay=2)
+    schedule.schedule("a", deadline=0)
+    assert schedule.record("a", active=False, open_orders=0, now=0) == 20
+    assert schedule.record("a", active=False, open_orders=0, now=20) == 40
+    assert schedule.record("a", active=False, open_orders=0, now=60) == 40
+    assert schedule.reschedule("a", now=100) == 40
+    assert schedule.record("a", active=True, open_orders=1, now=140) == 10
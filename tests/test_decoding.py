@@ -0,0 +1,61 @@
+import json
+
+import decoding
+from decoding import decode_fills, fill_marks
+from dedupe import RecentIdWindow
+
+
+def fill(tid, time_ms):
+    return {"coin": "BTC", "px": "94000.0", "sz": "0.1", "side": "B", "time": time_ms, "tid": tid}
+
+
+def payload(*fills):
+    return json.dumps(list(fills)).encode()
+
+
+def window_with(*fills):
+    window = RecentIdWindow()
+    for f in fills:
+        window.add(f["tid"], f["time"])
+    return window
+
+
+def test_nothing_new_is_never_parsed(monkeypatch):
+    old, last = fill(10, 1000), fill(11, 2000)
+    window = window_with(old, last)
+
+    def fail(raw):
+        raise AssertionError("payload was parsed")
+
+    monkeypatch.setattr(decoding, "loads", fail)
+    assert decode_fills(payload(last, old), 2000, window.seen) == []
+    # The same after a restart, when only the persisted watermark is known
+    restarted = RecentIdWindow()
+    restarted.restore(11, 2000)
+    assert decode_fills(payload(last, old), 2000, restarted.seen) == []
+
+
+def test_some_new_keeps_fills_at_or_after_the_mark():
+    old, last = fill(10, 1000), fill(11, 2000)
+    same_ms, later = fill(12, 2000), fill(13, 3000)
+    window = window_with(old, last)
+
+    fills = decode_fills(payload(later, same_ms, last, old), 2000, window.seen)
+    # The mark's own fill comes back too; the dedupe window drops it
+    assert [f["tid"] for f in fills] == [13, 12, 11]
+    assert [f["tid"] for f in fills if window.add(f["tid"], f["time"])] == [13, 12]
+
+
+def test_unordered_payload_is_judged_by_every_fill():
+    # The new fill is neither first nor last, and has a lower tid than the mark
+    last = fill(50, 2000)
+    window = window_with(last)
+    raw = payload(fill(40, 1000), fill(45, 2500), last, fill(30, 500))
+
+    assert fill_marks(raw) == [(1000, 40), (2500, 45), (2000, 50), (500, 30)]
+    assert [f["tid"] for f in decode_fills(raw, 2000, window.seen)] == [45, 50]
+
+
+def test_no_mark_decodes_everything():
+    raw = payload(fill(2, 2000), fill(1, 1000))
+    assert len(decode_fills(raw)) == 2
@@ -0,0 +1,48 @@
+from dedupe import RecentIdWindow, id_key
+
+
+def test_duplicates_are_rejected():
+    window = RecentIdWindow(max_items=10, window_ms=None)
+    assert window.add(1, 1000)
+    assert not window.add(1, 1000)
+    assert window.stats()["duplicates"] == 1
+
+
+def test_count_bound_evicts_oldest_into_watermark():
+    window = RecentIdWindow(max_items=3, window_ms=None)
+    for tid in range(1, 6):
+        assert window.add(tid, tid * 1000)
+    assert len(window) == 3
+    assert window.evictions == 2
+    assert (window.floor_key, window.floor_time) == (2, 2000)
+    # Evicted ids are still recognised through the watermark
+    assert not window.add(1, 1000)
+    assert not window.add(2, 2000)
+    assert window.floor_hits == 2
+    # Newer ids are not
+    assert window.add(6, 6000)
+
+
+def test_time_window_evicts_old_ids():
+    window = RecentIdWindow(max_items=100, window_ms=10_000)
+    window.add(1, 1_000)
+    window.add(2, 5_000)
+    window.add(3, 12_000)  # 1 is now older than the window
+    assert 1 not in window and 2 in window and 3 in window
+    assert window.floor_key == 1
+    window.add(4, 30_000)
+    assert len(window) == 1
+    assert window.floor_key == 3
+
+
+def test_restore_starts_from_watermark():
+    window = RecentIdWindow(max_items=10)
+    window.restore(100, 50_000)
+    assert not window.add(99, 49_000)
+    assert not window.add(100, 50_000)
+    assert window.add(101, 51_000)
+
+
+def test_id_key_falls_back_to_hash():
+    assert id_key("42") == 42
+    assert id_key("abc") == hash("abc")
@@ -0,0 +1,94 @@
+import random
+import time
+
+import pytest
+
+from records import Transaction
+from store import BUY, SELL, init_db, query_transactions, save_transactions
+
+ADDRESSES = ["0x" + "11" * 20, "0x" + "22" * 20]
+DAY_MS = 86_400_000
+
+
+def make_store(tmp_path, count=230):
+    """A store whose rows share timestamps in runs of three, inserted out of time order."""
+    db_path = str(tmp_path / "history.db")
+    init_db(db_path)
+    start = int(time.time() * 1000) - 60 * DAY_MS
+    txs = [
+        Transaction(time_ms=start + (i // 3) * 43_200_000, address=ADDRESSES[i % 2],
+                    action=BUY if i % 5 else SELL, coin="ETH" if i % 4 else "BTC",
+                    quantity=1.0, price=float(100 + i), tid=i + 1)
+        for i in range(count)
+    ]
+    random.Random(1).shuffle(txs)
+    save_transactions(db_path, txs)
+    return db_path
+
+
+def all_pages(fetch, limit):
+    rows, cursor = [], None
+    while True:
+        page = fetch(cursor, limit)
+        rows.extend(page)
+        if len(page) < limit:
+            return rows
+        cursor = (page[-1][1], page[-1][0])
+
+
+def test_pages_cover_every_row_once_in_order(tmp_path):
+    db_path = make_store(tmp_path)
+    rows = all_pages(lambda before, limit: query_transactions(db_path, before, limit), 50)
+    ids = [row[0] for row in rows]
+    assert len(ids) == len(set(ids)) == 230
+    keys = [(row[1], row[0]) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_pages_apply_filters(tmp_path):
+    db_path = make_store(tmp_path)
+    filters = {"address": ADDRESSES[0], "side": "SELL", "min_value": 150}
+    rows = all_pages(lambda before, limit: query_transactions(db_path, before, limit, **filters), 7)
+    expected = query_transactions(db_path, None, 1000, **filters)
+    assert rows == expected
+    assert rows and all(row[2] == ADDRESSES[0] and row[3] == SELL and row[7] >= 150 for row in rows)
+
+
+def test_history_page_merges_archive_and_store(tmp_path):
+    pytest.importorskip("pyarrow")
+    from archive import Compactor, history_page
+
+    db_path = make_store(tmp_path)
+    expected = query_transactions(db_path, None, 1000, coin="ETH")
+    # Roughly the older half moves to Parquet
+    assert 0 < Compactor(db_path, hot_days=45).compact_once() < 230
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = history_page(db_path, cursor, 40, coin="ETH")
+        seen.extend(page)
+        if cursor is None:
+            break
+    # Same rows, same order as before the oldest days moved to Parquet
+    assert [tx.tid for tx in seen] == [row[12] for row in expected]
+
+
+def test_history_page_skips_the_archive_under_a_full_newer_page(tmp_path, monkeypatch):
+    pytest.importorskip("pyarrow")
+    import archive
+    from archive import Compactor, history_page
+
+    db_path = make_store(tmp_path)
+    Compactor(db_path, hot_days=45).compact_once()
+    reads = []
+    read_day = archive._read_day
+    monkeypatch.setattr(archive, "_read_day", lambda *args, **kwargs: reads.append(args[1]) or read_day(*args, **kwargs))
+
+    page, cursor = history_page(db_path, None, 40, coin="ETH")
+    # The whole page is newer than the newest archived day
+    assert len(page) == 40 and cursor is not None
+    assert reads == []
+
+    while cursor is not None:
+        page, cursor = history_page(db_path, cursor, 40, coin="ETH")
+    assert reads
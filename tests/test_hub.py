@@ -0,0 +1,110 @@
+import time
+
+from hub import TransactionHub
+from records import BUY, SELL, Transaction
+from store import TransactionWriter, init_db, load_watchlist
+
+WHALES = ["0x" + "11" * 20, "0x" + "22" * 20, "0x" + "33" * 20]
+HOUR_MS = 3_600_000
+
+
+def fill(address, hours_ago, tid, action=BUY, coin="ETH"):
+    return Transaction(int(time.time() * 1000) - int(hours_ago * HOUR_MS), address, action, coin,
+                       1.0, 2000.0, fee=0.5, closed_pnl=10.0, tid=tid)
+
+
+def write(db_path, transactions):
+    writer = TransactionWriter(db_path, flush_interval=0.01)
+    writer.submit(transactions)
+    assert writer.flush()
+    writer.stop()
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.02)
+
+
+def test_aggregates_are_all_time_whenever_the_hub_starts(tmp_path):
+    db_path = str(tmp_path / "hub.db")
+    init_db(db_path)
+    write(db_path, [
+        fill(WHALES[0], 72, 1), fill(WHALES[0], 71, 2, SELL), fill(WHALES[1], 70, 3, coin="BTC"),
+        fill(WHALES[0], 0.75, 4), fill(WHALES[1], 0.5, 5, SELL),
+    ])
+
+    hub = TransactionHub(db_path, poll_interval=0.05)
+    try:
+        wait_for(lambda: hub._fills_id is not None)
+        flow = hub.aggregates.snapshot()
+        # Totals come from the rollups; only the windows are limited to recent fills
+        assert flow["fills"] == 5 and flow["fills_24h"] == 2 and flow["fills_1h"] == 2
+        assert flow["volume"] == 10000.0 and flow["volume_24h"] == 4000.0
+        assert flow["buy_volume"] == 6000.0 and flow["realized_pnl"] == 50.0 and flow["fees"] == 2.5
+        assert hub.aggregates.address(WHALES[0])["fills"] == 3
+        assert hub.aggregates.coin("BTC")["fills"] == 1
+
+        # New fills are added once, to the totals and the windows
+        write(db_path, [fill(WHALES[1], 0, 6)])
+        wait_for(lambda: hub.aggregates.snapshot()["fills"] == 6)
+        assert hub.aggregates.snapshot()["fills_1h"] == 3
+        assert hub.aggregates.address(WHALES[1])["fills"] == 3
+    finally:
+        hub.close()
+
+
+def test_each_session_gets_only_its_addresses(tmp_path):
+    db_path = str(tmp_path / "fanout.db")
+    init_db(db_path)
+    write(db_path, [fill(WHALES[0], 0, 1), fill(WHALES[1], 0, 2)])
+
+    hub = TransactionHub(db_path, poll_interval=0.05)
+    try:
+        # A new session starts with the recent transactions it shows
+        first = hub.subscribe([WHALES[0]])
+        both = hub.subscribe(WHALES[:2])
+        paused = hub.subscribe([WHALES[1]])
+        paused.paused = True
+        assert [tx.tid for tx in first.drain()] == [1]
+        assert [tx.tid for tx in both.drain()] == [1, 2]
+        paused.drain()
+
+        write(db_path, [fill(WHALES[0], 0, 3), fill(WHALES[1], 0, 4), fill(WHALES[2], 0, 5)])
+        received = {first.id: [], both.id: []}
+
+        def drained():
+            for sub in (first, both):
+                received[sub.id].extend(tx.tid for tx in sub.drain())
+            return len(received[both.id]) >= 2
+
+        wait_for(drained)
+        time.sleep(0.2)
+        drained()
+        assert received == {first.id: [3], both.id: [3, 4]}
+        assert paused.drain() == []
+    finally:
+        hub.close()
+
+
+def test_address_leaves_the_watchlist_with_its_last_session(tmp_path):
+    db_path = str(tmp_path / "refs.db")
+    hub = TransactionHub(db_path, poll_interval=60)
+    try:
+        first, second = hub.subscribe(), hub.subscribe()
+        hub.watch(first, [(WHALES[0], "whale")])
+        hub.watch(second, [(WHALES[0], None), (WHALES[1], None)])
+        assert hub.subscribers(WHALES[0]) == 2
+
+        # Another session still shows it, so it stays watched
+        assert hub.release(first, [WHALES[0]]) == []
+        assert hub.subscribers(WHALES[0]) == 1
+        assert load_watchlist(db_path) == {WHALES[0]: "whale", WHALES[1]: None}
+
+        assert hub.release(second, [WHALES[0]]) == [WHALES[0]]
+        assert hub.subscribers(WHALES[0]) == 0
+        assert load_watchlist(db_path) == {WHALES[1]: None}
+        assert WHALES[0] not in hub.watchlist and second.addresses == {WHALES[1]}
+    finally:
+        hub.close()
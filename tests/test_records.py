@@ -0,0 +1,50 @@
+import pickle
+import sqlite3
+from datetime import datetime
+
+from records import BUY, LIMIT_OPEN, SELL, Transaction, TransactionBatch
+from store import TAIL_COLUMNS, TransactionWriter, batch_from_rows, init_db
+
+USER = "0x" + "ab" * 20
+
+
+def make_records():
+    return [
+        Transaction(1735689600123, USER, BUY, "BTC", 0.5, 94000.0, fee=1.2, tx_hash="0x01", tid=7),
+        Transaction(1735689601456, USER, SELL, "ETH", 2.0, 3300.0, closed_pnl=-15.5, tx_hash="0x02", tid=8),
+        Transaction(1735689602789, USER, "BUY LIMIT", "SOL", 10.0, 190.0, order_type=LIMIT_OPEN),
+    ]
+
+
+def test_batch_round_trips_records():
+    records = make_records()
+    batch = TransactionBatch.from_records(records)
+
+    assert len(batch) == 3
+    assert list(batch) == records
+    assert batch.tids() == [7, 8, None]
+    assert list(pickle.loads(pickle.dumps(batch))) == records
+
+    # Old-style dicts convert too, to the same record
+    legacy = dict(records[0].items(), tid=7)
+    assert TransactionBatch.from_records([legacy]).record(0) == records[0]
+
+
+def test_batch_round_trips_through_the_writer(tmp_path):
+    db_path = str(tmp_path / "batch.db")
+    init_db(db_path)
+    records = make_records()
+
+    writer = TransactionWriter(db_path, flush_interval=0.05)
+    assert writer.submit(TransactionBatch.from_records(records))
+    assert writer.flush()
+    writer.stop()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        rows = conn.execute(f"SELECT {TAIL_COLUMNS} FROM transactions ORDER BY id").fetchall()
+    finally:
+        conn.close()
+    assert rows[0][1] == datetime.fromtimestamp(1735689600.123).isoformat()
+    assert list(batch_from_rows(rows)) == records
+    assert writer.stats()["rows_written"] == 3
@@ -0,0 +1,62 @@
+import asyncio
+
+from mock_server import MockHyperliquidServer, synthetic_address
+from scraper import AsyncHyperliquidScraper
+
+USERS = [synthetic_address(i) for i in range(2)]
+
+
+def summary(transactions):
+    return sorted((tx.address, tx.order_type, tx.tid, tx.action, tx.coin, tx.quantity, tx.price) for tx in transactions)
+
+
+def test_replay_reproduces_a_recorded_run(tmp_path):
+    log = str(tmp_path / "traffic.ndjson.gz")
+
+    async def record():
+        server = MockHyperliquidServer()
+        await server.start()
+        server.seed(USERS, fills_per_user=4, orders_per_user=2)
+        scraper = AsyncHyperliquidScraper(base_url=server.info_url, persist=False, weight_per_minute=6000,
+                                          record_path=log)
+        try:
+            for user in USERS:
+                scraper.add_address(user, log=False)
+            cycles = [await scraper.check_all_addresses()]
+            server.add_fill(USERS[0], "BTC", "A", 94000.0, 0.25)
+            server.place_order(USERS[1], "SOL", "B", 180.0, 5.0)
+            cycles.append(await scraper.check_all_addresses())
+            return cycles
+        finally:
+            await scraper.close()
+            scraper.recorder.close()
+            await server.stop()
+
+    async def replay():
+        scraper = AsyncHyperliquidScraper(persist=False, weight_per_minute=0, replay_path=log, replay_speed=0)
+        session = scraper.replay_session
+        try:
+            assert session.users() == USERS
+            for user in USERS:
+                scraper.add_address(user, log=False)
+            cycles = [await scraper.check_all_addresses() for _ in range(2)]
+            served, misses = session.served, session.misses
+            assert session.exhausted
+
+            # Past the end of the log, and for a user it never saw: empty answers, counted as misses
+            scraper.add_address(synthetic_address(9), log=False)
+            extra = await scraper.check_all_addresses()
+            return cycles, served, misses, extra, session
+        finally:
+            await scraper.close()
+
+    recorded = asyncio.run(record())
+    replayed, served, misses, extra, session = asyncio.run(replay())
+
+    assert [summary(cycle) for cycle in replayed] == [summary(cycle) for cycle in recorded]
+    assert len(recorded[0]) == 12 and len(recorded[1]) == 2
+    assert misses == 0 and served == session.total
+    assert extra == []
+    assert session.served == served
+    # Two requests (fills and open orders) per watcher
+    assert session.misses == 2 * 3
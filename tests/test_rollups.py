@@ -0,0 +1,105 @@
+import random
+import sqlite3
+import time
+
+import pytest
+
+from records import BUY, LIMIT_OPEN, SELL, Transaction
+from rollups import backfill
+from store import ROLLUP_RESOLUTIONS, TransactionWriter, init_db, query_rollups
+
+ADDRESSES = ["0x" + "aa" * 20, "0x" + "bb" * 20, "0x" + "cc" * 20]
+COINS = ["BTC", "ETH", "SOL"]
+
+
+def random_fills(count, seed=7, start_ms=None):
+    rng = random.Random(seed)
+    start_ms = start_ms or int(time.time() * 1000) - 3 * 86_400_000
+    return [
+        Transaction(
+            time_ms=start_ms + rng.randrange(2 * 86_400_000),
+            address=rng.choice(ADDRESSES), action=rng.choice((BUY, SELL)), coin=rng.choice(COINS),
+            quantity=round(rng.uniform(-2, 5), 3), price=round(rng.uniform(1, 3000), 2),
+            fee=round(rng.uniform(0, 1), 4), closed_pnl=round(rng.uniform(-50, 50), 2), tid=i + 1
+        )
+        for i in range(count)
+    ]
+
+
+def write(db_path, batches):
+    writer = TransactionWriter(db_path, batch_size=50, flush_interval=0.01)
+    for batch in batches:
+        writer.submit(batch)
+    writer.stop()
+
+
+def rollups(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return {
+            row[:4]: tuple(round(value, 6) for value in row[4:])
+            for row in conn.execute("SELECT * FROM flow_rollups")
+        }
+    finally:
+        conn.close()
+
+
+def recomputed(db_path):
+    """Every bucket summed straight from the stored fills."""
+    conn = sqlite3.connect(db_path)
+    expected = {}
+    try:
+        for resolution, length in ROLLUP_RESOLUTIONS.items():
+            for address_sql in ("address", "''"):
+                for row in conn.execute(f"""
+                    SELECT {address_sql}, coin, replace(substr(timestamp, 1, {length}), ' ', 'T'),
+                        COUNT(*), SUM(value_usd),
+                        SUM(CASE WHEN action = 'BUY' THEN value_usd ELSE -value_usd END),
+                        SUM(abs(quantity)), SUM(closed_pnl), SUM(fee)
+                    FROM transactions WHERE order_type = 'FILLED' GROUP BY 1, 2, 3
+                """):
+                    expected[(resolution,) + row[:3]] = tuple(round(value, 6) for value in row[3:])
+    finally:
+        conn.close()
+    return expected
+
+
+def test_writer_keeps_rollups_equal_to_fills(tmp_path):
+    db_path = str(tmp_path / "rollups.db")
+    init_db(db_path)
+    fills = random_fills(400)
+    order = Transaction(time_ms=fills[0].time_ms, address=ADDRESSES[0], action="BUY LIMIT", coin="ETH",
+                        quantity=1.0, price=10.0, order_type=LIMIT_OPEN, tid=99)
+    # Repeats (already stored) and open orders must not be counted
+    write(db_path, [fills[:250], fills[200:] + [order], fills[:50]])
+
+    assert rollups(db_path) == recomputed(db_path)
+    total = sum(bucket["fills"] for bucket in query_rollups(db_path, "1d"))
+    assert total == 400
+
+
+def test_backfill_matches_the_writer(tmp_path):
+    db_path = str(tmp_path / "rollups.db")
+    init_db(db_path)
+    write(db_path, [random_fills(300)])
+    maintained = rollups(db_path)
+
+    assert backfill(db_path) == 300
+    assert rollups(db_path) == maintained
+
+
+def test_backfill_includes_archived_fills(tmp_path):
+    pytest.importorskip("pyarrow")
+    from archive import Compactor
+
+    db_path = str(tmp_path / "rollups.db")
+    init_db(db_path)
+    old = random_fills(100, seed=1, start_ms=int(time.time() * 1000) - 60 * 86_400_000)
+    for tx in old:
+        tx.tid += 1000
+    write(db_path, [old, random_fills(100, seed=2)])
+    maintained = rollups(db_path)
+    assert Compactor(db_path, hot_days=30).compact_once() == 100
+
+    assert backfill(db_path) == 200
+    assert rollups(db_path) == maintained
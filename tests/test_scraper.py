@@ -0,0 +1,180 @@
+import asyncio
+import time
+
+from mock_server import MockHyperliquidServer, synthetic_address
+from scraper import AsyncHyperliquidScraper
+
+
+def make_scraper(server, **kwargs):
+    return AsyncHyperliquidScraper(base_url=server.info_url, persist=False, **kwargs)
+
+
+def test_rate_limit_wait_stops_at_cycle_deadline():
+    async def main():
+        server = MockHyperliquidServer()
+        await server.start()
+        # 10 requests/s of weight 20 each: 20 requests need ~2s, the deadline allows 0.5s
+        scraper = make_scraper(server, weight_per_minute=600, rate_burst=20, cycle_timeout=0.5)
+        try:
+            for i in range(10):
+                scraper.add_address(synthetic_address(i), log=False)
+            started = time.monotonic()
+            await scraper.check_all_addresses()
+            return time.monotonic() - started, scraper._request_stats["deadline_exceeded"]
+        finally:
+            await scraper.close()
+            scraper.stop()
+            await server.stop()
+
+    elapsed, exceeded = asyncio.run(main())
+    assert elapsed < 1.5
+    assert exceeded > 0
+
+
+def test_failed_open_orders_fetch_keeps_order_state_and_cadence():
+    async def main():
+        server = MockHyperliquidServer(error_rate=1.0)
+        await server.start()
+        scraper = make_scraper(server, backoff_base=0.01, backoff_cap=0.01, breaker_failure_threshold=100)
+        try:
+            address = synthetic_address(0)
+            scraper.add_address(address, log=False)
+            watcher = scraper.watchers[address]
+            watcher.previously_open_orders = {"7"}
+            scraper.cadence._intervals[address] = 120.0
+            await scraper.check_due_addresses()
+            return watcher, scraper.cadence.interval_of(address)
+        finally:
+            await scraper.close()
+            scraper.stop()
+            await server.stop()
+
+    watcher, interval = asyncio.run(main())
+    assert watcher.previously_open_orders == {"7"}
+    assert not watcher.last_check_active
+    assert not watcher.state_dirty
+    assert interval == 120.0
+
+
+def test_stop_interrupts_run_between_cycles(tmp_path):
+    async def main():
+        server = MockHyperliquidServer()
+        await server.start()
+        scraper = AsyncHyperliquidScraper(base_url=server.info_url, db_path=str(tmp_path / "run.db"))
+        try:
+            scraper.add_address(synthetic_address(0), log=False)
+            task = asyncio.create_task(scraper.run(interval=60))
+            while scraper.ticker is None or scraper.ticker.last_duration == 0:
+                await asyncio.sleep(0.01)
+            requests = server.requests
+            started = time.monotonic()
+            scraper.stop()
+            await asyncio.wait_for(task, 5)
+            return time.monotonic() - started, server.requests - requests, scraper
+        finally:
+            await server.stop()
+
+    elapsed, extra_requests, scraper = asyncio.run(main())
+    assert elapsed < 1.0
+    assert extra_requests == 0
+    assert scraper.ticker.ticks == 1
+    assert scraper._session is None
+    assert not (scraper.writer._thread and scraper.writer._thread.is_alive())
+
+
+def test_aborted_half_open_probe_lets_the_next_request_probe():
+    from breaker import HALF_OPEN
+    from scraper import _cycle_deadline
+
+    async def main():
+        server = MockHyperliquidServer()
+        await server.start()
+        scraper = make_scraper(server, weight_per_minute=60, rate_burst=20)
+        try:
+            address = synthetic_address(0)
+            scraper.add_address(address, log=False)
+            breaker = scraper.breaker
+            breaker._open(0.0)  # open, and due for a probe
+            scraper.rate_limiter.charge(40)  # the probe can't get weight before the deadline
+            session = await scraper.get_session()
+            token = _cycle_deadline.set(time.monotonic() + 0.2)
+            try:
+                aborted = await scraper.watchers[address].fetch_open_orders(session)
+            finally:
+                _cycle_deadline.reset(token)
+            return aborted, breaker
+        finally:
+            await scraper.close()
+            scraper.stop()
+            await server.stop()
+
+    aborted, breaker = asyncio.run(main())
+    assert aborted is None
+    assert breaker.metrics["probes"] == 1
+    # Without release_probe() this waits out reset_timeout
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+    assert breaker.metrics["probes"] == 2
+
+
+def test_fill_backlog_past_max_pages_resumes_next_cycle():
+    async def main():
+        server = MockHyperliquidServer()
+        await server.start()
+        scraper = make_scraper(server, weight_per_minute=0, incremental_fills=True, max_fill_pages=2)
+        try:
+            address = synthetic_address(0)
+            scraper.add_address(address, log=False)
+            start = int(time.time() * 1000) - 60_000
+            server.add_fill(address, time_ms=start)
+            cycles = [await scraper.check_all_addresses()]
+
+            # 4500 fills a millisecond apart: two full pages now, the rest next cycle
+            for i in range(1, 4501):
+                server.add_fill(address, time_ms=start + i)
+            requests = server.requests
+            cycles.append(await scraper.check_all_addresses())
+            cycle_requests = server.requests - requests
+            cycles.append(await scraper.check_all_addresses())
+            return cycles, cycle_requests, scraper.watchers[address], start
+        finally:
+            await scraper.close()
+            scraper.stop()
+            await server.stop()
+
+    cycles, cycle_requests, watcher, start = asyncio.run(main())
+    assert [len(cycle) for cycle in cycles] == [1, 3998, 502]
+    assert cycle_requests == 2 + 1  # two fill pages and the open orders
+    assert len({tx.tid for cycle in cycles for tx in cycle}) == 4501
+    assert watcher.last_fill_time_ms == start + 4500
+    assert watcher.fill_gaps == 0
+
+
+def test_missing_last_seen_fill_counts_a_gap():
+    async def main():
+        server = MockHyperliquidServer()
+        await server.start()
+        scraper = make_scraper(server, weight_per_minute=0, incremental_fills=True)
+        try:
+            address = synthetic_address(0)
+            scraper.add_address(address, log=False)
+            start = int(time.time() * 1000) - 60_000
+            for i in range(3):
+                last = server.add_fill(address, time_ms=start + i)
+            await scraper.check_all_addresses()
+            watcher = scraper.watchers[address]
+            assert (watcher.last_fill_time_ms, watcher.last_fill_tid) == (last["time"], last["tid"])
+
+            # The last seen fill ages out of the API before the next poll
+            del server.fills[address][:]
+            fill = server.add_fill(address, time_ms=start + 10)
+            new = await scraper.check_all_addresses()
+            return new, fill, watcher
+        finally:
+            await scraper.close()
+            scraper.stop()
+            await server.stop()
+
+    new, fill, watcher = asyncio.run(main())
+    assert [tx.tid for tx in new] == [fill["tid"]]
+    assert watcher.fill_gaps == 1
@@ -0,0 +1,88 @@
+import asyncio
+import sqlite3
+import threading
+import time
+
+from mock_server import MockHyperliquidServer, synthetic_address
+from sharding import ShardedScraper
+
+ADDRESSES = [synthetic_address(i) for i in range(12)]
+
+
+class ServerThread:
+    """The mock API on its own event loop, for code that blocks the caller's thread."""
+
+    def __init__(self):
+        self.server = MockHyperliquidServer()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.call(self.server.start())
+
+    def call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(10)
+
+    def add_fill(self, address):
+        self.loop.call_soon_threadsafe(self.server.add_fill, address)
+
+    def close(self):
+        self.call(self.server.stop())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+
+
+def drain_until(sharded, count, timeout=30.0):
+    transactions = []
+    deadline = time.monotonic() + timeout
+    while len(transactions) < count and time.monotonic() < deadline:
+        transactions.extend(sharded.drain(timeout=0.2))
+    return transactions
+
+
+def stored_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_resize_and_stop_keep_watcher_state(tmp_path):
+    api = ServerThread()
+    db_path = str(tmp_path / "sharded.db")
+    api.call(asyncio.sleep(0))
+    api.server.seed(ADDRESSES, fills_per_user=3)
+    sharded = ShardedScraper(
+        num_shards=2, db_path=db_path, interval=1, base_url=api.server.info_url,
+        weight_per_minute=6000
+    )
+    try:
+        for address in ADDRESSES:
+            sharded.add_address(address)
+        sharded.start()
+        # Initial watchers are in place for the first tick
+        first = drain_until(sharded, len(ADDRESSES) * 3)
+        assert len(first) == len(ADDRESSES) * 3
+
+        moves = sharded.resize(3)
+        assert moves
+        for address in ADDRESSES:
+            api.add_fill(address)
+        later = drain_until(sharded, len(ADDRESSES), timeout=10.0)
+        later.extend(sharded.drain(timeout=2.0))
+        # Moved addresses don't report their history again
+        assert len(later) == len(ADDRESSES)
+
+        processes = list(sharded._processes.values())
+        sharded.stop()
+        assert [process.exitcode for process in processes] == [0] * len(processes)
+    finally:
+        if sharded.is_running:
+            sharded.stop()
+        api.close()
+
+    assert stored_rows(db_path) == len(ADDRESSES) * 4
+    # A restart resumes from the saved marks
+    restarted = ShardedScraper(num_shards=2, db_path=db_path)
+    assert restarted.states[ADDRESSES[0]].last_fill_tid is not None
+    restarted.writer.stop()
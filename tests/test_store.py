@@ -0,0 +1,211 @@
+import asyncio
+import sqlite3
+from datetime import datetime
+
+from mock_server import MockHyperliquidServer
+from scraper import AsyncHyperliquidScraper
+from store import SCHEMA_VERSION, init_db
+
+USER = "0x" + "ab" * 20
+
+# The transactions table as the first release created it
+BASELINE_TABLE = """
+    CREATE TABLE transactions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        timestamp DATETIME,
+        address TEXT,
+        action TEXT,
+        coin TEXT,
+        quantity REAL,
+        price REAL,
+        value_usd REAL,
+        fee REAL,
+        tx_hash TEXT,
+        closed_pnl REAL,
+        order_type TEXT DEFAULT 'FILLED',
+        UNIQUE(address, tx_hash, timestamp)
+    )
+"""
+
+
+def make_baseline_db(db_path, fills):
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute(BASELINE_TABLE)
+        conn.executemany(
+            """INSERT OR IGNORE INTO transactions
+            (timestamp, address, action, coin, quantity, price, value_usd, fee, tx_hash, closed_pnl, order_type)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [
+                (
+                    datetime.fromtimestamp(fill["time"] / 1000).isoformat(), USER,
+                    "BUY" if fill["side"] == "B" else "SELL", fill["coin"], float(fill["sz"]),
+                    float(fill["px"]), float(fill["sz"]) * float(fill["px"]), float(fill["fee"]),
+                    fill["hash"], float(fill["closedPnl"]), "FILLED"
+                )
+                for fill in fills
+            ]
+        )
+    conn.close()
+
+
+def count_rows(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_migration_keeps_rows_and_bumps_version(tmp_path):
+    db_path = str(tmp_path / "old.db")
+    server = MockHyperliquidServer()
+    server.seed([USER], fills_per_user=20)
+    make_baseline_db(db_path, server.fills[USER])
+
+    init_db(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(transactions)")}
+        assert "tid" in columns
+        assert conn.execute("SELECT COUNT(*) FROM transactions WHERE tid IS NULL").fetchone()[0] == 20
+    finally:
+        conn.close()
+
+
+def test_poll_after_migration_does_not_duplicate_history(tmp_path):
+    db_path = str(tmp_path / "old.db")
+
+    async def main():
+        server = MockHyperliquidServer()
+        server.seed([USER], fills_per_user=50)
+        await server.start()
+        make_baseline_db(db_path, server.fills[USER])
+        scraper = AsyncHyperliquidScraper(base_url=server.info_url, db_path=db_path, db_flush_interval=0.05)
+        try:
+            scraper.add_address(USER)
+            await scraper.check_all_addresses()
+            # A fill made after the upgrade is still stored
+            server.add_fill(USER)
+            await scraper.check_all_addresses()
+        finally:
+            await scraper.close()
+            scraper.stop()
+            await server.stop()
+
+    asyncio.run(main())
+    assert count_rows(db_path) == 51
+
+
+def test_v0_migration_drops_repeated_limit_orders(tmp_path):
+    db_path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute(BASELINE_TABLE)
+        # The old key let the same open order (no hash) in on every restart
+        for _ in range(3):
+            conn.execute(
+                "INSERT INTO transactions (timestamp, address, action, coin, quantity, price, value_usd, "
+                "fee, tx_hash, closed_pnl, order_type) VALUES "
+                "('2025-01-01T00:00:00', ?, 'BUY LIMIT', 'ETH', 1, 2000, 2000, 0, NULL, 0, 'LIMIT_OPEN')",
+                (USER,)
+            )
+    conn.close()
+
+    init_db(db_path)
+    assert count_rows(db_path) == 1
+
+
+def test_v1_store_gets_rollups_table_and_backfill(tmp_path, caplog):
+    from rollups import backfill
+    from store import TRANSACTIONS_TABLE, query_rollups
+
+    db_path = str(tmp_path / "v1.db")
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute(TRANSACTIONS_TABLE.format(name="transactions"))
+        conn.executemany(
+            "INSERT INTO transactions (timestamp, address, action, coin, quantity, price, value_usd, fee, "
+            "tx_hash, closed_pnl, order_type, tid) VALUES (?, ?, ?, 'ETH', 1, 2000, 2000, 1, NULL, 5, 'FILLED', ?)",
+            [("2025-01-01T10:%02d:00" % i, USER, "BUY" if i % 2 else "SELL", i) for i in range(6)]
+        )
+        conn.execute("PRAGMA user_version = 1")
+    conn.close()
+
+    init_db(db_path)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert conn.execute("SELECT COUNT(*) FROM flow_rollups").fetchone()[0] == 0
+    finally:
+        conn.close()
+    assert "rollups.py backfill" in caplog.text
+    assert count_rows(db_path) == 6
+
+    backfill(db_path)
+    [hour] = query_rollups(db_path, "1h", coin="ETH")
+    assert hour["bucket"] == "2025-01-01T10"
+    assert hour["fills"] == 6
+    assert hour["volume"] == 12000
+    assert hour["net_notional"] == 0
+    assert hour["realized_pnl"] == 30
+
+
+def test_submit_state_never_blocks_on_a_full_queue(tmp_path, monkeypatch):
+    import time
+
+    import metrics
+    from store import StateUpdate, TransactionWriter, load_state
+
+    db_path = str(tmp_path / "state.db")
+    init_db(db_path)
+    writer = TransactionWriter(db_path, max_pending_batches=1)
+    # Writer thread not started yet, so the queue stays full
+    monkeypatch.setattr(writer, "start", lambda: None)
+    writer._queue.put(StateUpdate())
+
+    started = time.monotonic()
+    first, second = StateUpdate(), StateUpdate()
+    first.add_address(USER, "whale")
+    second.set_mark(USER, 42, 1000)
+    writer.submit_state(first)
+    writer.submit_state(second)
+    assert time.monotonic() - started < 0.5
+
+    batches = sum(metrics.DB_BATCH_ROWS._values.get((), [[0]])[0])
+    monkeypatch.undo()
+    writer.start()
+    writer.stop()
+    # Held updates are written on stop; state-only writes aren't row batches
+    state = load_state(db_path)[USER]
+    assert (state.name, state.last_fill_tid) == ("whale", 42)
+    assert sum(metrics.DB_BATCH_ROWS._values.get((), [[0]])[0]) == batches
+
+
+def test_submit_async_waits_for_queue_space_off_the_loop(tmp_path, monkeypatch):
+    from records import Transaction
+    from store import StateUpdate, TransactionWriter
+
+    db_path = str(tmp_path / "async.db")
+    init_db(db_path)
+    writer = TransactionWriter(db_path, max_pending_batches=1)
+    monkeypatch.setattr(writer, "start", lambda: None)
+    writer._queue.put(StateUpdate())
+    fill = Transaction(1735689600000, USER, "BUY", "BTC", 1.0, 94000.0, tid=1)
+
+    async def main():
+        submit = asyncio.create_task(writer.submit_async([fill]))
+        ticks = 0
+        while ticks < 5:
+            await asyncio.sleep(0.01)
+            ticks += 1
+        # The loop kept running while the submit waited
+        assert not submit.done()
+        writer._queue.get_nowait()
+        assert await asyncio.wait_for(submit, 2)
+
+    asyncio.run(main())
+    assert len(writer._queue.get_nowait()) == 1
@@ -0,0 +1,193 @@
+import asyncio
+import sqlite3
+import time
+
+from mock_server import MockHyperliquidServer, synthetic_address
+from scraper import AsyncHyperliquidScraper
+from stream import HyperliquidStream
+
+USERS = [synthetic_address(i) for i in range(2)]
+
+
+async def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+class StreamHarness:
+    """A scraper's stream against the mock server, collecting what it emits."""
+
+    def __init__(self, server, users=USERS, **stream_options):
+        self.scraper = AsyncHyperliquidScraper(base_url=server.info_url, persist=False, weight_per_minute=6000)
+        for user in users:
+            self.scraper.add_address(user, log=False)
+        self.stream = HyperliquidStream(self.scraper, url=server.ws_url, reconnect_delay=0.05, **stream_options)
+        self.emitted = []
+        self._task = None
+
+    async def __aenter__(self):
+        self.scraper.is_running = True
+        self._task = asyncio.create_task(self.stream.run(self.emitted.extend))
+        await wait_for(lambda: self.stream.stats["reconciliations"] >= 1)
+        return self
+
+    async def __aexit__(self, *exc):
+        self.scraper.is_running = False
+        await self.stream.close()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        await self.scraper.close()
+
+
+def subscriptions(server):
+    return set().union(*server._subscriptions.values()) if server._subscriptions else set()
+
+
+def test_subscribes_every_watcher_and_streams_its_fills():
+    async def main():
+        server = MockHyperliquidServer()
+        await server.start()
+        try:
+            async with StreamHarness(server) as harness:
+                await wait_for(lambda: len(subscriptions(server)) == 4)
+                assert subscriptions(server) == {
+                    (channel, user) for channel in ("userFills", "orderUpdates") for user in USERS
+                }
+                fill = server.add_fill(USERS[1], "BTC", "A", 94000.0, 0.5)
+                await wait_for(lambda: harness.emitted)
+                return fill, harness.emitted
+        finally:
+            await server.stop()
+
+    fill, emitted = asyncio.run(main())
+    assert [(tx.address, tx.tid, tx.action, tx.coin) for tx in emitted] == [(USERS[1], fill["tid"], "SELL", "BTC")]
+
+
+def test_reconnect_resubscribes_without_replaying_the_snapshot():
+    async def main():
+        server = MockHyperliquidServer()
+        await server.start()
+        try:
+            async with StreamHarness(server) as harness:
+                server.add_fill(USERS[0])
+                await wait_for(lambda: len(harness.emitted) == 1)
+
+                await server.drop_connections()
+                await wait_for(lambda: harness.stream.stats["reconnects"] == 1 and len(subscriptions(server)) == 4)
+                # The resubscribe snapshot repeats the first fill; only the new one comes out
+                server.add_fill(USERS[0])
+                await wait_for(lambda: len(harness.emitted) == 2)
+                await asyncio.sleep(0.1)
+                return harness.emitted
+        finally:
+            await server.stop()
+
+    emitted = asyncio.run(main())
+    assert [tx.tid for tx in emitted] == [1, 2]
+
+
+def test_streamed_and_polled_fills_are_emitted_once():
+    async def main():
+        server = MockHyperliquidServer()
+        await server.start()
+        server.add_fill(USERS[0])
+        try:
+            async with StreamHarness(server) as harness:
+                # The fill comes from the subscribe snapshot or the poll, whichever is first
+                first_poll = await harness.scraper.check_all_addresses()
+                await asyncio.sleep(0.1)
+                streamed_before = list(harness.emitted)
+
+                server.add_fill(USERS[1])
+                await wait_for(lambda: len(harness.emitted) == len(streamed_before) + 1)
+                # A poll after the stream delivered the fill doesn't repeat it
+                second_poll = await harness.scraper.check_all_addresses()
+                return first_poll, streamed_before, harness.emitted, second_poll
+        finally:
+            await server.stop()
+
+    first_poll, streamed_before, emitted, second_poll = asyncio.run(main())
+    assert len(streamed_before) + len(first_poll) == 1
+    assert [tx.address for tx in emitted[len(streamed_before):]] == [USERS[1]]
+    assert second_poll == []
+
+
+def test_unattributed_order_updates_coalesce_into_one_reconcile():
+    async def main():
+        server = MockHyperliquidServer()
+        await server.start()
+        try:
+            async with StreamHarness(server, reconcile_interval=1.0) as harness:
+                await wait_for(lambda: len(subscriptions(server)) == 4)
+                stats = harness.stream.stats
+                # orderUpdates carry no user, and with two users a new oid can't be attributed
+                for _ in range(5):
+                    server.place_order(USERS[0])
+                    await asyncio.sleep(0.1)
+                await wait_for(lambda: stats["reconcile_requests"] == 5)
+                await wait_for(lambda: len(harness.emitted) == 5)
+                await asyncio.sleep(0.3)
+                return dict(stats), harness.emitted
+        finally:
+            await server.stop()
+
+    stats, emitted = asyncio.run(main())
+    # The connect-time snapshot, then one more for the whole burst
+    assert stats["reconciliations"] == 2
+    assert len({tx.tid for tx in emitted}) == 5
+
+
+def test_warm_restart_mid_stream_resumes_without_repeats(tmp_path):
+    db_path = str(tmp_path / "restart.db")
+    user = USERS[0]
+
+    def make_scraper(server):
+        return AsyncHyperliquidScraper(
+            db_path=db_path, base_url=server.info_url, ws_url=server.ws_url,
+            weight_per_minute=6000, db_flush_interval=0.05
+        )
+
+    async def main():
+        server = MockHyperliquidServer()
+        await server.start()
+        server.seed([user], fills_per_user=3, orders_per_user=2)
+        try:
+            first = make_scraper(server)
+            first.add_address(user, log=False)
+            before = []
+            task = asyncio.create_task(first.run(interval=60, mode="stream", on_transactions=before.extend))
+            await wait_for(lambda: len(before) == 5)  # snapshot fills and open orders
+            server.add_fill(user)
+            await wait_for(lambda: len(before) == 6)
+            first.stop()
+            await asyncio.wait_for(task, 5)
+
+            second = make_scraper(server)
+            watcher = second.watchers[user]
+            restored_orders = set(watcher.previously_open_orders)
+            after = []
+            task = asyncio.create_task(second.run(interval=60, mode="stream", on_transactions=after.extend))
+            await wait_for(lambda: second.stream is not None and second.stream.stats["reconciliations"] >= 1)
+            await asyncio.sleep(0.2)
+            replayed = list(after)
+            fill = server.add_fill(user)
+            await wait_for(lambda: len(after) == len(replayed) + 1)
+            second.stop()
+            await asyncio.wait_for(task, 5)
+            return before, restored_orders, replayed, after, fill, server
+        finally:
+            await server.stop()
+
+    before, restored_orders, replayed, after, fill, server = asyncio.run(main())
+    assert restored_orders == {str(oid) for oid in server.open_orders[user]}
+    # The resubscribe snapshot and the open-order reconcile bring nothing back
+    assert replayed == []
+    assert [tx.tid for tx in after] == [fill["tid"]]
+    conn = sqlite3.connect(db_path)
+    try:
+        stored = conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    finally:
+        conn.close()
+    assert stored == len(before) + 1